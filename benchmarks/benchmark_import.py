@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmarks the import time of voicechat_modem_dsp modules
+
+Every import is timed in a fresh interpreter so module caches do not hide
+regressions, and records whether SciPy was loaded as a side effect
+With --check, exits with an error if a module that should not need SciPy
+imports it or if an import exceeds --limit milliseconds
+
+Example:
+    python benchmarks/benchmark_import.py --repeat 5 --check -o imports.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+package_root=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          os.pardir)
+
+# Modules used by encoding-only workers, which must not import SciPy
+light_modules=["voicechat_modem_dsp",
+               "voicechat_modem_dsp.registry",
+               "voicechat_modem_dsp.encoders.encode_pad",
+               "voicechat_modem_dsp.encoders.encode_stream",
+               "voicechat_modem_dsp.encoders.ecc.codecs",
+               "voicechat_modem_dsp.pipeline.transmit",
+               "voicechat_modem_dsp.modulators.modulator_fsk"]
+
+heavy_modules=["voicechat_modem_dsp.pipeline.receive",
+               "scipy.signal"]
+
+measure_code="""
+import json, resource, sys, time
+start=time.perf_counter()
+import {module}
+elapsed=time.perf_counter()-start
+print(json.dumps({{"seconds":elapsed,
+                  "scipy_loaded":"scipy" in sys.modules,
+                  "max_rss_kb":resource.getrusage(
+                      resource.RUSAGE_SELF).ru_maxrss}}))
+"""
+
+def measure_import(module):
+    output=subprocess.check_output(
+        [sys.executable,"-c",measure_code.format(module=module)],
+        cwd=package_root)
+    return json.loads(output.decode("utf-8"))
+
+def bench_module(module, repeat):
+    runs=[measure_import(module) for _ in range(repeat)]
+    return {"module":module,
+            "median_ms":1000*statistics.median(run["seconds"] for run in runs),
+            "min_ms":1000*min(run["seconds"] for run in runs),
+            "max_rss_kb":max(run["max_rss_kb"] for run in runs),
+            "scipy_loaded":any(run["scipy_loaded"] for run in runs)}
+
+def main():
+    parser=argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--repeat",type=int,default=5,
+                        help="Fresh interpreters per module")
+    parser.add_argument("--check",action="store_true",
+                        help="Fail if light modules import SciPy or are slow")
+    parser.add_argument("--limit",type=float,default=500,
+                        help="Maximum median import time in ms for --check")
+    parser.add_argument("-o","--output",help="Write results as JSON")
+    args=parser.parse_args()
+
+    results=list()
+    failures=list()
+    for module in light_modules+heavy_modules:
+        record=bench_module(module,args.repeat)
+        results.append(record)
+        print("{:<48} {:>9.1f} ms {:>9d} KB  scipy={}".format(module,
+            record["median_ms"],record["max_rss_kb"],record["scipy_loaded"]))
+        if module in light_modules:
+            if record["scipy_loaded"]:
+                failures.append(module+" imports SciPy")
+            if record["median_ms"]>args.limit:
+                failures.append(module+" exceeds the import time limit")
+
+    if args.output is not None:
+        with open(args.output,"w") as output_file:
+            json.dump(results,output_file,indent=2)
+    if args.check and failures:
+        for failure in failures:
+            print("FAIL: "+failure,file=sys.stderr)
+        sys.exit(1)
+
+if __name__=="__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Benchmarks encoders, ECC, filter design and modulators
+
+Reports throughput and peak traced memory for every stage and saves the
+results as JSON so runs can be compared across commits
+
+Example:
+    python benchmarks/benchmark_modem.py --sizes 1K,1M,100M -o results.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import scipy
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               os.pardir))
+
+from voicechat_modem_dsp.encoders.encode_pad import \
+    encode_function_mappings, decode_function_mappings
+from voicechat_modem_dsp.encoders.ecc.hamming_7_4 import \
+    hamming_encode_7_4, hamming_decode_7_4
+from voicechat_modem_dsp.modulators.filter_cache import filter_cache
+from voicechat_modem_dsp.modulators.modulator_fsk import FSKModulator
+from voicechat_modem_dsp.modulators.modulator_utils import \
+    fred_harris_fir_tap_count, lowpass_fir_filter, compute_gaussian_window
+
+size_suffixes={"K":1<<10,"M":1<<20,"G":1<<30}
+
+def parse_size(size_str):
+    size_str=size_str.strip().upper()
+    if size_str[-1] in size_suffixes:
+        return int(float(size_str[:-1])*size_suffixes[size_str[-1]])
+    return int(size_str)
+
+def format_size(size):
+    for suffix in ["G","M","K"]:
+        if size>=size_suffixes[suffix] and size%size_suffixes[suffix]==0:
+            return str(size//size_suffixes[suffix])+suffix
+    return str(size)
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git","rev-parse","HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL).decode("ascii").strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+"""
+Times func over repeat runs and measures peak traced memory of one run
+Returns (best time in seconds, peak memory in bytes, last result)
+"""
+def measure(func, repeat):
+    best_time=float("inf")
+    for _ in range(repeat):
+        start_time=time.perf_counter()
+        result=func()
+        best_time=min(best_time,time.perf_counter()-start_time)
+        del result
+    tracemalloc.start()
+    result=func()
+    peak_memory=tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best_time,peak_memory,result
+
+def make_record(stage, name, size, elapsed, peak_memory, unit_count, unit):
+    record={"stage":stage,"name":name,"payload_bytes":size,
+            "seconds":elapsed,"peak_memory_bytes":peak_memory}
+    rate=unit_count/elapsed if elapsed>0 else float("inf")
+    if unit=="bytes":
+        record["mb_per_second"]=rate/(1<<20)
+    else:
+        record[unit+"_per_second"]=rate
+    return record
+
+def bench_encoders(payload, repeat):
+    records=list()
+    for radix in sorted(encode_function_mappings):
+        encode_func=encode_function_mappings[radix]
+        decode_func=decode_function_mappings[radix]
+        elapsed,peak,datastream=measure(lambda: encode_func(payload),repeat)
+        records.append(make_record("encode","base_"+str(radix),len(payload),
+                                   elapsed,peak,len(payload),"bytes"))
+        elapsed,peak,_=measure(lambda: decode_func(datastream),repeat)
+        records.append(make_record("decode","base_"+str(radix),len(payload),
+                                   elapsed,peak,len(payload),"bytes"))
+        del datastream
+    return records
+
+def bench_ecc(payload, repeat):
+    records=list()
+    elapsed,peak,encoded=measure(lambda: hamming_encode_7_4(payload),repeat)
+    records.append(make_record("ecc_encode","hamming_7_4",len(payload),
+                               elapsed,peak,len(payload),"bytes"))
+    elapsed,peak,_=measure(lambda: hamming_decode_7_4(encoded),repeat)
+    records.append(make_record("ecc_decode","hamming_7_4",len(payload),
+                               elapsed,peak,len(payload),"bytes"))
+    return records
+
+def bench_filters(repeat):
+    records=list()
+    filter_configs=[(1/8000,2600,2700),(1/48000,3000,3300),
+                    (1/44100,2800,3100)]
+    for dt,cutoff_low,cutoff_high in filter_configs:
+        name="lowpass_"+str(int(round(1/dt)))+"_"+str(cutoff_low)
+        def design_cold():
+            filter_cache.clear()
+            return lowpass_fir_filter(dt,cutoff_low,cutoff_high)
+        elapsed,peak,_=measure(design_cold,repeat)
+        records.append(make_record("filter_design",name+"_cold",0,
+                                   elapsed,peak,1,"designs"))
+        elapsed,peak,_=measure(lambda: lowpass_fir_filter(dt,cutoff_low,
+            cutoff_high),repeat)
+        records.append(make_record("filter_design",name+"_cached",0,
+                                   elapsed,peak,1,"designs"))
+    elapsed,peak,_=measure(lambda: fred_harris_fir_tap_count(48000,300,80),
+                           repeat)
+    records.append(make_record("filter_design","fred_harris_tap_count",0,
+                               elapsed,peak,1,"designs"))
+    def window_cold():
+        filter_cache.clear()
+        return compute_gaussian_window(1/48000,0.001)
+    elapsed,peak,_=measure(window_cold,repeat)
+    records.append(make_record("filter_design","gaussian_window_cold",0,
+                               elapsed,peak,1,"designs"))
+    return records
+
+def bench_modulators(payload, repeat):
+    records=list()
+    modulator_configs=[("fsk_8000_4",1/8000,
+                        {i:1000+300*i for i in range(4)},300),
+                       ("fsk_48000_16",1/48000,
+                        {i:600+200*i for i in range(16)},150)]
+    for name,dt,freq_map,baud in modulator_configs:
+        modulator=FSKModulator(dt,freq_map,baud)
+        datastream=np.array(encode_function_mappings[len(freq_map)](payload))
+        elapsed,peak,signal=measure(lambda: modulator.modulate(datastream),
+                                    repeat)
+        records.append(make_record("modulate",name,len(payload),
+                                   elapsed,peak,len(signal),"samples"))
+        time_array=modulator.time_array(len(signal))
+        elapsed,peak,_=measure(lambda: modulator.demodulate(time_array,
+            signal),repeat)
+        records.append(make_record("demodulate",name,len(payload),
+                                   elapsed,peak,len(signal),"samples"))
+        del signal
+    return records
+
+def main():
+    parser=argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--sizes",default="1K,64K,1M",
+                        help="Comma separated payload sizes, e.g. 1K,1M,100M")
+    parser.add_argument("--max-modulate-size",default="1M",
+                        help="Largest payload size used for modulators")
+    parser.add_argument("--repeat",type=int,default=3,
+                        help="Timing runs per benchmark, best is reported")
+    parser.add_argument("-o","--output",default=None,
+                        help="Path of JSON file to write results to")
+    args=parser.parse_args()
+
+    sizes=[parse_size(size) for size in args.sizes.split(",")]
+    max_modulate_size=parse_size(args.max_modulate_size)
+    random_state=np.random.RandomState(0)
+
+    records=bench_filters(args.repeat)
+    for size in sizes:
+        payload=random_state.bytes(size)
+        records+=bench_encoders(payload,args.repeat)
+        records+=bench_ecc(payload,args.repeat)
+        if size<=max_modulate_size:
+            records+=bench_modulators(payload,args.repeat)
+
+    for record in records:
+        rate_key=[key for key in record if key.endswith("_per_second")][0]
+        print("{:<14} {:<28} {:>6} {:>12.4g} {:<18} {:>10.1f} MiB".format(
+            record["stage"],record["name"],
+            format_size(record["payload_bytes"]),record[rate_key],rate_key,
+            record["peak_memory_bytes"]/(1<<20)))
+
+    results={"commit":git_commit(),
+             "timestamp":time.time(),
+             "python":platform.python_version(),
+             "numpy":np.__version__,
+             "scipy":scipy.__version__,
+             "platform":platform.platform(),
+             "results":records}
+    if args.output is not None:
+        with open(args.output,"w") as output_file:
+            json.dump(results,output_file,indent=2)
+
+if __name__=="__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Sweeps modem parameters over a simulated channel and reports BER and goodput
+
+Every combination of the comma separated parameter lists is simulated on
+a process pool and the results can be saved as JSON
+
+Example:
+    python benchmarks/ber_sweep.py --radix 2,4,16 --baud 300,600 \\
+        --snr=-5,0,5,10 --payload-size 128K -o sweep.json
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               os.pardir))
+
+from voicechat_modem_dsp.simulation.sweep import evenly_spaced_freq_map, \
+    parameter_grid, run_sweep
+
+from benchmark_modem import parse_size
+
+def parse_list(list_str, convert=float):
+    return [convert(value) for value in list_str.split(",")]
+
+def main():
+    parser=argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--radix",default="2,4",
+                        help="Comma separated tone counts")
+    parser.add_argument("--baud",default="300")
+    parser.add_argument("--snr",default="-5,0,5,10",
+                        help="Comma separated SNRs in dB")
+    parser.add_argument("--low",type=float,default=1000,
+                        help="Lowest tone in Hz")
+    parser.add_argument("--high",type=float,default=2500,
+                        help="Highest tone in Hz")
+    parser.add_argument("--sample-rate",type=float,default=8000)
+    parser.add_argument("--band",default="300,3400",
+                        help="Channel passband in Hz, or none")
+    parser.add_argument("--burst-rate",type=float,default=0,
+                        help="Dropouts per second")
+    parser.add_argument("--burst-duration",type=float,default=0,
+                        help="Dropout length in seconds")
+    parser.add_argument("--no-ecc",action="store_true")
+    parser.add_argument("--interleave",default=None,
+                        help="Interleaver rows,columns")
+    parser.add_argument("--payload-size",default="16K",
+                        help="Payload bytes per configuration")
+    parser.add_argument("--processes",type=int,default=None)
+    parser.add_argument("--seed",type=int,default=None)
+    parser.add_argument("-o","--output",help="Write results as JSON")
+    args=parser.parse_args()
+
+    band=None
+    if args.band.lower()!="none":
+        band=tuple(parse_list(args.band))
+    interleave_shape=None
+    if args.interleave is not None:
+        interleave_shape=tuple(parse_list(args.interleave,int))
+
+    grid=parameter_grid(radix=parse_list(args.radix,int),
+                        baud=parse_list(args.baud),
+                        snr_db=parse_list(args.snr))
+    configs=list()
+    for point in grid:
+        configs.append({"freq_map":evenly_spaced_freq_map(point["radix"],
+                                                          args.low,args.high),
+                        "baud":point["baud"],
+                        "snr_db":point["snr_db"],
+                        "sample_rate":args.sample_rate,
+                        "band":band,
+                        "burst_rate":args.burst_rate,
+                        "burst_duration":args.burst_duration,
+                        "use_ecc":not args.no_ecc,
+                        "interleave_shape":interleave_shape,
+                        "payload_bytes":parse_size(args.payload_size)})
+    results=run_sweep(configs,args.processes,args.seed)
+
+    print("{:>5} {:>7} {:>7} {:>12} {:>10} {:>10} {:>8}".format(
+        "radix","baud","snr_db","ber","goodput","throughput","time"))
+    records=list()
+    for point,result in zip(grid,results):
+        print("{:>5d} {:>7g} {:>7g} {:>12.3e} {:>10.1f} {:>10.1f} {:>7.2f}s"
+              .format(point["radix"],point["baud"],point["snr_db"],
+                      result.ber,result.goodput,result.throughput,
+                      result.elapsed))
+        record=dict(point)
+        record.update({"payload_bits":result.payload_bits,
+                       "bit_errors":result.bit_errors,
+                       "ber":result.ber,
+                       "airtime":result.airtime,
+                       "goodput":result.goodput,
+                       "throughput":result.throughput,
+                       "elapsed":result.elapsed})
+        records.append(record)
+
+    if args.output is not None:
+        with open(args.output,"w") as output_file:
+            json.dump({"args":vars(args),"results":records},output_file,
+                      indent=2)
+
+if __name__=="__main__":
+    main()
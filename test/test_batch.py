@@ -0,0 +1,37 @@
+import os
+import random
+
+import numpy as np
+
+from voicechat_modem_dsp.modulators.modulator_fsk import FSKModulator
+from voicechat_modem_dsp.pipeline.batch import *
+from voicechat_modem_dsp.pipeline.transmit import *
+
+def test_property_encoded_symbol_count():
+    for radix in [2,4,8,16,32,64,256]:
+        for use_ecc in [False,True]:
+            n=random.randint(0,64)
+            payload=bytes((random.getrandbits(8) for _ in range(n)))
+            assert encoded_symbol_count(n,radix,use_ecc)==\
+                len(encode_payload(payload,radix,use_ecc))
+
+def test_unit_batch_modulate():
+    freq_map={0:1000,1:1300,2:1600,3:1900}
+    modulator=FSKModulator(1/8000,freq_map,300)
+    payloads=[bytes((random.getrandbits(8) for _ in range(n)))
+              for n in [0,1,17,64,3]]
+    with BatchModem(1/8000,freq_map,300,processes=2) as batch_modem:
+        with batch_modem.modulate_batch(payloads) as result:
+            assert len(result)==len(payloads)
+            for payload,audio in zip(payloads,result):
+                expected=transmit_payload(modulator,payload,dtype=np.float32)
+                assert audio.dtype==np.float32
+                assert np.array_equal(audio,expected)
+            buffer_path=result.buffer_path
+            # Workers unmap the buffer once each job is written
+            for worker in batch_modem._pool._pool:
+                maps_path="/proc/"+str(worker.pid)+"/maps"
+                if os.path.exists(maps_path):
+                    with open(maps_path) as maps_file:
+                        assert buffer_path not in maps_file.read()
+        assert not os.path.exists(buffer_path)
@@ -38,4 +38,35 @@ def test_unit_bitstream_range():
 
 def test_unit_write_bitstream_type():
     with pytest.raises(TypeError):
-        write_bitstream(b"Not mutable",0,True)
\ No newline at end of file
+        write_bitstream(b"Not mutable",0,True)
+
+def test_unit_bitarray_roundtrip():
+    bitstream=b"\x00\xff\x55"
+    bitarray=bitstream_to_bitarray(bitstream)
+    assert bitarray.tolist()==[int(bit) for bit in
+                               read_bitstream_iterator(bitstream)]
+    assert bitarray_to_bitstream(bitarray)==bitstream
+    # Partial final byte is padded with 0 bits
+    assert bitarray_to_bitstream([1,1,1])==b"\xe0"
+
+def test_unit_bitarray_symbols():
+    bitarray=bitstream_to_bitarray(b"\x0f\x81")
+    assert bitarray_to_symbols(bitarray,2).tolist()==[0,0,3,3,2,0,0,1]
+    # Partial final symbol is padded with 0 bits
+    assert bitarray_to_symbols(bitarray,3).tolist()==[0,3,7,0,0,4]
+    symbols_bits=symbols_to_bitarray([0,3,7,0,0,4],3)
+    assert symbols_bits[:16].tolist()==bitarray.tolist()
+    with pytest.raises(ValueError):
+        bitarray_to_symbols(bitarray,9)
+    with pytest.raises(ValueError):
+        symbols_to_bitarray([0],0)
+
+def test_property_bitarray_symbols_turnaround():
+    for _ in range(64):
+        n=random.randint(1,256)
+        k=random.randint(1,8)
+        data_bitstream=bytes((random.getrandbits(8) for _ in range(n)))
+        bitarray=bitstream_to_bitarray(data_bitstream)
+        symbols=bitarray_to_symbols(bitarray,k)
+        recovered=symbols_to_bitarray(symbols,k)[:len(bitarray)]
+        assert bitarray_to_bitstream(recovered)==data_bitstream
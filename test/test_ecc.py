@@ -1,6 +1,15 @@
 import random
 
+import numpy as np
+
+import pytest
+
+from voicechat_modem_dsp.encoders.bitstream import read_bitstream, write_bitstream
+from voicechat_modem_dsp.encoders.ecc.codecs import ecc_codec_mappings
+from voicechat_modem_dsp.encoders.ecc.convolutional import ConvolutionalCodec
+from voicechat_modem_dsp.encoders.ecc.ecc_codec import *
 from voicechat_modem_dsp.encoders.ecc.hamming_7_4 import *
+from voicechat_modem_dsp.encoders.ecc.hamming_8_4 import *
 
 def test_property_corrupt_hamming_nonmangle():
     for _ in range(64):
@@ -20,4 +29,103 @@ def test_property_corrupt_hamming_recoverable_err():
         write_bitstream(hamming_data_test,index_offset,
                         not read_bitstream(hamming_data_test,index_offset))
         recovered_corrected=hamming_decode_7_4(hamming_data_test)
-        assert data_test==recovered_corrected
\ No newline at end of file
+        assert data_test==recovered_corrected
+
+def test_unit_hamming_table():
+    # Nibbles 0x0 and 0xf map to the all-zero and all-one codewords
+    assert hamming_encode_7_4(b"\x0f")==b"\x01\xfc"
+    assert hamming_decode_7_4(b"\x01\xfc")==b"\x0f"
+
+def test_property_hamming_error_report():
+    for _ in range(64):
+        n=random.randint(1,256)
+        data_test=bytearray((random.getrandbits(8) for _ in range(n)))
+        hamming_data_test=bytearray(hamming_encode_7_4(data_test))
+        clean_report=hamming_decode_7_4_report(hamming_data_test)
+        assert clean_report.error_count==0
+        assert len(clean_report.error_positions)==0
+        corrupt_positions=[index+random.randrange(7)
+                           for index in range(0,14*n,7)
+                           if random.random()<0.5]
+        for index in corrupt_positions:
+            write_bitstream(hamming_data_test,index,
+                            not read_bitstream(hamming_data_test,index))
+        report=hamming_decode_7_4_report(hamming_data_test)
+        assert report.data==data_test
+        assert report.error_count==len(corrupt_positions)
+        assert report.error_positions.tolist()==corrupt_positions
+
+@pytest.mark.parametrize("codec_name",sorted(ecc_codec_mappings))
+def test_property_codec_nonmangle(codec_name):
+    codec=ecc_codec_mappings[codec_name]()
+    for _ in range(8):
+        n=random.randint(0,64)
+        data_test=bytes((random.getrandbits(8) for _ in range(n)))
+        encoded=codec.encode(data_test)
+        assert len(encoded)==codec.encoded_length(n)
+        report=codec.decode_report(encoded)
+        assert report.data==data_test
+        assert report.error_count==0
+        # Soft bits from padding symbols past the last byte are ignored
+        soft_bits=np.concatenate((soft_bits_from_bitstream(encoded),[1,1]))
+        assert codec.decode_soft(soft_bits)==data_test
+
+@pytest.mark.parametrize("codec_name",sorted(ecc_codec_mappings))
+def test_property_codec_soft_noisy(codec_name):
+    codec=ecc_codec_mappings[codec_name]()
+    data_test=bytes((random.getrandbits(8) for _ in range(64)))
+    soft_bits=soft_bits_from_bitstream(codec.encode(data_test))
+    # Weak noise only flips bits whose soft values are low confidence
+    soft_bits[::10]*=-0.1
+    assert codec.decode_soft(soft_bits)==data_test
+
+def test_unit_hamming_8_4_errors():
+    encoded=bytearray(hamming_encode_8_4(b"\xa5"))
+    encoded[0]^=0x10
+    encoded[1]^=0x01
+    report=hamming_decode_8_4_report(encoded)
+    assert report.data==b"\xa5"
+    assert report.error_positions.tolist()==[3,15]
+    assert report.uncorrectable_count==0
+    # Double errors are detected but not corrected
+    encoded=bytearray(hamming_encode_8_4(b"\xa5"))
+    encoded[0]^=0x03
+    report=hamming_decode_8_4_report(encoded)
+    assert report.uncorrectable_count==1
+
+def test_unit_convolutional_errors():
+    codec=ecc_codec_mappings["convolutional_1_2"]()
+    data_test=bytes((random.getrandbits(8) for _ in range(32)))
+    encoded=bytearray(codec.encode(data_test))
+    for index in [5,40,200]:
+        encoded[index//8]^=1<<(7-index%8)
+    report=codec.decode_report(encoded)
+    assert report.data==data_test
+    assert report.error_positions.tolist()==[5,40,200]
+
+@pytest.mark.parametrize("constraint_length,generators",
+    [(2,(0o3,0o2)),(3,(0o7,0o5)),(4,(0o15,0o13)),(5,(0o23,0o35)),
+     (7,(0o171,0o133)),(8,(0o247,0o371))])
+def test_property_convolutional_merged_steps(constraint_length, generators):
+    codec=ConvolutionalCodec(constraint_length,generators)
+    for _ in range(8):
+        n=random.randint(1,48)
+        data_test=bytes((random.getrandbits(8) for _ in range(n)))
+        encoded=bytearray(codec.encode(data_test))
+        error_positions=sorted(random.sample(range(0,8*len(encoded),40),
+                                             min(4,len(encoded)//5)))
+        for index in error_positions:
+            encoded[index//8]^=1<<(7-index%8)
+        report=codec.decode_report(encoded)
+        assert report.data==data_test
+        assert report.error_positions.tolist()==error_positions
+        # Chunk boundaries do not change the surviving path
+        soft_bits=soft_bits_from_bitstream(encoded)
+        assert np.array_equal(codec._viterbi(soft_bits,n,chunk_steps=3),
+                              codec._viterbi(soft_bits,n))
+
+def test_unit_soft_bits_from_magnitudes():
+    magnitudes=np.array([[0.1,0.9,0.0,0.2],
+                         [0.0,0.1,0.2,0.8]])
+    soft_bits=soft_bits_from_magnitudes(magnitudes,[0,1,2,3],2)
+    assert np.allclose(soft_bits,[-0.7,0.8,0.7,0.6])
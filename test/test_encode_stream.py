@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+from voicechat_modem_dsp.encoders.encode_pad import *
+from voicechat_modem_dsp.encoders.encode_stream import *
+
+def random_chunks(data):
+    index=0
+    while index<len(data):
+        chunk_len=random.randint(0,16)
+        yield data[index:index+chunk_len]
+        index+=chunk_len
+
+def test_property_stream_encode_matches():
+    for radix in encode_function_mappings:
+        for _ in range(16):
+            n=random.randint(1,256)
+            data_bitstream=bytes((random.getrandbits(8) for _ in range(n)))
+            encoder=stream_encoder_mappings[radix]()
+            symbols=list()
+            for chunk in random_chunks(data_bitstream):
+                symbols+=encoder.update(chunk).tolist()
+            symbols+=encoder.finalize().tolist()
+            assert symbols==encode_function_mappings[radix](data_bitstream)
+
+def test_property_stream_decode_matches():
+    for radix in decode_function_mappings:
+        for _ in range(16):
+            n=random.randint(1,256)
+            data_bitstream=bytes((random.getrandbits(8) for _ in range(n)))
+            datastream=encode_function_mappings[radix](data_bitstream)
+            decoder=stream_decoder_mappings[radix]()
+            recovered=b""
+            for chunk in random_chunks(datastream):
+                recovered+=decoder.update(chunk)
+            recovered+=decoder.finalize()
+            assert recovered==data_bitstream
+
+def test_unit_stream_decode_bad_datastream():
+    decoder=stream_decoder_mappings[8]()
+    decoder.update([7,7,7])
+    with pytest.raises(ValueError,match=r"Malformed.*"):
+        decoder.finalize()
+    decoder=stream_decoder_mappings[16]()
+    decoder.update([1])
+    with pytest.raises(ValueError,match=r".*length"):
+        decoder.finalize()
+    with pytest.raises(ValueError,match=r"Illegal symbol.*"):
+        stream_decoder_mappings[4]().update([0,1,2,4])
+    with pytest.raises(ValueError):
+        StreamEncoder(3)
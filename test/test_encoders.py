@@ -131,4 +131,43 @@ def test_property_base_256_turnaround():
         data_bitstream=bytearray((random.getrandbits(8) for _ in range(n)))
         data_datastream=base_256_encode(data_bitstream)
         data_bitstream_recover=base_256_decode(data_datastream)
-        assert bytes(data_bitstream)==data_bitstream_recover
\ No newline at end of file
+        assert bytes(data_bitstream)==data_bitstream_recover
+
+def test_unit_radix_bad_radix():
+    with pytest.raises(ValueError):
+        radix_encode(b"\x00",3)
+    with pytest.raises(ValueError):
+        radix_decode([0],512)
+
+def test_unit_decode_bytes_and_integer_inputs():
+    assert base_256_decode(b"abc")==b"abc"
+    assert base_256_decode(bytearray(b"abc"))==b"abc"
+    assert radix_decode(b"abc",256)==b"abc"
+    assert base_16_decode(bytes([6,1,6,2]))==b"ab"
+    assert base_16_decode((6,1,6,2))==b"ab"
+    assert base_16_decode([6.0,1.0,6.0,2.0])==b"ab"
+    with pytest.raises(ValueError,match=r"Illegal symbol.*"):
+        base_16_decode(bytes([6,1,6,16]))
+    with pytest.raises(ValueError,match=r"Illegal symbol.*"):
+        base_16_decode([6,1,6,-2])
+    with pytest.raises(ValueError,match=r"Illegal symbol.*"):
+        base_256_decode([97,256])
+
+def test_property_radix_turnaround():
+    for bits_per_symbol in range(1,9):
+        radix=1<<bits_per_symbol
+        for _ in range(16):
+            n=random.randint(1,256)
+            data_bitstream=bytes((random.getrandbits(8) for _ in range(n)))
+            data_datastream=radix_encode(data_bitstream,radix)
+            assert len(data_datastream)==-(-8*n//bits_per_symbol)
+            assert data_datastream.max()<radix
+            data_bitstream_recover=radix_decode(data_datastream,radix)
+            assert data_bitstream==data_bitstream_recover
+
+def test_unit_radix_padding():
+    # 0x00 in base 32 is "AA" where the last 2 bits are padding
+    assert radix_decode([0,1],32,check_padding=False)==b"\x00"
+    with pytest.raises(ValueError,match=r"Malformed.*"):
+        radix_decode([0,1],32)
+    assert base_32_decode([0,1])==b"\x00"
@@ -0,0 +1,77 @@
+import os
+
+import numpy as np
+
+import pytest
+
+from voicechat_modem_dsp.modulators.filter_cache import FilterCache
+from voicechat_modem_dsp.modulators.modulator_utils import *
+
+def test_unit_filter_cache_lru():
+    cache=FilterCache(max_entries=2)
+    compute_calls=list()
+    def compute(value):
+        def compute_func():
+            compute_calls.append(value)
+            return np.array([value])
+        return compute_func
+    assert cache.get("a",compute("a"))[0]=="a"
+    cache.get("b",compute("b"))
+    cache.get("a",compute("a"))
+    # "b" is least recently used and is evicted
+    cache.get("c",compute("c"))
+    cache.get("a",compute("a"))
+    cache.get("b",compute("b"))
+    assert compute_calls==["a","b","c","b"]
+    info=cache.info()
+    assert info["hits"]==2
+    assert info["misses"]==4
+    assert info["size"]==2
+
+def test_unit_filter_cache_readonly():
+    cache=FilterCache()
+    value=cache.get("key",lambda: np.zeros(3))
+    with pytest.raises(ValueError):
+        value[0]=1
+
+def test_unit_filter_cache_disk(tmpdir):
+    cache=FilterCache(cache_dir=str(tmpdir))
+    value=cache.get(("key",1.0),lambda: np.arange(5))
+    cold_cache=FilterCache(cache_dir=str(tmpdir))
+    def compute_fail():
+        raise AssertionError("Filter should have been loaded from disk")
+    assert cold_cache.get(("key",1.0),compute_fail).tolist()==value.tolist()
+    assert cold_cache.info()["disk_hits"]==1
+
+def test_unit_filter_cache_disk_validated(tmpdir, monkeypatch):
+    cache=FilterCache(cache_dir=str(tmpdir))
+    cache.get(("key",1.0),lambda: np.arange(5.0))
+    # Arrays of an unexpected dtype or shape are designed again
+    for dtype,ndim in [(np.int64,1),(np.float64,2)]:
+        cold_cache=FilterCache(cache_dir=str(tmpdir))
+        assert cold_cache.get(("key",1.0),lambda: np.zeros(2),
+                              dtype,ndim).tolist()==[0,0]
+        assert cold_cache.info()["disk_hits"]==0
+    # Files from another format version are ignored
+    cold_cache=FilterCache(cache_dir=str(tmpdir))
+    monkeypatch.setattr(cold_cache,"format_version",
+                        FilterCache.format_version+1)
+    assert cold_cache.get(("key",1.0),lambda: np.ones(1)).tolist()==[1]
+    assert cold_cache.info()["disk_hits"]==0
+    # Files whose recorded key differs are ignored
+    cache=FilterCache(cache_dir=str(tmpdir))
+    other_path=cache._disk_path(("other",2.0))
+    os.replace(cache._disk_path(("key",1.0)),other_path)
+    assert cache.get(("other",2.0),lambda: np.ones(1)).tolist()==[1]
+    assert cache.info()["disk_hits"]==0
+
+def test_unit_lowpass_filter_memoized():
+    filter_cache.clear()
+    filter_first=lowpass_fir_filter(1/8000,2000,2500)
+    filter_second=lowpass_fir_filter(1/8000,2000,2500,attenuation=80)
+    assert filter_first is filter_second
+    assert filter_cache.info()["hits"]==1
+    window_first=compute_gaussian_window(1/8000,0.001)
+    window_second=compute_gaussian_window(1/8000,0.001)
+    assert window_first is window_second
+    assert len(window_first)%2==1
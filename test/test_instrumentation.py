@@ -0,0 +1,54 @@
+import pytest
+
+from voicechat_modem_dsp import instrumentation
+from voicechat_modem_dsp.encoders.encode_pad import radix_encode
+from voicechat_modem_dsp.encoders.ecc.hamming_7_4 import *
+from voicechat_modem_dsp.modulators.modulator_fsk import FSKModulator
+
+@pytest.fixture
+def enabled_instrumentation():
+    instrumentation.reset()
+    instrumentation.enable()
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+
+def test_unit_disabled_records_nothing():
+    instrumentation.reset()
+    hamming_encode_7_4(b"\x00\x01")
+    snapshot=instrumentation.snapshot()
+    assert not snapshot["enabled"]
+    assert snapshot["stages"]=={}
+    assert snapshot["counters"]=={}
+
+def test_unit_stage_counts(enabled_instrumentation):
+    modulator=FSKModulator(1/8000,{0:1000,1:1300,2:1600,3:1900},300)
+    encoded=bytearray(hamming_encode_7_4(b"\x12\x34"))
+    symbols=radix_encode(encoded,4)
+    samples=modulator.modulate(symbols)
+    encoded[0]^=0x80
+    assert hamming_decode_7_4(encoded)==b"\x12\x34"
+
+    snapshot=instrumentation.snapshot()
+    stages=snapshot["stages"]
+    assert stages["ecc_encode"]["calls"]==1
+    assert stages["ecc_encode"]["bytes"]==4
+    assert stages["symbol_mapping"]["symbols"]==len(symbols)
+    assert stages["modulate"]["samples"]==len(samples)
+    assert stages["ecc_decode"]["bytes"]==2
+    assert stages["modulate"]["seconds"]>=0
+    assert "samples_per_second" in stages["modulate"]
+    assert snapshot["counters"]["ecc_corrections"]==1
+    assert 0<=snapshot["caches"]["filter"]["hit_rate"]<=1
+    assert 0<=snapshot["caches"]["template"]["hit_rate"]<=1
+
+def test_unit_callbacks(enabled_instrumentation):
+    events=list()
+    callback=lambda stage, seconds, counts: events.append((stage,counts))
+    instrumentation.add_callback(callback)
+    hamming_encode_7_4(b"\xff")
+    instrumentation.remove_callback(callback)
+    hamming_encode_7_4(b"\xff")
+    # Nested bit conversion stages are reported too
+    assert [event for event in events if event[0]=="ecc_encode"]==\
+        [("ecc_encode",{"bytes":2})]
@@ -0,0 +1,75 @@
+import random
+
+import numpy as np
+
+from voicechat_modem_dsp.encoders.bitstream import bitstream_to_bitarray, \
+    bitarray_to_bitstream
+from voicechat_modem_dsp.encoders.ecc.hamming_7_4 import *
+from voicechat_modem_dsp.encoders.interleave import *
+from voicechat_modem_dsp.modulators.modulator_fsk import FSKModulator
+from voicechat_modem_dsp.pipeline.receive import StreamingReceiver
+from voicechat_modem_dsp.pipeline.transmit import transmit_payload
+
+def random_chunks(data):
+    index=0
+    while index<len(data):
+        chunk_len=random.randint(0,16)
+        yield data[index:index+chunk_len]
+        index+=chunk_len
+
+def test_unit_block_interleave_order():
+    # Bits are read out column by column
+    bitstream=bitarray_to_bitstream(np.array([1,1,0,0,0,0,0,0]))
+    assert block_interleave(bitstream,2,4)==bitarray_to_bitstream(
+        np.array([1,0,1,0,0,0,0,0]))
+
+def test_property_block_interleave_roundtrip():
+    for _ in range(32):
+        n=random.randint(0,128)
+        rows=random.randint(1,24)
+        columns=random.randint(1,12)
+        data_test=bytes((random.getrandbits(8) for _ in range(n)))
+        interleaved=block_interleave(data_test,rows,columns)
+        assert len(interleaved)==len(data_test)
+        assert block_deinterleave(interleaved,rows,columns)==data_test
+
+def test_property_stream_interleave_matches():
+    for _ in range(16):
+        n=random.randint(1,128)
+        data_test=bytes((random.getrandbits(8) for _ in range(n)))
+        interleaver=StreamInterleaver(5,7)
+        interleaved=b""
+        for chunk in random_chunks(data_test):
+            interleaved+=interleaver.update(chunk)
+        interleaved+=interleaver.finalize()
+        assert interleaved==block_interleave(data_test,5,7)
+
+        deinterleaver=StreamDeinterleaver(5,7)
+        recovered=b""
+        for chunk in random_chunks(interleaved):
+            recovered+=deinterleaver.update(chunk)
+        recovered+=deinterleaver.finalize()
+        assert recovered==data_test
+
+def test_property_interleave_corrects_bursts():
+    for _ in range(16):
+        data_test=bytes((random.getrandbits(8) for _ in range(32)))
+        interleaved=block_interleave(hamming_encode_7_4(data_test),16,7)
+        bitarray=bitstream_to_bitarray(interleaved)
+        burst_start=random.randint(0,len(bitarray)-16)
+        bitarray[burst_start:burst_start+16]^=1
+        recovered=hamming_decode_7_4(
+            block_deinterleave(bitarray_to_bitstream(bitarray),16,7))
+        assert recovered==data_test
+
+def test_property_streaming_receiver_interleaved():
+    modulator=FSKModulator(1/8000,{0:1000,1:1300,2:1600,3:1900},300)
+    n=random.randint(1,64)
+    payload=bytes((random.getrandbits(8) for _ in range(n)))
+    signal=transmit_payload(modulator,payload,interleave_shape=(16,7))
+    receiver=StreamingReceiver(modulator,interleave_shape=(16,7))
+    received=b""
+    for index in range(0,len(signal),300):
+        received+=receiver.process(signal[index:index+300])
+    received+=receiver.finalize()
+    assert received==payload
@@ -0,0 +1,40 @@
+import subprocess
+import sys
+
+from voicechat_modem_dsp.lazy import LazyRegistry
+from voicechat_modem_dsp.registry import *
+
+def test_unit_lazy_registry():
+    registry=LazyRegistry({"join":"os.path:join","dumps":"json:dumps"})
+    assert sorted(registry)==["dumps","join"]
+    assert not registry.is_resolved("join")
+    import os.path
+    assert registry["join"] is os.path.join
+    assert registry.is_resolved("join")
+    assert not registry.is_resolved("dumps")
+
+def test_unit_registry_contents():
+    from voicechat_modem_dsp.encoders import encode_pad
+    for radix in encode_pad.encode_function_mappings:
+        assert encode_function_mappings[radix] is \
+            encode_pad.encode_function_mappings[radix]
+        assert decode_function_mappings[radix] is \
+            encode_pad.decode_function_mappings[radix]
+    assert modulator_mappings["fsk"].__name__=="FSKModulator"
+    assert ecc_codec_mappings["hamming_8_4"]().encode(b"\x00")==b"\x00\x00"
+    from voicechat_modem_dsp.encoders.ecc import codecs
+    assert sorted(ecc_codec_mappings)==sorted(codecs.ecc_codec_mappings)
+    for name in codecs.ecc_codec_mappings:
+        assert ecc_codec_mappings[name]().encode(b"codec")==\
+            codecs.ecc_codec_mappings[name]().encode(b"codec")
+
+def test_unit_encoding_does_not_import_scipy():
+    # Needs a fresh interpreter since other tests already imported SciPy
+    code=("import sys\n"
+          "from voicechat_modem_dsp.registry import *\n"
+          "from voicechat_modem_dsp.pipeline.transmit import encode_payload\n"
+          "modulator=modulator_mappings['fsk'](1/8000,{0:1000,1:2000},300)\n"
+          "modulator.modulate(encode_payload(b'abc',2))\n"
+          "encode_function_mappings[4](b'abc')\n"
+          "assert 'scipy' not in sys.modules\n")
+    subprocess.check_call([sys.executable,"-c",code])
@@ -0,0 +1,112 @@
+import numpy as np
+
+import pytest
+
+from voicechat_modem_dsp.encoders.encode_pad import radix_decode
+from voicechat_modem_dsp.modulators.modulator_fsk import FSKModulator
+from voicechat_modem_dsp.modulators.modulator_mfsk import *
+from voicechat_modem_dsp.pipeline.transmit import encode_payload, \
+    transmit_payload
+from voicechat_modem_dsp.registry import modulator_mappings
+
+def test_unit_mfsk_bad_parameters():
+    with pytest.raises(ValueError):
+        MFSKModulator(1/8000,125,3,4)
+    with pytest.raises(ValueError):
+        MFSKModulator(1/8000,125,4,0)
+    with pytest.raises(ValueError):
+        MFSKModulator(1/8000,125,4,4,bin_spacing=0)
+    # 8000/300 is not an integer number of samples per symbol
+    with pytest.raises(ValueError):
+        MFSKModulator(1/8000,300,4,4)
+    with pytest.raises(ValueError):
+        MFSKModulator(1/8000,250,4,4)
+
+def test_unit_mfsk_bad_symbols():
+    modulator=MFSKModulator(1/8000,125,4,4)
+    with pytest.raises(ValueError,match=r"Illegal symbol.*"):
+        modulator.modulate([0,4])
+    with pytest.raises(ValueError,match=r"Illegal symbol.*"):
+        modulator.modulate([0,-1])
+    with pytest.raises(ValueError,match=r"Illegal symbol.*"):
+        modulator.modulate([0,1.5])
+
+def test_unit_mfsk_tones():
+    modulator=MFSKModulator(1/8000,125,4,4,low_freq=600)
+    assert modulator.samples_per_symbol==64
+    assert modulator.bits_per_period==8
+    assert modulator.freq_map[0]==(625.0,1125.0,1625.0,2125.0)
+    assert modulator.freq_map[3]==(1000.0,1500.0,2000.0,2500.0)
+    signal=modulator.modulate([0,1,2,3]*16)
+    assert len(signal)==16*64
+    assert np.max(np.abs(signal))<=1
+    spectrum=np.abs(np.fft.rfft(signal))
+    frequencies=np.fft.rfftfreq(len(signal),1/8000)
+    peaks=frequencies[spectrum>0.5*np.max(spectrum)]
+    assert sorted(peaks.tolist())==[625.0,1250.0,1875.0,2500.0]
+
+def test_unit_mfsk_symbol_boundaries():
+    modulator=MFSKModulator(1/8000,125,4,4)
+    for symbol_count in [0,1,4,5,63]:
+        boundaries=modulator.symbol_boundaries(symbol_count)
+        assert len(boundaries)==modulator.period_count(symbol_count)+1
+        signal=modulator.modulate(np.zeros(symbol_count,dtype=int))
+        assert boundaries[-1]==len(signal)
+
+def test_unit_mfsk_template_shared():
+    modulator_first=MFSKModulator(1/8000,125,4,4)
+    modulator_second=MFSKModulator(1/8000,125,4,4)
+    modulator_other=MFSKModulator(1/8000,125,4,2)
+    assert modulator_first.template is modulator_second.template
+    assert modulator_first.template is not modulator_other.template
+    with pytest.raises(ValueError):
+        modulator_first.template.bin_table[0,0]=1
+
+def test_property_mfsk_turnaround():
+    modulator=MFSKModulator(1/8000,125,4,4)
+    for _ in range(16):
+        symbol_count=np.random.randint(1,256)
+        symbols=np.random.randint(0,4,size=symbol_count)
+        signal=modulator.modulate(symbols)
+        assert len(signal)==modulator.period_count(symbol_count)*64
+        time_array=modulator.time_array(len(signal))
+        symbols_recovered,magnitudes=modulator.demodulate(time_array,signal,
+                                                          symbol_count)
+        assert symbols_recovered.tolist()==symbols.tolist()
+        assert magnitudes.shape==(symbol_count,4)
+        assert np.allclose(np.max(magnitudes,axis=-1),1)
+
+def test_property_mfsk_turnaround_noisy():
+    modulator=MFSKModulator(1/8000,62.5,16,3,low_freq=300)
+    for _ in range(16):
+        symbols=np.random.randint(0,16,size=240)
+        signal=modulator.modulate(symbols)
+        signal+=0.1*np.random.randn(len(signal))
+        time_array=modulator.time_array(len(signal))
+        symbols_recovered,_=modulator.demodulate(time_array,signal)
+        assert symbols_recovered.tolist()==symbols.tolist()
+
+def test_unit_mfsk_demodulate_multichannel():
+    modulator=MFSKModulator(1/8000,125,4,4)
+    symbols=np.random.randint(0,4,size=(3,64))
+    signals=np.array([modulator.modulate(row) for row in symbols])
+    signals+=0.05*np.random.randn(*signals.shape)
+    time_array=modulator.time_array(signals.shape[1])
+    symbols_recovered,magnitudes=modulator.demodulate(time_array,signals)
+    assert np.array_equal(symbols_recovered,symbols)
+    assert magnitudes.shape==(3,64,4)
+    with pytest.raises(ValueError):
+        modulator.demodulate(time_array[:-1],signals)
+
+def test_unit_mfsk_payload_throughput():
+    payload=bytes(np.random.randint(0,256,size=200,dtype=np.uint8))
+    mfsk_modulator=modulator_mappings["mfsk"](1/8000,125,4,4)
+    fsk_modulator=FSKModulator(1/8000,{0:1000,1:1500,2:2000,3:2500},300)
+    signal=transmit_payload(mfsk_modulator,payload,use_ecc=False)
+    symbols=encode_payload(payload,4,use_ecc=False)
+    symbols_recovered,_=mfsk_modulator.demodulate(
+        mfsk_modulator.time_array(len(signal)),signal,len(symbols))
+    assert radix_decode(symbols_recovered,4)==payload
+    # 4 carriers of 2 bits at 125 baud beat single tone FSK at 300 baud
+    assert len(signal)<len(transmit_payload(fsk_modulator,payload,
+                                            use_ecc=False))
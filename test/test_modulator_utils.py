@@ -0,0 +1,69 @@
+import random
+
+import numpy as np
+from scipy import signal
+
+import pytest
+
+from voicechat_modem_dsp.modulators.modulator_utils import *
+
+def test_unit_lowpass_minimized_meets_spec():
+    dt=1/8000
+    fir_filter=lowpass_fir_filter(dt,2000,2500)
+    assert len(fir_filter)%2==1
+    assert len(fir_filter)<fred_harris_fir_tap_count(8000,500,80)
+    assert np.array_equal(fir_filter,fir_filter[::-1])
+    frequencies,response=signal.freqz(fir_filter,worN=4096,fs=8000)
+    assert np.max(np.abs(response[frequencies>=2500]))<=10**(-80/20)
+    assert np.max(np.abs(np.abs(response[frequencies<=2000])-1))<=0.01
+
+def test_unit_lowpass_short_estimate_grows():
+    # fred harris estimates 3 taps, which misses the specification
+    assert fred_harris_fir_tap_count(8000,3000,20)==3
+    fir_filter=lowpass_fir_filter(1/8000,500,3500,20)
+    assert len(fir_filter)%2==1
+    frequencies,response=signal.freqz(fir_filter,worN=4096,fs=8000)
+    assert np.max(np.abs(response[frequencies>=3500]))<=10**(-20/20)
+
+def test_unit_lowpass_fixed_taps_checked():
+    # The weighted design at the estimate meets the specification
+    fir_filter=lowpass_fir_filter(1/8000,2000,2500,minimize_taps=False)
+    assert len(fir_filter)==fred_harris_fir_tap_count(8000,500,80)
+    frequencies,response=signal.freqz(fir_filter,worN=4096,fs=8000)
+    assert np.max(np.abs(response[frequencies>=2500]))<=10**(-80/20)
+    # 3 taps cannot reach 20 dB, so the unminimized design warns
+    with pytest.warns(UserWarning,match=r".*misses the specification"):
+        lowpass_fir_filter(1/8000,500,3500,20,minimize_taps=False)
+
+def test_unit_linearize_fir():
+    fir_filter=np.array([0.1,0.5,1.0,0.5000001,0.1])
+    linear_filter=linearize_fir(fir_filter)
+    assert np.array_equal(linear_filter,linear_filter[::-1])
+    assert np.allclose(linear_filter,fir_filter)
+
+def test_property_apply_fir_methods_agree():
+    for _ in range(16):
+        tap_count=random.randint(1,200)
+        fir_filter=np.random.randn(tap_count)
+        data=np.random.randn(random.randint(1,3),random.randint(1,2000))
+        reference=apply_fir_filter(fir_filter,data,method="fft")
+        assert reference.shape==data.shape
+        assert np.allclose(apply_fir_filter(fir_filter,data,method="direct"),
+                           reference)
+        assert np.allclose(apply_fir_filter(fir_filter,data),reference)
+    with pytest.raises(ValueError):
+        apply_fir_filter([1],[1,2],method="unknown")
+
+def test_property_streaming_fir_matches_lfilter():
+    for tap_count in [1,9,301]:
+        fir_filter=np.random.randn(tap_count)
+        data=np.random.randn(20000)
+        streaming_filter=StreamingFIRFilter(fir_filter)
+        output=list()
+        index=0
+        while index<len(data):
+            block_len=random.choice([0,1,50,4000])
+            output.append(streaming_filter.process(data[index:index+block_len]))
+            index+=block_len
+        assert np.allclose(np.concatenate(output),
+                           signal.lfilter(fir_filter,1.0,data))
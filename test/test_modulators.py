@@ -0,0 +1,143 @@
+import numpy as np
+
+import pytest
+
+from voicechat_modem_dsp.modulators.modulator_fsk import *
+
+def test_unit_fsk_bad_parameters():
+    with pytest.raises(ValueError):
+        FSKModulator(1/8000,{0:100,1:200},100)
+    with pytest.raises(ValueError):
+        FSKModulator(1/8000,{0:1000,1:5000},100)
+    with pytest.raises(ValueError):
+        FSKModulator(1/8000,{-1:1000,1:2000},100)
+
+def test_unit_fsk_bad_symbols():
+    modulator=FSKModulator(1/8000,{0:1000,2:2000},100)
+    with pytest.raises(ValueError,match=r"Illegal symbol.*"):
+        modulator.modulate([0,1])
+    with pytest.raises(ValueError,match=r"Illegal symbol.*"):
+        modulator.modulate([0,3])
+    with pytest.raises(ValueError,match=r"Illegal symbol.*"):
+        modulator.modulate([0,-1])
+
+def test_unit_fsk_symbol_boundaries():
+    # 8000/300 is not an integer number of samples per symbol
+    modulator=FSKModulator(1/8000,{0:1000,1:2000},300)
+    boundaries=modulator.symbol_boundaries(300)
+    assert boundaries[0]==0
+    assert boundaries[-1]==8000
+    assert set(np.diff(boundaries).tolist())=={26,27}
+    assert len(modulator.modulate([0,1]*150))==8000
+
+def test_unit_fsk_tones():
+    modulator=FSKModulator(1/8000,{0:1000,1:2000},100)
+    for symbol,freq in modulator.freq_map.items():
+        signal=modulator.modulate([symbol]*100)
+        spectrum=np.abs(np.fft.rfft(signal))
+        frequencies=np.fft.rfftfreq(len(signal),1/8000)
+        assert frequencies[np.argmax(spectrum)]==freq
+
+def test_property_fsk_phase_continuous():
+    modulator=FSKModulator(1/8000,{0:1000,1:1500,2:2000,3:2500},300)
+    max_step=2*np.pi*2500/8000
+    for _ in range(16):
+        symbols=np.random.randint(0,4,size=64)
+        signal=modulator.modulate(symbols)
+        # Derivative of sin is bounded so no discontinuities at boundaries
+        assert np.max(np.abs(np.diff(signal)))<=max_step
+        signal_float32=modulator.modulate(symbols,dtype=np.float32)
+        assert signal_float32.dtype==np.float32
+        assert np.allclose(signal,signal_float32,atol=1e-6)
+
+def test_unit_fsk_demodulate_bad_time_array():
+    modulator=FSKModulator(1/8000,{0:1000,1:2000},100)
+    with pytest.raises(ValueError):
+        modulator.demodulate(np.zeros(10),np.zeros(11))
+
+def test_unit_fsk_demodulate_partial_symbol():
+    modulator=FSKModulator(1/8000,{0:1000,1:2000},100)
+    signal=modulator.modulate([0,1,1])
+    signal=signal[:-10]
+    time_array=np.arange(len(signal))*modulator.dt
+    symbols,magnitudes=modulator.demodulate(time_array,signal)
+    assert symbols.tolist()==[0,1]
+    assert magnitudes.shape==(2,2)
+
+def test_property_fsk_turnaround_noisy():
+    modulator=FSKModulator(1/8000,{0:1000,1:1500,2:2000,3:2500},300)
+    # Symbol error rate at this noise level is about 1e-5, so a local
+    # seed keeps the exact comparison from failing on rare errors
+    rng=np.random.RandomState(6)
+    for _ in range(16):
+        symbols=rng.randint(0,4,size=256)
+        signal=modulator.modulate(symbols)
+        signal+=0.5*rng.randn(len(signal))
+        time_array=np.arange(len(signal))*modulator.dt
+        symbols_recovered,magnitudes=modulator.demodulate(time_array,signal)
+        assert symbols_recovered.tolist()==symbols.tolist()
+        assert magnitudes.shape==(256,4)
+
+def test_unit_fsk_template_shared():
+    modulator_first=FSKModulator(1/8000,{0:1000,1:2000},300)
+    modulator_second=FSKModulator(1/8000,{1:2000,0:1000},300)
+    modulator_other=FSKModulator(1/8000,{0:1000,1:2000},200)
+    assert modulator_first.template is modulator_second.template
+    assert modulator_first.template is not modulator_other.template
+    boundaries=modulator_first.symbol_boundaries(10)
+    with pytest.raises(ValueError):
+        boundaries[0]=1
+
+def test_unit_template_cache_bounded(monkeypatch):
+    monkeypatch.setattr(Modulator,"template_cache_max_entries",4)
+    modulators=[FSKModulator(1/8000,{0:1000,1:2000},baud)
+                for baud in range(100,110)]
+    assert len(Modulator._template_cache)==4
+    # Evicted templates stay usable by the modulators that hold them
+    assert len(modulators[0].modulate([0,1]))==160
+    # Recently used templates are kept
+    template=FSKModulator(1/8000,{0:1000,1:2000},109).template
+    assert template is modulators[-1].template
+    Modulator.clear_template_cache()
+    assert len(Modulator._template_cache)==0
+
+def test_unit_time_array_length():
+    # Float steps in np.arange can produce an extra element
+    for sample_count in [0,1,7,8000,44100]:
+        assert len(Modulator.generate_timearray(1/44100,sample_count))==\
+            sample_count
+    modulator=FSKModulator(1/8000,{0:1000,1:2000},300)
+    time_array=modulator.time_array(100)
+    assert len(time_array)==100
+    assert time_array[-1]==pytest.approx(99/8000)
+
+def test_unit_fsk_demodulate_multichannel():
+    modulator=FSKModulator(1/8000,{0:1000,1:1500,2:2000,3:2500},300)
+    symbols=np.random.randint(0,4,size=(5,64))
+    signals=np.array([modulator.modulate(row) for row in symbols])
+    signals+=0.3*np.random.randn(*signals.shape)
+    time_array=modulator.time_array(signals.shape[1])
+    symbols_recovered,magnitudes=modulator.demodulate(time_array,signals)
+    assert symbols_recovered.shape==(5,64)
+    assert magnitudes.shape==(5,64,4)
+    assert np.array_equal(symbols_recovered,symbols)
+    # Each channel matches demodulating it on its own
+    for channel in range(5):
+        _,channel_magnitudes=modulator.demodulate(time_array,
+                                                  signals[channel])
+        assert np.allclose(channel_magnitudes,magnitudes[channel])
+
+def test_unit_fsk_chunked_matches_whole():
+    modulator=FSKModulator(1/8000,{0:1000,1:1500,2:2000,3:2500},300)
+    symbols=np.random.randint(0,4,size=200)
+    signal=modulator.modulate(symbols)
+    # Chunks of a few symbols, including symbols of 26 and 27 samples
+    assert np.allclose(modulator.modulate(symbols,chunk_samples=100),signal)
+    signal+=0.3*np.random.randn(len(signal))
+    boundaries=modulator.symbol_boundaries(len(symbols))
+    receive_filter=modulator.receive_filter
+    filtered=apply_fir_filter(receive_filter,signal)
+    whole=modulator.tone_magnitudes(filtered,boundaries)
+    chunked=modulator.tone_magnitudes(signal,boundaries,chunk_samples=100,
+                                      fir_filter=receive_filter)
+    assert np.allclose(chunked,whole)
@@ -0,0 +1,66 @@
+import random
+
+import numpy as np
+
+import pytest
+
+from voicechat_modem_dsp.encoders.encode_pad import radix_encode
+from voicechat_modem_dsp.encoders.ecc.hamming_7_4 import *
+from voicechat_modem_dsp.modulators.modulator_fsk import FSKModulator
+from voicechat_modem_dsp.pipeline.receive import *
+
+def test_unit_ring_buffer():
+    ring_buffer=SampleRingBuffer(4)
+    ring_buffer.write([1,2,3])
+    ring_buffer.consume(2)
+    ring_buffer.write([4,5,6])
+    assert ring_buffer.peek(4).tolist()==[3,4,5,6]
+    with pytest.raises(ValueError):
+        ring_buffer.write([7])
+    with pytest.raises(ValueError):
+        ring_buffer.peek(5)
+    ring_buffer.consume(3)
+    assert ring_buffer.count==1
+    assert ring_buffer.peek(1).tolist()==[6]
+
+def test_property_hamming_stream_decoder():
+    for _ in range(16):
+        n=random.randint(1,256)
+        data_test=bytes((random.getrandbits(8) for _ in range(n)))
+        hamming_data_test=hamming_encode_7_4(data_test)
+        decoder=Hamming74StreamDecoder()
+        recovered=b""
+        index=0
+        while index<len(hamming_data_test):
+            chunk_len=random.randint(0,8)
+            recovered+=decoder.update(hamming_data_test[index:index+chunk_len])
+            index+=chunk_len
+        recovered+=decoder.finalize()
+        assert recovered==data_test
+
+def test_property_streaming_receiver():
+    modulator=FSKModulator(1/8000,{0:1000,1:1300,2:1600,3:1900},300)
+    for _ in range(4):
+        n=random.randint(1,128)
+        payload=bytes((random.getrandbits(8) for _ in range(n)))
+        symbols=radix_encode(hamming_encode_7_4(payload),4)
+        signal=modulator.modulate(symbols)
+        signal+=0.2*np.random.randn(len(signal))
+        receiver=StreamingReceiver(modulator)
+        received=b""
+        index=0
+        while index<len(signal):
+            block_len=random.randint(1,500)
+            received+=receiver.process(signal[index:index+block_len])
+            index+=block_len
+        received+=receiver.finalize()
+        assert received==payload
+        assert receiver.symbol_count==len(symbols)
+
+def test_unit_streaming_receiver_bad_symbols():
+    modulator=FSKModulator(1/8000,{0:1000,1:1300,5:1600,7:1900},300)
+    with pytest.raises(ValueError,match=r".*0 to radix-1"):
+        StreamingReceiver(modulator)
+    modulator=FSKModulator(1/8000,{0:1000,1:1300,2:1600},300)
+    with pytest.raises(ValueError,match=r".*supported radix"):
+        StreamingReceiver(modulator)
@@ -0,0 +1,81 @@
+import os
+
+import numpy as np
+
+import pytest
+
+from voicechat_modem_dsp.encoders.ecc.hamming_7_4 import hamming_encode_7_4
+from voicechat_modem_dsp.encoders.encode_pad import radix_encode
+from voicechat_modem_dsp.modulators.modulator_fsk import FSKModulator
+from voicechat_modem_dsp.modulators.resampling import *
+from voicechat_modem_dsp.modulators.modulator_utils import max_minimized_taps
+from voicechat_modem_dsp.pipeline.receive import StreamingReceiver
+
+def test_unit_resampler_ratio():
+    resampler=Resampler(44100,11025)
+    assert (resampler.up,resampler.down)==(1,4)
+    assert resampler.output_length(1001)==251
+    with pytest.raises(ValueError):
+        Resampler(48000,8000,passband=5000)
+
+def test_unit_resampler_tone():
+    resampler=Resampler(48000,8000)
+    time_array=np.arange(48000)/48000
+    # 1 kHz passes and 10 kHz would alias so it is removed
+    resampled_pass=resampler.resample(np.sin(2*np.pi*1000*time_array))
+    resampled_stop=resampler.resample(np.sin(2*np.pi*10000*time_array))
+    assert len(resampled_pass)==8000
+    assert np.max(np.abs(resampled_pass[100:-100]))==pytest.approx(1,abs=0.01)
+    assert np.max(np.abs(resampled_stop[100:-100]))<1e-3
+
+def test_unit_resampler_long_filter():
+    # 80/441 needs a long filter at the upsampled rate whose design and
+    # check must not grow quadratically in memory
+    resampler=Resampler(44100,8000)
+    assert (resampler.up,resampler.down)==(80,441)
+    fir_filter=resampler.fir_filter
+    assert len(fir_filter)>max_minimized_taps
+    response=np.abs(np.fft.rfft(fir_filter,1<<22))
+    frequencies=np.fft.rfftfreq(1<<22,1/(44100*80))
+    assert np.max(response[frequencies>=4000])<=10**(-80/20)
+    assert np.max(np.abs(response[frequencies<=3200]-1))<=0.01
+    time_array=np.arange(44100)/44100
+    resampled=resampler.resample(np.sin(2*np.pi*1000*time_array))
+    assert len(resampled)==8000
+    assert np.max(np.abs(resampled[100:-100]))==pytest.approx(1,abs=0.01)
+
+@pytest.mark.parametrize("rates",[(48000,8000),(8000,12000),(48000,9600),
+                                  (16000,16000)])
+def test_property_streaming_resampler_matches(rates):
+    resampler=StreamingResampler(*rates)
+    for _ in range(4):
+        data=np.random.randn(np.random.randint(0,4000))
+        resampled=list()
+        index=0
+        while index<len(data):
+            block_len=np.random.randint(0,700)
+            resampled.append(resampler.process(data[index:index+block_len]))
+            index+=block_len
+        resampled.append(resampler.finalize())
+        resampled=np.concatenate(resampled)
+        expected=resampler.resample(data)
+        assert len(resampled)==len(expected)
+        assert np.allclose(resampled,expected)
+
+def test_unit_receiver_with_resampler():
+    payload=os.urandom(64)
+    symbols=radix_encode(hamming_encode_7_4(payload),4)
+    freq_map={0:1000,1:1300,2:1600,3:1900}
+    transmit_modulator=FSKModulator(1/48000,freq_map,300)
+    receive_modulator=FSKModulator(1/8000,freq_map,300)
+    signal=transmit_modulator.modulate(symbols)
+    receiver=StreamingReceiver(receive_modulator,
+        resampler=StreamingResampler(48000,8000))
+    received=b""
+    for index in range(0,len(signal),1000):
+        received+=receiver.process(signal[index:index+1000])
+    received+=receiver.finalize()
+    assert received==payload
+    with pytest.raises(ValueError):
+        StreamingReceiver(receive_modulator,
+                          resampler=StreamingResampler(48000,16000))
@@ -0,0 +1,78 @@
+import numpy as np
+
+import pytest
+
+from voicechat_modem_dsp.simulation.channel import Channel
+from voicechat_modem_dsp.simulation.sweep import *
+
+def tone(frequency, sample_count=8000, dt=1/8000):
+    return np.sin(2*np.pi*frequency*dt*np.arange(sample_count))
+
+def test_unit_channel_identity():
+    samples=tone(1000)
+    assert np.array_equal(Channel(1/8000).apply(samples),samples)
+    with pytest.raises(ValueError):
+        Channel(1/8000,band=(100,1000))
+    with pytest.raises(ValueError):
+        Channel(1/8000,band=(0,3900))
+
+def test_unit_channel_impairments():
+    samples=np.stack((tone(1000),2*tone(1000)))
+    noisy=Channel(1/8000,snr_db=10,seed=1).apply(samples)
+    noise_power=np.mean((noisy-samples)**2,axis=-1)
+    assert np.allclose(noise_power,[0.05,0.2],rtol=0.1)
+
+    band_channel=Channel(1/8000,band=(500,2000))
+    # Skip filter edge effects at the ends of the signal
+    assert np.max(np.abs(band_channel.apply(tone(1000))[500:-500]))>0.95
+    assert np.max(np.abs(band_channel.apply(tone(3000))[500:-500]))<0.01
+    assert np.max(np.abs(band_channel.apply(tone(200))[500:-500]))<0.01
+
+    burst_channel=Channel(1/8000,burst_rate=5,burst_duration=0.01,seed=2)
+    mask=burst_channel.dropout_mask((4,80000))
+    # Bursts cover about rate*duration of the audio when they rarely overlap
+    assert 0.03<np.mean(mask)<0.07
+    assert 0.03<np.mean(burst_channel.apply(np.ones(80000))==0)<0.07
+
+def test_unit_parameter_grid():
+    grid=parameter_grid(baud=[300,600],snr_db=[0])
+    assert grid==[{"baud":300,"snr_db":0},{"baud":600,"snr_db":0}]
+
+def test_property_simulate_link():
+    freq_map=evenly_spaced_freq_map(4)
+    clean=simulate_link(freq_map,300,payload_bytes=1000,chunk_bytes=300,
+                        band=(300,3400),seed=0)
+    assert clean.bit_errors==0
+    assert clean.payload_bits==8000
+    assert clean.goodput==clean.throughput>0
+    noisy=simulate_link(freq_map,300,payload_bytes=1000,snr_db=-10,seed=0)
+    assert noisy.ber>0.01
+    assert noisy.goodput<noisy.throughput
+
+def test_property_run_sweep_parallel():
+    configs=[dict(config,freq_map=evenly_spaced_freq_map(config["radix"]),
+                  baud=300,payload_bytes=256)
+             for config in parameter_grid(radix=[2,4],snr_db=[-5,5])]
+    for config in configs:
+        del config["radix"]
+    serial=run_sweep(configs,processes=1,seed=3)
+    parallel=run_sweep(configs,processes=2,seed=3)
+    assert [result.bit_errors for result in serial]==\
+        [result.bit_errors for result in parallel]
+    assert [result.config["snr_db"] for result in serial]==[-5,5,-5,5]
+
+def test_unit_channel_bursts_cross_blocks():
+    whole=Channel(1/8000,burst_rate=5,burst_duration=0.01,seed=4)
+    split=Channel(1/8000,burst_rate=5,burst_duration=0.01,seed=4)
+    mask=whole.dropout_mask((80000,))
+    # Split a few samples into the first burst
+    boundary=int(np.argmax(mask))+5
+    block_lens=[boundary,1,49,80000-boundary-50]
+    # Random draws are the same, so only carried bursts can differ
+    split_mask=np.concatenate([split.dropout_mask((block_len,))
+                               for block_len in block_lens])
+    assert np.array_equal(split_mask,mask)
+    reset=Channel(1/8000,burst_rate=5,burst_duration=0.01,seed=4)
+    reset.dropout_mask((boundary,))
+    reset.reset()
+    assert not np.any(reset.dropout_mask((50,))[:10])
@@ -0,0 +1,54 @@
+import numpy as np
+
+import pytest
+
+from voicechat_modem_dsp.modulators.modulator_fsk import FSKModulator
+from voicechat_modem_dsp.modulators.synchronization import *
+
+def make_recording(modulator, preamble_symbols, offsets, length):
+    recording=0.1*np.random.randn(length)
+    for offset in offsets:
+        preamble=modulator.modulate(preamble_symbols)
+        payload=modulator.modulate(np.random.randint(0,4,size=32))
+        frame=np.concatenate((preamble,payload))
+        recording[offset:offset+len(frame)]+=frame
+    return recording
+
+def test_unit_preamble_bad_waveform():
+    with pytest.raises(ValueError):
+        PreambleDetector([])
+    with pytest.raises(ValueError):
+        PreambleDetector(np.zeros(10))
+
+def test_unit_preamble_detect():
+    modulator=FSKModulator(1/8000,{0:1000,1:1300,2:1600,3:1900},300)
+    preamble_symbols=[0,1,2,3,3,2,1,0,0,2,1,3,0,3,1,2,2,0,3,1,1,3,0,2]
+    offsets=[1234,5000,11111]
+    recording=make_recording(modulator,preamble_symbols,offsets,16000)
+    detector=PreambleDetector.from_modulator(modulator,preamble_symbols)
+    found_offsets,confidences=detector.detect(recording)
+    assert found_offsets.tolist()==offsets
+    assert np.all(confidences>0.9)
+    # Silence and noise have no detections
+    assert len(detector.detect(np.zeros(4000))[0])==0
+    assert len(detector.detect(0.1*np.random.randn(4000))[0])==0
+
+def test_property_streaming_preamble_detect():
+    modulator=FSKModulator(1/8000,{0:1000,1:1300,2:1600,3:1900},300)
+    preamble_symbols=[0,1,2,3,3,2,1,0,0,2,1,3,0,3,1,2,2,0,3,1,1,3,0,2]
+    for _ in range(4):
+        offsets=sorted(np.random.choice(np.arange(0,15000,1500),
+                                        size=3,replace=False)
+                       +np.random.randint(0,100,size=3))
+        recording=make_recording(modulator,preamble_symbols,offsets,18000)
+        detector=StreamingPreambleDetector.from_modulator(modulator,
+                                                          preamble_symbols)
+        found_offsets=list()
+        index=0
+        while index<len(recording):
+            block_len=np.random.randint(1,2000)
+            found_offsets+=detector.process(
+                recording[index:index+block_len])[0].tolist()
+            index+=block_len
+        found_offsets+=detector.finalize()[0].tolist()
+        assert found_offsets==offsets
@@ -0,0 +1,153 @@
+import asyncio
+import os
+import random
+import tempfile
+
+import numpy as np
+
+import pytest
+
+from voicechat_modem_dsp.modulators.modulator_fsk import FSKModulator
+from voicechat_modem_dsp.pipeline.transmit import transmit_payload
+from voicechat_modem_dsp.transport.client import ModemClient
+from voicechat_modem_dsp.transport.modem_pb2 import ClientMessage
+from voicechat_modem_dsp.transport.server import ModemServer, ModemSession
+
+freq_map={0:1000,1:1300,2:1600,3:1900}
+
+def run(coroutine):
+    loop=asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+async def roundtrip_session(client, payload):
+    await client.configure(8000,freq_map,300,interleave_shape=(16,7),
+                           block_samples=1000)
+    samples=await client.transmit(payload)
+    received=b""
+    for index in range(0,len(samples),700):
+        received+=await client.receive(samples[index:index+700])
+    received+=await client.end_of_stream()
+    return samples,received
+
+def test_unit_session_errors():
+    session=ModemSession()
+    response,=session.handle(ClientMessage(sequence=3,transmit={"data":b"a"}))
+    assert response.sequence==3
+    assert response.WhichOneof("body")=="error"
+    response,=session.handle(ClientMessage(sequence=4,config={
+        "sample_rate":8000,"baud":300,
+        "tones":[{"symbol":0,"frequency":1000},
+                 {"symbol":1,"frequency":1300},
+                 {"symbol":2,"frequency":1600}]}))
+    assert response.WhichOneof("body")=="error"
+
+def test_unit_session_bad_config():
+    session=ModemSession()
+    tones=[{"symbol":0,"frequency":1000},{"symbol":1,"frequency":1300}]
+    for sample_rate,baud in [(8000,0),(8000,-300),(0,300)]:
+        response,=session.handle(ClientMessage(sequence=5,config={
+            "sample_rate":sample_rate,"baud":baud,"tones":tones}))
+        assert response.sequence==5
+        assert response.WhichOneof("body")=="error"
+    assert session.modulator is None
+
+def test_unit_session_duplicate_symbols():
+    session=ModemSession()
+    response,=session.handle(ClientMessage(sequence=6,config={
+        "sample_rate":8000,"baud":300,
+        "tones":[{"symbol":0,"frequency":1000},
+                 {"symbol":1,"frequency":1300},
+                 {"symbol":1,"frequency":1600}]}))
+    assert response.WhichOneof("body")=="error"
+    assert "more than once" in response.error.message
+    assert session.modulator is None
+
+def test_unit_session_block_samples_bounded():
+    with pytest.raises(ValueError):
+        ModemSession(block_samples=4096,max_frame_size=1024)
+    session=ModemSession(block_samples=100,max_frame_size=1024)
+    tones=[{"symbol":symbol,"frequency":frequency}
+           for symbol,frequency in freq_map.items()]
+    config={"sample_rate":8000,"baud":300,"tones":tones}
+    response,=session.handle(ClientMessage(sequence=7,config=dict(config,
+        block_samples=session.max_block_samples+1)))
+    assert response.WhichOneof("body")=="error"
+    response,=session.handle(ClientMessage(sequence=8,config=dict(config,
+        block_samples=session.max_block_samples)))
+    assert response.WhichOneof("body")=="ack"
+    responses=session.handle(ClientMessage(sequence=9,
+                                           transmit={"data":bytes(64)}))
+    # Blocks are produced lazily and every frame fits the limit
+    assert not isinstance(responses,list)
+    responses=list(responses)
+    assert len(responses)>1
+    assert all(response.ByteSize()<=1024 for response in responses)
+    assert responses[-1].audio.last
+
+def test_unit_tcp_session_survives_errors(monkeypatch):
+    async def main():
+        server=ModemServer()
+        tcp_server=await server.start_tcp("127.0.0.1",0)
+        port=tcp_server.sockets[0].getsockname()[1]
+        client=await ModemClient.connect_tcp("127.0.0.1",port)
+        with pytest.raises(ValueError,match=r"Baud.*"):
+            await asyncio.wait_for(client.configure(8000,freq_map,0),10)
+        # A failure inside the handler is answered with an Error message
+        original_handle=ModemSession.handle
+        def broken_handle(session, message):
+            raise ZeroDivisionError("division by zero")
+        monkeypatch.setattr(ModemSession,"handle",broken_handle)
+        with pytest.raises(ValueError,match=r"Internal error.*"):
+            await asyncio.wait_for(client.transmit(b"a"),10)
+        monkeypatch.setattr(ModemSession,"handle",original_handle)
+        samples,received=await asyncio.wait_for(
+            roundtrip_session(client,b"still alive"),10)
+        await client.close()
+        server.close()
+        await server.wait_closed()
+        return received
+    assert run(main())==b"still alive"
+
+def test_property_tcp_concurrent_sessions():
+    async def main():
+        server=ModemServer(max_pending=2)
+        tcp_server=await server.start_tcp("127.0.0.1",0)
+        port=tcp_server.sockets[0].getsockname()[1]
+        payloads=[bytes((random.getrandbits(8) for _ in range(n)))
+                  for n in [1,17,64,33]]
+        clients=[await ModemClient.connect_tcp("127.0.0.1",port)
+                 for _ in payloads]
+        results=await asyncio.gather(*[roundtrip_session(client,payload)
+            for client,payload in zip(clients,payloads)])
+        for client in clients:
+            await client.close()
+        server.close()
+        await server.wait_closed()
+        return payloads,results
+    payloads,results=run(main())
+    modulator=FSKModulator(1/8000,freq_map,300)
+    for payload,(samples,received) in zip(payloads,results):
+        expected=transmit_payload(modulator,payload,interleave_shape=(16,7),
+                                  dtype=np.float32)
+        assert np.array_equal(samples,expected)
+        assert received==payload
+
+@pytest.mark.skipif(not hasattr(asyncio,"start_unix_server"),
+                    reason="Unix sockets are not available")
+def test_unit_unix_socket_errors():
+    async def main(path):
+        server=ModemServer()
+        await server.start_unix(path)
+        client=await ModemClient.connect_unix(path)
+        with pytest.raises(ValueError,match=r".*not been configured"):
+            await client.receive(np.zeros(10))
+        samples,received=await roundtrip_session(client,b"unix")
+        await client.close()
+        server.close()
+        await server.wait_closed()
+        return received
+    with tempfile.TemporaryDirectory() as temp_dir:
+        assert run(main(os.path.join(temp_dir,"modem.sock")))==b"unix"
@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+
+import pytest
+
+from scipy.io import wavfile
+
+from voicechat_modem_dsp.audio.wav_file import *
+
+def test_unit_sample_conversion():
+    block=np.array([-2.0,-1.0,0.0,0.5,1.0,2.0])
+    samples=float_to_samples(block,np.int16)
+    assert samples.tolist()==[-32767,-32767,0,16384,32767,32767]
+    assert np.allclose(samples_to_float(samples),np.clip(block,-1,1),
+                       atol=1e-4)
+    assert float_to_samples(block,np.float32).dtype==np.float32
+
+@pytest.mark.parametrize("dtype",["int16","float32",np.int16,np.float32])
+def test_unit_wav_turnaround(tmpdir,dtype):
+    path=str(tmpdir.join("audio.wav"))
+    signal=np.sin(np.arange(1000)*0.1)
+    with AudioFileWriter(path,8000,len(signal),dtype=dtype) as writer:
+        for start in range(0,len(signal),300):
+            writer.write(signal[start:start+300])
+        with pytest.raises(ValueError):
+            writer.write(signal[:1])
+    # Check that other readers understand the file
+    sample_rate,scipy_samples=wavfile.read(path)
+    assert sample_rate==8000
+    assert scipy_samples.dtype==np.dtype(dtype)
+    with AudioFileReader(path) as reader:
+        assert reader.sample_rate==8000
+        assert len(reader)==len(signal)
+        assert np.array_equal(reader.samples,scipy_samples)
+        assert np.allclose(samples_to_float(reader.samples),signal,atol=1e-4)
+        windows=list(reader.windows(400,300))
+        assert [start for start,_ in windows]==[0,300,600,900]
+        assert len(windows[-1][1])==100
+        # Windows are views of the memory map and are not copies
+        assert np.shares_memory(windows[1][1],reader.samples)
+
+def test_unit_raw_turnaround(tmpdir):
+    path=str(tmpdir.join("audio.raw"))
+    signal=np.linspace(-1,1,100)
+    with AudioFileWriter(path,8000,len(signal),dtype="float32",
+                         raw=True) as writer:
+        writer.write(signal)
+    assert os.path.getsize(path)==4*len(signal)
+    reader=AudioFileReader(path,raw=True,sample_rate=8000,dtype="<f4")
+    assert np.allclose(reader.window(10,5),signal[10:15])
+    with pytest.raises(ValueError):
+        AudioFileReader(path)
+
+def test_unit_wav_writer_header(tmpdir):
+    path=str(tmpdir.join("audio.wav"))
+    with AudioFileWriter(path,8000,10,dtype=np.float32):
+        pass
+    with open(path,"rb") as audio_file:
+        header=audio_file.read(64)
+    # IEEE float fmt chunks carry an 18 byte body ending with cbSize=0
+    assert header[12:20]==b"fmt "+(18).to_bytes(4,"little")
+    assert header[36:38]==b"\x00\x00"
+    assert header[38:42]==b"fact"
+    for dtype in ["int8",np.float64,"not a type"]:
+        with pytest.raises(ValueError):
+            AudioFileWriter(path,8000,10,dtype=dtype)
@@ -0,0 +1,224 @@
+import os
+import struct
+
+import numpy as np
+
+# WAV format tags
+WAVE_FORMAT_PCM=1
+WAVE_FORMAT_IEEE_FLOAT=3
+WAVE_FORMAT_EXTENSIBLE=0xfffe
+
+# Sample types that can be read, keyed by (format tag, bits per sample)
+_wav_dtypes={(WAVE_FORMAT_PCM,8):np.dtype("u1"),
+             (WAVE_FORMAT_PCM,16):np.dtype("<i2"),
+             (WAVE_FORMAT_PCM,32):np.dtype("<i4"),
+             (WAVE_FORMAT_IEEE_FLOAT,32):np.dtype("<f4"),
+             (WAVE_FORMAT_IEEE_FLOAT,64):np.dtype("<f8")}
+
+# Sample types that can be written
+_writer_dtypes={np.dtype("<i2"):WAVE_FORMAT_PCM,
+                np.dtype("<f4"):WAVE_FORMAT_IEEE_FLOAT}
+
+"""
+Converts samples in [-1, 1] to the sample type stored in a file
+Integer samples are clipped to avoid wrapping around
+"""
+def float_to_samples(block, dtype):
+    dtype=np.dtype(dtype)
+    if dtype.kind=="f":
+        return np.asarray(block,dtype=dtype)
+    if dtype.kind=="u":
+        # 8 bit WAV samples are unsigned with an offset of 128
+        scale=(np.iinfo(dtype).max+1)/2
+        scaled=np.clip(np.asarray(block)*scale+scale,0,np.iinfo(dtype).max)
+        return np.round(scaled).astype(dtype)
+    scale=np.iinfo(dtype).max
+    scaled=np.clip(np.asarray(block)*scale,-scale,scale)
+    return np.round(scaled).astype(dtype)
+
+"""
+Converts stored samples back to floats in [-1, 1]
+"""
+def samples_to_float(block, dtype=np.float64):
+    block=np.asarray(block)
+    if block.dtype.kind=="f":
+        return block.astype(dtype,copy=False)
+    if block.dtype.kind=="u":
+        scale=(np.iinfo(block.dtype).max+1)/2
+        return (block.astype(dtype)-scale)/scale
+    return block.astype(dtype)/np.iinfo(block.dtype).max
+
+def _wav_header(format_tag, channels, sample_rate, dtype, sample_count):
+    block_align=channels*dtype.itemsize
+    data_len=sample_count*block_align
+    fmt_fields=(format_tag,channels,int(sample_rate),
+                int(sample_rate)*block_align,block_align,8*dtype.itemsize)
+    if format_tag!=WAVE_FORMAT_PCM:
+        # Non-PCM formats need the cbSize field and a fact chunk with
+        # the frame count
+        fmt_chunk=struct.pack("<4sIHHIIHHH",b"fmt ",18,*(fmt_fields+(0,)))
+        fact_chunk=struct.pack("<4sII",b"fact",4,sample_count)
+    else:
+        fmt_chunk=struct.pack("<4sIHHIIHH",b"fmt ",16,*fmt_fields)
+        fact_chunk=b""
+    data_header=struct.pack("<4sI",b"data",data_len)
+    riff_len=4+len(fmt_chunk)+len(fact_chunk)+len(data_header)+data_len
+    if riff_len>0xffffffff:
+        raise ValueError("Audio is too long for a WAV file")
+    return (struct.pack("<4sI4s",b"RIFF",riff_len,b"WAVE")+
+            fmt_chunk+fact_chunk+data_header)
+
+"""
+Writes audio blocks into a preallocated memory-mapped WAV or raw file
+The total sample count must be known up front so the file can be sized
+Only the memory map is touched when writing so RAM use stays constant
+dtype is anything np.dtype accepts that means int16 or float32
+"""
+class AudioFileWriter(object):
+    def __init__(self, path, sample_rate, sample_count, dtype="int16",
+                 channels=1, raw=False):
+        try:
+            self.dtype=np.dtype(dtype)
+        except TypeError:
+            raise ValueError("Unsupported sample type: "+str(dtype))
+        if self.dtype not in _writer_dtypes:
+            raise ValueError("Unsupported sample type: "+str(dtype))
+        format_tag=_writer_dtypes[self.dtype]
+        self.path=path
+        self.sample_rate=sample_rate
+        self.sample_count=sample_count
+        self.channels=channels
+        self.position=0
+
+        if raw:
+            header=b""
+        else:
+            header=_wav_header(format_tag,channels,sample_rate,
+                               self.dtype,sample_count)
+        data_len=sample_count*channels*self.dtype.itemsize
+        with open(path,"wb") as audio_file:
+            audio_file.write(header)
+            # Sizing the file leaves the data sparse until it is written
+            audio_file.truncate(len(header)+data_len)
+        shape=(sample_count,) if channels==1 else (sample_count,channels)
+        if sample_count==0:
+            self._samples=np.zeros(shape,dtype=self.dtype)
+        else:
+            self._samples=np.memmap(path,mode="r+",dtype=self.dtype,
+                                    offset=len(header),shape=shape)
+
+    """
+    Writes a block of float samples in [-1, 1] at the current position
+    """
+    def write(self, block):
+        block=np.asarray(block)
+        if self.position+len(block)>self.sample_count:
+            raise ValueError("Block extends past the end of the file")
+        self._samples[self.position:self.position+len(block)]=\
+            float_to_samples(block,self.dtype)
+        self.position+=len(block)
+
+    def close(self):
+        if self._samples is not None:
+            if isinstance(self._samples,np.memmap):
+                self._samples.flush()
+            self._samples=None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def _parse_wav_header(audio_file):
+    riff_header=audio_file.read(12)
+    if (len(riff_header)!=12 or riff_header[:4]!=b"RIFF"
+            or riff_header[8:]!=b"WAVE"):
+        raise ValueError("Not a WAV file")
+    format_info=None
+    while True:
+        chunk_header=audio_file.read(8)
+        if len(chunk_header)<8:
+            raise ValueError("WAV file has no data chunk")
+        chunk_id,chunk_len=struct.unpack("<4sI",chunk_header)
+        if chunk_id==b"fmt ":
+            fmt_chunk=audio_file.read(chunk_len)
+            format_tag,channels,sample_rate,_,_,bits_per_sample=\
+                struct.unpack("<HHIIHH",fmt_chunk[:16])
+            if format_tag==WAVE_FORMAT_EXTENSIBLE:
+                # Sub-format GUID starts with the actual format tag
+                format_tag=struct.unpack("<H",fmt_chunk[24:26])[0]
+            format_info=(format_tag,channels,sample_rate,bits_per_sample)
+        elif chunk_id==b"data":
+            if format_info is None:
+                raise ValueError("WAV data chunk precedes format chunk")
+            return format_info,audio_file.tell(),chunk_len
+        else:
+            # Chunks are padded to an even length
+            audio_file.seek(chunk_len+chunk_len%2,os.SEEK_CUR)
+        if chunk_id==b"fmt " and chunk_len%2:
+            audio_file.seek(1,os.SEEK_CUR)
+
+"""
+Memory-maps a WAV or raw recording for reading
+Raw files need the sample rate, sample type and channel count given
+Windows are views into the memory map so no audio is copied
+"""
+class AudioFileReader(object):
+    def __init__(self, path, raw=False, sample_rate=None, dtype=None,
+                 channels=1):
+        if raw:
+            if sample_rate is None or dtype is None:
+                raise ValueError("Raw files need a sample rate and type")
+            self.dtype=np.dtype(dtype)
+            data_offset=0
+            data_len=os.path.getsize(path)
+        else:
+            with open(path,"rb") as audio_file:
+                format_info,data_offset,data_len=_parse_wav_header(audio_file)
+            format_tag,channels,sample_rate,bits_per_sample=format_info
+            if (format_tag,bits_per_sample) not in _wav_dtypes:
+                raise ValueError("Unsupported WAV sample format")
+            self.dtype=_wav_dtypes[(format_tag,bits_per_sample)]
+            # Some writers leave the data length unset when streaming
+            data_len=min(data_len,os.path.getsize(path)-data_offset)
+        self.path=path
+        self.sample_rate=sample_rate
+        self.channels=channels
+        sample_count=data_len//(channels*self.dtype.itemsize)
+        shape=(sample_count,) if channels==1 else (sample_count,channels)
+        if sample_count==0:
+            self.samples=np.zeros(shape,dtype=self.dtype)
+        else:
+            self.samples=np.memmap(path,mode="r",dtype=self.dtype,
+                                   offset=data_offset,shape=shape)
+
+    @property
+    def dt(self):
+        return 1/self.sample_rate
+
+    def __len__(self):
+        return len(self.samples)
+
+    def window(self, start, length):
+        return self.samples[start:start+length]
+
+    """
+    Yields (start, view) for consecutive windows of window_len samples
+    hop defaults to window_len for non-overlapping windows
+    The final window may be shorter than window_len
+    """
+    def windows(self, window_len, hop=None):
+        if hop is None:
+            hop=window_len
+        for start in range(0,len(self.samples),hop):
+            yield start,self.samples[start:start+window_len]
+
+    def close(self):
+        self.samples=None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,3 +1,7 @@
+from ..instrumentation import instrumented, count_len
+
+import numpy as np
+
 # Bitstream functions are MSB first
 
 def read_bitstream(bitstream,position):
@@ -24,4 +28,37 @@ def write_bitstream(bitstream, position, bit):
     if bit:
         bitstream[byteindex] |= shifted_bit
     else:
-        bitstream[byteindex] &= ~shifted_bit
\ No newline at end of file
+        bitstream[byteindex] &= ~shifted_bit
+
+# Bulk bit array functions operate on whole buffers at once
+# Bit arrays are NumPy uint8 arrays holding a single 0/1 bit per element
+@instrumented("bit_conversion",count_len("bits"))
+def bitstream_to_bitarray(bitstream):
+    return np.unpackbits(np.frombuffer(bitstream, dtype=np.uint8))
+
+@instrumented("bit_conversion",count_len("bytes"))
+def bitarray_to_bitstream(bitarray):
+    # np.packbits pads the final byte with 0 bits if needed
+    return np.packbits(np.asarray(bitarray, dtype=np.uint8)).tobytes()
+
+@instrumented("bit_conversion",count_len("symbols"))
+def bitarray_to_symbols(bitarray, bits_per_symbol):
+    if bits_per_symbol<1 or bits_per_symbol>8:
+        raise ValueError("Symbols must be between 1 and 8 bits wide")
+    bitarray=np.asarray(bitarray, dtype=np.uint8)
+    # Pad final partial symbol with 0 bits
+    pad_len=(-len(bitarray))%bits_per_symbol
+    if pad_len!=0:
+        bitarray=np.concatenate((bitarray,np.zeros(pad_len,dtype=np.uint8)))
+    bit_groups=bitarray.reshape(-1,bits_per_symbol)
+    # np.packbits left-aligns each group within a byte
+    symbols=np.packbits(bit_groups,axis=1).ravel()
+    return symbols >> (8-bits_per_symbol)
+
+@instrumented("bit_conversion",count_len("bits"))
+def symbols_to_bitarray(symbols, bits_per_symbol):
+    if bits_per_symbol<1 or bits_per_symbol>8:
+        raise ValueError("Symbols must be between 1 and 8 bits wide")
+    symbols=np.asarray(symbols, dtype=np.uint8).reshape(-1,1)
+    bit_groups=np.unpackbits(symbols,axis=1)[:,8-bits_per_symbol:]
+    return bit_groups.ravel()
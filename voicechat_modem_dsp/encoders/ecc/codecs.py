@@ -0,0 +1,15 @@
+from .hamming_7_4 import Hamming74Codec
+from .hamming_8_4 import Hamming84Codec
+from .convolutional import ConvolutionalCodec
+
+import functools
+
+# Convenience mapping to allow for lookup of codecs by name
+ecc_codec_mappings = {"hamming_7_4":Hamming74Codec,
+                      "hamming_8_4":Hamming84Codec,
+                      "convolutional_1_2":functools.partial(
+                          ConvolutionalCodec,puncture="1/2"),
+                      "convolutional_2_3":functools.partial(
+                          ConvolutionalCodec,puncture="2/3"),
+                      "convolutional_3_4":functools.partial(
+                          ConvolutionalCodec,puncture="3/4")}
@@ -0,0 +1,245 @@
+from .ecc_codec import ECCCodec, ECCDecodeReport, truncate_soft_bits, \
+    soft_bits_from_bitstream
+from ..bitstream import bitstream_to_bitarray, bitarray_to_bitstream
+from ... import instrumentation
+from ...instrumentation import instrumented, count_len
+
+import numpy as np
+
+# Puncturing patterns for the rate 1/2 mother code
+# Row i says which outputs of generator i are sent in each period
+puncture_patterns={"1/2":[[1],[1]],
+                   "2/3":[[1,1],[1,0]],
+                   "3/4":[[1,1,0],[1,0,1]]}
+
+"""
+Rate 1/2 convolutional code with optional puncturing and Viterbi decoding
+
+Defaults to the common constraint length 7 code with generators 171 and 133
+(octal). Generator MSBs apply to the newest input bit.
+The encoder is terminated with constraint_length-1 zero bits, and the
+outputs of both generators are interleaved bit by bit.
+Punctured bits are treated as erasures when decoding.
+"""
+class ConvolutionalCodec(ECCCodec):
+    def __init__(self, constraint_length=7, generators=(0o171,0o133),
+                 puncture="1/2"):
+        if len(generators)!=2:
+            raise ValueError("Exactly two generators are supported")
+        if puncture not in puncture_patterns:
+            raise ValueError("Unsupported puncturing pattern")
+        for generator in generators:
+            if generator<=0 or generator>=(1<<constraint_length):
+                raise ValueError("Generator does not fit constraint length")
+        self.constraint_length=constraint_length
+        self.generators=tuple(generators)
+        self.puncture=puncture
+        pattern=np.array(puncture_patterns[puncture],dtype=bool)
+        # Transmission order is generator 0 then generator 1 for each input
+        self._puncture_mask=pattern.T.ravel()
+        self.code_rate=pattern.shape[1]/np.count_nonzero(pattern)
+
+        # Taps for np.convolve, index k applies to the input k steps ago
+        self._taps=[np.array([(generator>>(constraint_length-1-k))&1
+                              for k in range(constraint_length)],
+                             dtype=np.uint8)
+                    for generator in generators]
+        self._build_trellis()
+
+    def _build_trellis(self):
+        memory=self.constraint_length-1
+        self._state_count=1<<memory
+        # Steps merged into one add-compare-select, so each state has
+        # 2**steps predecessors and decisions pack evenly into bytes
+        self._merged_steps=max(steps for steps in (1,2,4) if steps<=memory)
+        self._step_tables={steps:self._merged_trellis(steps)
+                           for steps in range(1,self._merged_steps+1)}
+
+    """
+    Returns (previous_states, branch_patterns, pattern_signs) for a trellis
+    that advances steps inputs at once
+    State holds the previous constraint_length-1 inputs, newest as MSB, so
+    after steps inputs the state determines those inputs and all but the
+    steps oldest bits of the state steps inputs earlier
+    previous_states[s,j] is predecessor j of state s and branch_patterns
+    indexes the columns of pattern_signs, which hold the expected sign of
+    each of the 2*steps mother code bits
+    """
+    def _merged_trellis(self, steps):
+        memory=self.constraint_length-1
+        state_count=1<<memory
+        next_states=np.arange(state_count)[:,np.newaxis]
+        previous_states=(((next_states<<steps)&(state_count-1))|
+                         np.arange(1<<steps))
+        states=previous_states.copy()
+        branch_patterns=np.zeros(previous_states.shape,dtype=np.int64)
+        for step in range(steps):
+            input_bits=(next_states>>(memory-steps+step))&1
+            registers=(input_bits<<memory)|states
+            for index,generator in enumerate(self.generators):
+                parity=np.zeros(registers.shape,dtype=np.int64)
+                masked=registers&generator
+                while np.any(masked):
+                    parity^=masked&1
+                    masked>>=1
+                # Output pair of this step is digit step of the pattern
+                branch_patterns+=parity<<(2*step+1-index)
+            states=registers>>1
+        # Mother code bit 2*step+index is pattern bit 2*step+1-index
+        pattern_bits=(np.arange(4**steps)[np.newaxis,:]>>
+                      (np.arange(2*steps)^1)[:,np.newaxis])&1
+        return previous_states,branch_patterns,2.0*pattern_bits-1
+
+    def _transmitted_mask(self, input_len):
+        mother_len=2*(input_len+self.constraint_length-1)
+        repeats=-(-mother_len//len(self._puncture_mask))
+        return np.tile(self._puncture_mask,repeats)[:mother_len]
+
+    def _encoded_bit_count(self, payload_len):
+        return int(np.count_nonzero(self._transmitted_mask(8*payload_len)))
+
+    def encoded_length(self, payload_len):
+        return -(-self._encoded_bit_count(payload_len)//8)
+
+    # Inverse of encoded_length, which grows by more than a byte per byte
+    def _payload_length(self, encoded_len):
+        payload_len=int(encoded_len*self.code_rate)+1
+        while payload_len>0 and self.encoded_length(payload_len)>encoded_len:
+            payload_len-=1
+        return payload_len
+
+    def _encode(self, bitstream):
+        input_bits=np.concatenate((bitstream_to_bitarray(bitstream),
+            np.zeros(self.constraint_length-1,dtype=np.uint8)))
+        mother_bits=np.empty((len(input_bits),2),dtype=np.uint8)
+        for index,taps in enumerate(self._taps):
+            # Modulo 2 convolution computes the generator parity
+            mother_bits[:,index]=(np.convolve(input_bits,taps)
+                                  [:len(input_bits)]&1)
+        mother_bits=mother_bits.ravel()
+        return bitarray_to_bitstream(
+            mother_bits[self._transmitted_mask(len(input_bits)-
+                        self.constraint_length+1)])
+
+    encode=instrumented("ecc_encode",count_len("bytes"))(_encode)
+
+    """
+    Returns the decoded payload bits for soft bits of a whole encoding
+
+    Add-compare-select runs over all states at once and merges
+    _merged_steps trellis steps per iteration, so the Python loop runs
+    once per _merged_steps input bits
+    Survivor decisions are packed into bytes, using state_count/8 bytes
+    per input bit (8 bytes for constraint length 7)
+    Time and memory both grow linearly with the input length
+    """
+    def _viterbi(self, soft_bits, payload_len, chunk_steps=1<<12):
+        input_len=8*payload_len+self.constraint_length-1
+        transmitted_mask=self._transmitted_mask(8*payload_len)
+        mother_soft=np.zeros(len(transmitted_mask))
+        # Punctured bits stay 0 so they do not affect path metrics
+        mother_soft[transmitted_mask]=soft_bits[:np.count_nonzero(
+            transmitted_mask)]
+
+        # The leftover steps run first so the rest divides evenly
+        merged_steps=self._merged_steps
+        first_steps=input_len%merged_steps
+        segments=list()
+        if first_steps>0:
+            segments.append((0,first_steps,1))
+        segments.append((first_steps,merged_steps,
+                         (input_len-first_steps)//merged_steps))
+
+        path_metrics=np.full(self._state_count,-np.inf)
+        path_metrics[0]=0
+        segment_decisions=list()
+        for start_step,steps,iterations in segments:
+            previous_states,branch_patterns,pattern_signs=\
+                self._step_tables[steps]
+            predecessor_rows=np.ascontiguousarray(previous_states.T)
+            pattern_rows=np.ascontiguousarray(branch_patterns.T)
+            decision_bytes=-(-self._state_count//(8//steps))
+            decisions=np.empty((iterations,decision_bytes),dtype=np.uint8)
+            step_soft=mother_soft[2*start_step:
+                2*(start_step+steps*iterations)].reshape(iterations,
+                                                         2*steps)
+            chunk_len=max(1,chunk_steps//steps)
+            for chunk_start in range(0,iterations,chunk_len):
+                chunk_end=min(chunk_start+chunk_len,iterations)
+                # Correlation of each iteration with every output pattern
+                pattern_metrics=np.dot(step_soft[chunk_start:chunk_end],
+                                       pattern_signs)
+                chunk_decisions=np.empty((chunk_end-chunk_start,
+                                          self._state_count),dtype=np.uint8)
+                for index,metrics in enumerate(pattern_metrics):
+                    # Predecessors along axis 0 make the reductions run
+                    # across contiguous rows of states
+                    candidates=path_metrics.take(predecessor_rows)
+                    candidates+=metrics.take(pattern_rows)
+                    chunk_decisions[index]=candidates.argmax(axis=0)
+                    path_metrics=candidates.max(axis=0)
+                # Keep metrics small so precision does not degrade
+                path_metrics-=path_metrics.max()
+                decisions[chunk_start:chunk_end]=self._pack_decisions(
+                    chunk_decisions,steps)
+            segment_decisions.append(decisions)
+
+        # Encoder is terminated so the best path ends in state 0
+        memory=self.constraint_length-1
+        decoded_bits=np.empty(input_len,dtype=np.uint8)
+        state=0
+        for (start_step,steps,iterations),decisions in \
+                reversed(list(zip(segments,segment_decisions))):
+            previous_states=self._step_tables[steps][0].tolist()
+            per_byte=8//steps
+            choice_mask=(1<<steps)-1
+            # States after each iteration give the inputs of that iteration
+            end_states=[0]*iterations
+            chunk_len=max(1,chunk_steps//steps)
+            for chunk_end in range(iterations,0,-chunk_len):
+                chunk_start=max(0,chunk_end-chunk_len)
+                # Python lists are faster to index one element at a time
+                chunk_decisions=decisions[chunk_start:chunk_end].tolist()
+                for iteration in range(chunk_end-1,chunk_start-1,-1):
+                    end_states[iteration]=state
+                    packed=chunk_decisions[iteration-chunk_start][
+                        state//per_byte]
+                    choice=(packed>>(steps*(state%per_byte)))&choice_mask
+                    state=previous_states[state][choice]
+            end_states=np.array(end_states,dtype=np.int64)
+            input_shifts=memory-steps+np.arange(steps)
+            decoded_bits[start_step:start_step+steps*iterations]=(
+                (end_states[:,np.newaxis]>>input_shifts)&1).ravel()
+        return decoded_bits[:8*payload_len]
+
+    # Packs decisions of steps bits each, 8//steps states per byte
+    @staticmethod
+    def _pack_decisions(decisions, steps):
+        per_byte=8//steps
+        state_count=decisions.shape[1]
+        if state_count<per_byte:
+            decisions=np.pad(decisions,((0,0),(0,per_byte-state_count)))
+        grouped=decisions.reshape(len(decisions),-1,per_byte)
+        shifts=(steps*np.arange(per_byte)).astype(np.uint8)
+        return np.bitwise_or.reduce(grouped<<shifts,axis=-1).astype(np.uint8)
+
+    @instrumented("ecc_decode",count_len("bytes"))
+    def decode_soft(self, soft_bits):
+        soft_bits=truncate_soft_bits(soft_bits)
+        payload_len=self._payload_length(len(soft_bits)//8)
+        return bitarray_to_bitstream(self._viterbi(soft_bits,payload_len))
+
+    # Errors are estimated by re-encoding the decoded data
+    @instrumented("ecc_decode",lambda report: {"bytes":len(report.data)})
+    def decode_report(self, bitstream):
+        payload_len=self._payload_length(len(bitstream))
+        received_bits=bitstream_to_bitarray(bitstream)
+        decoded_bits=self._viterbi(soft_bits_from_bitstream(bitstream),
+                                   payload_len)
+        data=bitarray_to_bitstream(decoded_bits)
+        expected_bits=bitstream_to_bitarray(self._encode(data))
+        compare_len=self._encoded_bit_count(payload_len)
+        error_positions=np.flatnonzero(received_bits[:compare_len]!=
+                                       expected_bits[:compare_len])
+        instrumentation.count("ecc_corrections",len(error_positions))
+        return ECCDecodeReport(data,len(error_positions),error_positions,0)
@@ -0,0 +1,82 @@
+from collections import namedtuple
+
+from ..bitstream import bitstream_to_bitarray
+
+import numpy as np
+
+# error_positions are bit indexes into the encoded bitstream
+# uncorrectable_count counts blocks with detected but uncorrected errors
+ECCDecodeReport=namedtuple("ECCDecodeReport",
+    ["data","error_count","error_positions","uncorrectable_count"])
+
+"""
+Common interface of error correcting codecs
+
+Encoded data is bytes like the rest of the encoders
+Soft decoders take one float per encoded bit where the sign is the
+hard decision (positive means 1) and the magnitude is the confidence
+"""
+class ECCCodec(object):
+    # Ratio of payload bits to encoded bits
+    code_rate=1
+
+    def encode(self, bitstream):
+        raise NotImplementedError
+
+    def decode_report(self, bitstream):
+        raise NotImplementedError
+
+    def decode_soft(self, soft_bits):
+        raise NotImplementedError
+
+    def decode(self, bitstream):
+        return self.decode_report(bitstream).data
+
+    # Length in bytes of the encoding of a payload_len byte payload
+    def encoded_length(self, payload_len):
+        return len(self.encode(bytes(payload_len)))
+
+"""
+Converts bits to soft values with full confidence
+"""
+def soft_bits_from_bitstream(bitstream):
+    return 2*bitstream_to_bitarray(bitstream).astype(np.float64)-1
+
+"""
+Converts per-tone demodulator magnitudes into soft bits
+magnitudes has one row per symbol and one column per entry of tone_symbols
+Each bit is the difference between the strongest tone with that bit set and
+the strongest tone with that bit clear (max-log approximation)
+Bits are MSB first to match radix_encode
+"""
+def soft_bits_from_magnitudes(magnitudes, tone_symbols, bits_per_symbol):
+    magnitudes=np.asarray(magnitudes,dtype=np.float64)
+    tone_symbols=np.asarray(tone_symbols)
+    soft_bits=np.empty((len(magnitudes),bits_per_symbol))
+    for bit_index in range(bits_per_symbol):
+        shift=bits_per_symbol-1-bit_index
+        bit_set=((tone_symbols>>shift)&1).astype(bool)
+        if np.all(bit_set) or not np.any(bit_set):
+            # Tone set cannot distinguish this bit
+            soft_bits[:,bit_index]=0
+            continue
+        soft_bits[:,bit_index]=(np.max(magnitudes[:,bit_set],axis=1)-
+                                np.max(magnitudes[:,~bit_set],axis=1))
+    return soft_bits.ravel()
+
+"""
+Drops soft bits past the last whole byte
+These come from padding symbols that do not belong to the encoded bytes
+"""
+def truncate_soft_bits(soft_bits):
+    soft_bits=np.asarray(soft_bits,dtype=np.float64)
+    return soft_bits[:8*(len(soft_bits)//8)]
+
+"""
+Maximum likelihood decoding of short block codes from soft bits
+Returns the index of the codebook row that correlates best with each block
+codebook holds one codeword per row as 0/1 bits
+"""
+def soft_block_decode(soft_blocks, codebook):
+    bipolar_codebook=2*np.asarray(codebook,dtype=np.float64)-1
+    return np.argmax(np.dot(soft_blocks,bipolar_codebook.T),axis=1)
@@ -1,78 +1,147 @@
-import math
+from collections import namedtuple
 
-from ..bitstream import read_bitstream, write_bitstream
+import numpy as np
 
-# Functions should accept either bytes or bytearrays
-# Manipulate bytearrays during construction but return bytes
-# Once encoded, data should be immutable
-def hamming_encode_7_4(bitstream):
-    output_arr=bytearray(math.ceil(len(bitstream)*7/4))
-    output_index=0
-    for i in range(0,8*len(bitstream),4):
-        byteindex=i//8
-        bitpos=7-i%8
-        bit3=bool(bitstream[byteindex] & 1<<bitpos)
-        bit5=bool(bitstream[byteindex] & 1<<(bitpos-1))
-        bit6=bool(bitstream[byteindex] & 1<<(bitpos-2))
-        bit7=bool(bitstream[byteindex] & 1<<(bitpos-3))
-        # Use bitwise xor operator here since type is bool already
+from ..bitstream import bitstream_to_bitarray, bitarray_to_bitstream, \
+    bitarray_to_symbols, symbols_to_bitarray
+from .ecc_codec import ECCCodec, ECCDecodeReport, truncate_soft_bits, \
+    soft_block_decode
+from ... import instrumentation
+from ...instrumentation import instrumented, count_len
+
+# Codewords are stored MSB first as 7 bit values with bit order
+# p1 p2 d3 p4 d5 d6 d7 using the usual Hamming bit numbering
+def _compute_encode_table():
+    table=np.zeros(16,dtype=np.uint8)
+    for nibble in range(16):
+        bit3=(nibble>>3)&1
+        bit5=(nibble>>2)&1
+        bit6=(nibble>>1)&1
+        bit7=nibble&1
         bit1=bit3 ^ bit5 ^ bit7
         bit2=bit3 ^ bit6 ^ bit7
         bit4=bit5 ^ bit6 ^ bit7
-        
-        # Write computed data
-        write_bitstream(output_arr,output_index,bit1)
-        write_bitstream(output_arr,output_index+1,bit2)
-        write_bitstream(output_arr,output_index+2,bit3)
-        write_bitstream(output_arr,output_index+3,bit4)
-        write_bitstream(output_arr,output_index+4,bit5)
-        write_bitstream(output_arr,output_index+5,bit6)
-        write_bitstream(output_arr,output_index+6,bit7)
-        output_index+=7
-    return bytes(output_arr)
+        table[nibble]=(bit1<<6 | bit2<<5 | bit3<<4 | bit4<<3 |
+                       bit5<<2 | bit6<<1 | bit7)
+    return table
+
+# Syndrome is the 1-indexed location of a single bit error
+# Map it to a mask that flips the wrong bit of the 7 bit codeword
+def _compute_syndrome_table():
+    table=np.zeros(8,dtype=np.uint8)
+    for syndrome in range(1,8):
+        table[syndrome]=1<<(7-syndrome)
+    return table
+
+_encode_table=_compute_encode_table()
+_syndrome_table=_compute_syndrome_table()
+_bit_locations=np.arange(1,8,dtype=np.uint8)
+_codebook=symbols_to_bitarray(_encode_table,7).reshape(16,7)
+
+HammingDecodeReport=namedtuple("HammingDecodeReport",
+                               ["data","error_count","error_positions"])
 
 # Functions should accept either bytes or bytearrays
-# Manipulate bytearrays during construction but return bytes
+# Manipulate arrays during construction but return bytes
 # Once encoded, data should be immutable
+@instrumented("ecc_encode",count_len("bytes"))
+def hamming_encode_7_4(bitstream):
+    bytes_arr=np.frombuffer(bitstream,dtype=np.uint8)
+    # High nibble is encoded first
+    nibbles=np.column_stack((bytes_arr>>4,bytes_arr&0x0f)).ravel()
+    codewords=_encode_table[nibbles]
+    return bitarray_to_bitstream(symbols_to_bitarray(codewords,7))
+
+# Corrects an array of codeword bits with one row per codeword
+# Returns the decoded nibbles and the syndrome of each codeword
+def _decode_codeword_bits(codeword_bits):
+    codewords=bitarray_to_symbols(codeword_bits.ravel(),7)
+    # Xor of locations of set bits is 0 for valid codewords
+    syndromes=np.bitwise_xor.reduce(codeword_bits*_bit_locations,axis=1)
+    codewords^=_syndrome_table[syndromes]
+    # Extract d3 d5 d6 d7 from the corrected codeword
+    nibbles=((codewords>>1)&0x08) | (codewords&0x07)
+    return nibbles,syndromes
+
+def _nibbles_to_bitstream(nibbles):
+    nibble_pairs=nibbles.reshape(-1,2)
+    return ((nibble_pairs[:,0]<<4) | nibble_pairs[:,1]).astype(np.uint8)
+
+# Error positions are bit indexes into the encoded bitstream
+# Errors in parity bits are counted even though they do not affect data
+@instrumented("ecc_decode",lambda report: {"bytes":len(report.data)})
+def hamming_decode_7_4_report(bitstream):
+    encoded_bits=bitstream_to_bitarray(bitstream)
+    # Less than 7 elements left at the end, ignore padding
+    codeword_count=len(encoded_bits)//7
+    codeword_bits=encoded_bits[:7*codeword_count].reshape(-1,7)
+    nibbles,syndromes=_decode_codeword_bits(codeword_bits)
+    # Drop trailing nibble that does not form a complete byte
+    data=_nibbles_to_bitstream(nibbles[:2*(len(nibbles)//2)])
+
+    error_codewords=np.flatnonzero(syndromes)
+    error_positions=7*error_codewords+syndromes[error_codewords]-1
+    instrumentation.count("ecc_corrections",len(error_positions))
+    return HammingDecodeReport(data.tobytes(),len(error_positions),
+                               error_positions)
+
 def hamming_decode_7_4(bitstream):
-    output_arr=bytearray(math.floor(len(bitstream)*4/7))
-    output_index=0
-    for i in range(0,8*len(bitstream),7):
-        try:
-            bit3=read_bitstream(bitstream,i+2)
-            bit5=read_bitstream(bitstream,i+4)
-            bit6=read_bitstream(bitstream,i+5)
-            bit7=read_bitstream(bitstream,i+6)
-            bit1=read_bitstream(bitstream,i)
-            bit2=read_bitstream(bitstream,i+1)
-            bit4=read_bitstream(bitstream,i+3)
-        except ValueError:
-            # Less than 7 elements left at the end, ignore padding
-            break
-
-        # Use bitwise operator here since type is bool already
-        bit1_correct=bit3 ^ bit5 ^ bit7
-        bit2_correct=bit3 ^ bit6 ^ bit7
-        bit4_correct=bit5 ^ bit6 ^ bit7
-        # Use != here even though xor because semantically this is a comparison
-        bit1_error=(bit1 != bit1_correct)
-        bit2_error=(bit2 != bit2_correct)
-        bit4_error=(bit4 != bit4_correct)
-        # Booleans are integers 0 or 1 so below multiplication works
-        error_location=bit1_error+2*bit2_error+4*bit4_error
-        # Correct data bits if wrong but don't bother fixing wrong parity bits
-        if error_location==3:
-            bit3=not bit3
-        elif error_location==5:
-            bit5=not bit5
-        elif error_location==6:
-            bit6=not bit6
-        elif error_location==7:
-            bit7=not bit7
-
-        write_bitstream(output_arr,output_index,bit3)
-        write_bitstream(output_arr,output_index+1,bit5)
-        write_bitstream(output_arr,output_index+2,bit6)
-        write_bitstream(output_arr,output_index+3,bit7)
-        output_index+=4
-    return bytes(output_arr)
\ No newline at end of file
+    return hamming_decode_7_4_report(bitstream).data
+
+# Soft values correspond to the bits of the encoded bitstream
+# Each codeword is decoded to the closest of the 16 valid codewords
+@instrumented("ecc_decode",count_len("bytes"))
+def hamming_decode_soft_7_4(soft_bits):
+    soft_bits=truncate_soft_bits(soft_bits)
+    codeword_count=len(soft_bits)//7
+    soft_blocks=soft_bits[:7*codeword_count].reshape(-1,7)
+    nibbles=soft_block_decode(soft_blocks,_codebook).astype(np.uint8)
+    return _nibbles_to_bitstream(nibbles[:2*(len(nibbles)//2)]).tobytes()
+
+class Hamming74Codec(ECCCodec):
+    code_rate=4/7
+
+    def encode(self, bitstream):
+        return hamming_encode_7_4(bitstream)
+
+    def decode_report(self, bitstream):
+        report=hamming_decode_7_4_report(bitstream)
+        return ECCDecodeReport(report.data,report.error_count,
+                               report.error_positions,0)
+
+    def decode_soft(self, soft_bits):
+        return hamming_decode_soft_7_4(soft_bits)
+
+    def encoded_length(self, payload_len):
+        return (14*payload_len+7)//8
+
+# Incremental version of hamming_decode_7_4
+# Bits of a partial codeword and a partial byte are kept between chunks
+class Hamming74StreamDecoder(object):
+    def __init__(self):
+        self.error_count=0
+        self._leftover_bits=np.zeros(0,dtype=np.uint8)
+        self._leftover_nibbles=np.zeros(0,dtype=np.uint8)
+
+    @instrumented("ecc_decode",count_len("bytes"))
+    def update(self, bitstream):
+        encoded_bits=np.concatenate((self._leftover_bits,
+                                     bitstream_to_bitarray(bitstream)))
+        codeword_count=len(encoded_bits)//7
+        self._leftover_bits=encoded_bits[7*codeword_count:].copy()
+        codeword_bits=encoded_bits[:7*codeword_count].reshape(-1,7)
+        nibbles,syndromes=_decode_codeword_bits(codeword_bits)
+        corrected_count=np.count_nonzero(syndromes)
+        self.error_count+=corrected_count
+        instrumentation.count("ecc_corrections",corrected_count)
+
+        nibbles=np.concatenate((self._leftover_nibbles,nibbles))
+        pair_len=2*(len(nibbles)//2)
+        self._leftover_nibbles=nibbles[pair_len:].copy()
+        return _nibbles_to_bitstream(nibbles[:pair_len]).tobytes()
+
+    # Leftover bits are encoder padding so they are discarded
+    def finalize(self):
+        self._leftover_bits=np.zeros(0,dtype=np.uint8)
+        self._leftover_nibbles=np.zeros(0,dtype=np.uint8)
+        return b""
@@ -0,0 +1,99 @@
+from .ecc_codec import ECCCodec, ECCDecodeReport, truncate_soft_bits, \
+    soft_block_decode
+from .hamming_7_4 import _encode_table as _encode_table_7_4
+from ..bitstream import symbols_to_bitarray
+from ... import instrumentation
+from ...instrumentation import instrumented, count_len
+
+import numpy as np
+
+# Extended Hamming(8,4) appends an overall parity bit to Hamming(7,4)
+# so every codeword is exactly one byte: p1 p2 d3 p4 d5 d6 d7 p8
+# Single errors are corrected and double errors are detected
+def _compute_tables():
+    encode_table=np.zeros(16,dtype=np.uint8)
+    for nibble in range(16):
+        codeword=int(_encode_table_7_4[nibble])<<1
+        codeword|=bin(codeword).count("1")&1
+        encode_table[nibble]=codeword
+
+    # Decoding is a lookup on the received byte
+    decode_table=np.zeros(256,dtype=np.uint8)
+    error_bit_table=np.full(256,-1,dtype=np.int8)
+    uncorrectable_table=np.zeros(256,dtype=bool)
+    for received in range(256):
+        codeword_7=received>>1
+        syndrome=0
+        for location in range(1,8):
+            if codeword_7 & (1<<(7-location)):
+                syndrome^=location
+        parity_error=bin(received).count("1")&1
+        corrected=received
+        if syndrome!=0 and parity_error:
+            error_bit_table[received]=syndrome-1
+            corrected^=1<<(8-syndrome)
+        elif parity_error:
+            # Only the overall parity bit is wrong
+            error_bit_table[received]=7
+            corrected^=1
+        elif syndrome!=0:
+            uncorrectable_table[received]=True
+        decode_table[received]=((corrected>>2)&0x08) | ((corrected>>1)&0x07)
+    return encode_table,decode_table,error_bit_table,uncorrectable_table
+
+_encode_table,_decode_table,_error_bit_table,_uncorrectable_table=\
+    _compute_tables()
+_codebook=symbols_to_bitarray(_encode_table,8).reshape(16,8)
+
+def _nibbles_to_bytes(nibbles):
+    nibble_pairs=nibbles[:2*(len(nibbles)//2)].reshape(-1,2)
+    return ((nibble_pairs[:,0]<<4) | nibble_pairs[:,1]).astype(np.uint8)
+
+@instrumented("ecc_encode",count_len("bytes"))
+def hamming_encode_8_4(bitstream):
+    bytes_arr=np.frombuffer(bitstream,dtype=np.uint8)
+    # High nibble is encoded first
+    nibbles=np.column_stack((bytes_arr>>4,bytes_arr&0x0f)).ravel()
+    return _encode_table[nibbles].tobytes()
+
+# Error positions are bit indexes into the encoded bitstream
+# Blocks with double errors are counted in uncorrectable_count
+# and decoded without correction
+@instrumented("ecc_decode",lambda report: {"bytes":len(report.data)})
+def hamming_decode_8_4_report(bitstream):
+    codewords=np.frombuffer(bitstream,dtype=np.uint8)
+    data=_nibbles_to_bytes(_decode_table[codewords])
+    error_bits=_error_bit_table[codewords]
+    error_codewords=np.flatnonzero(error_bits>=0)
+    error_positions=8*error_codewords+error_bits[error_codewords]
+    uncorrectable_count=int(np.count_nonzero(
+        _uncorrectable_table[codewords]))
+    instrumentation.count("ecc_corrections",len(error_positions))
+    instrumentation.count("ecc_uncorrectable",uncorrectable_count)
+    return ECCDecodeReport(data.tobytes(),len(error_positions),
+                           error_positions,uncorrectable_count)
+
+def hamming_decode_8_4(bitstream):
+    return hamming_decode_8_4_report(bitstream).data
+
+# Each codeword is decoded to the closest of the 16 valid codewords
+@instrumented("ecc_decode",count_len("bytes"))
+def hamming_decode_soft_8_4(soft_bits):
+    soft_blocks=truncate_soft_bits(soft_bits).reshape(-1,8)
+    nibbles=soft_block_decode(soft_blocks,_codebook).astype(np.uint8)
+    return _nibbles_to_bytes(nibbles).tobytes()
+
+class Hamming84Codec(ECCCodec):
+    code_rate=1/2
+
+    def encode(self, bitstream):
+        return hamming_encode_8_4(bitstream)
+
+    def decode_report(self, bitstream):
+        return hamming_decode_8_4_report(bitstream)
+
+    def decode_soft(self, soft_bits):
+        return hamming_decode_soft_8_4(soft_bits)
+
+    def encoded_length(self, payload_len):
+        return 2*payload_len
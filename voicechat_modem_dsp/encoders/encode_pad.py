@@ -1,175 +1,131 @@
-from .bitstream import read_bitstream_iterator, write_bitstream
-
-import base64
+from .bitstream import bitstream_to_bitarray, bitarray_to_bitstream, \
+    bitarray_to_symbols, symbols_to_bitarray
+from ..instrumentation import instrumented, count_len
+
+import numpy as np
+
+# Number of bits carried by each symbol of a power of two radix
+def _radix_bits(radix):
+    bits_per_symbol=int(radix).bit_length()-1
+    if radix!=1<<bits_per_symbol or bits_per_symbol<1 or bits_per_symbol>8:
+        raise ValueError("Radix must be a power of two between 2 and 256")
+    return bits_per_symbol
+
+# Validates symbols and converts datastream to an array of symbol values
+def _datastream_to_symbols(datastream, radix):
+    if isinstance(datastream,(bytes,bytearray,memoryview)):
+        symbols=np.frombuffer(datastream,dtype=np.uint8)
+    elif isinstance(datastream,(list,tuple)):
+        # bytes() converts lists of small ints much faster than NumPy
+        try:
+            symbols=np.frombuffer(bytes(datastream),dtype=np.uint8)
+        except (TypeError, ValueError):
+            symbols=np.asarray(datastream)
+    else:
+        symbols=np.asarray(datastream)
+    if symbols.size==0:
+        return symbols.astype(np.uint8).reshape(0)
+    if symbols.ndim!=1:
+        raise ValueError("Illegal symbol detected in datastream")
+    # Integer arrays skip the slower whole number check
+    if symbols.dtype.kind=="u":
+        if symbols.dtype.itemsize>1 or radix<256:
+            if np.any(symbols>=radix):
+                raise ValueError("Illegal symbol detected in datastream")
+    elif symbols.dtype.kind=="i":
+        if np.any(symbols<0) or np.any(symbols>=radix):
+            raise ValueError("Illegal symbol detected in datastream")
+    elif (symbols.dtype.kind not in "fb" or
+            not np.all(np.mod(symbols,1)==0)
+            or np.any(symbols<0) or np.any(symbols>=radix)):
+        raise ValueError("Illegal symbol detected in datastream")
+    return symbols.astype(np.uint8,copy=False)
+
+# Generic encoder for any power of two radix from 2 to 256
+# Returns a uint8 array of symbols, MSB first
+# Final partial symbol is padded with 0 bits
+@instrumented("symbol_mapping",count_len("symbols"))
+def radix_encode(bitstream, radix):
+    bits_per_symbol=_radix_bits(radix)
+    if 8%bits_per_symbol==0:
+        # Symbols never cross byte boundaries so split bytes directly
+        symbols_per_byte=8//bits_per_symbol
+        shifts=bits_per_symbol*np.arange(symbols_per_byte-1,-1,-1,
+                                         dtype=np.uint8)
+        bytes_arr=np.frombuffer(bitstream,dtype=np.uint8)
+        symbols=(bytes_arr[:,np.newaxis] >> shifts) & (radix-1)
+        return symbols.ravel()
+    bitarray=bitstream_to_bitarray(bitstream)
+    return bitarray_to_symbols(bitarray,bits_per_symbol)
+
+# Generic decoder for any power of two radix from 2 to 256
+# Padding bits at the end must not form a complete symbol
+# If check_padding is set then padding bits must also be 0
+@instrumented("symbol_mapping",count_len("bytes"))
+def radix_decode(datastream, radix, check_padding=True):
+    bits_per_symbol=_radix_bits(radix)
+    if (bits_per_symbol*len(datastream))%8>=bits_per_symbol:
+        raise ValueError("Inappropriate datastream length")
+    symbols=_datastream_to_symbols(datastream,radix)
+    if 8%bits_per_symbol==0:
+        # Length check above guarantees a whole number of bytes
+        symbols_per_byte=8//bits_per_symbol
+        shifts=bits_per_symbol*np.arange(symbols_per_byte-1,-1,-1,
+                                         dtype=np.uint8)
+        symbol_groups=symbols.reshape(-1,symbols_per_byte) << shifts
+        return np.bitwise_or.reduce(symbol_groups,axis=1).tobytes()
+    bitarray=symbols_to_bitarray(symbols,bits_per_symbol)
+    byte_len=len(bitarray)//8
+    if check_padding and np.any(bitarray[8*byte_len:]):
+        raise ValueError("Malformed datastream: end padding is not 0")
+    return bitarray_to_bitstream(bitarray[:8*byte_len])
 
 # These return a list of numbers corresponding to symbols
 def base_2_encode(bitstream):
-    return_list=list()
-    for bit in read_bitstream_iterator(bitstream):
-        return_list.append(1 if bit else 0)
-    return return_list
+    return radix_encode(bitstream,2).tolist()
 
 def base_2_decode(datastream):
-    base_2_mapping={0:False, 1:True}
-    if len(datastream)%8 != 0:
-        raise ValueError("Inappropriate datastream length")
-    return_bytearray=bytearray(len(datastream)//8)
-    for index,bit in enumerate(datastream):
-        try:
-            write_bitstream(return_bytearray,index,base_2_mapping[bit])
-        except KeyError:
-            raise ValueError("Illegal symbol detected in datastream")
-    return bytes(return_bytearray)
+    return radix_decode(datastream,2)
 
 def base_4_encode(bitstream):
-    return_list=list()
-    rollover_counter=0
-    emit_symbol=False
-    for bit in read_bitstream_iterator(bitstream):
-        if emit_symbol:
-            rollover_counter+=(1 if bit else 0)
-            return_list.append(rollover_counter)
-            rollover_counter=0
-        else:
-            rollover_counter+=(2 if bit else 0)
-        emit_symbol=not emit_symbol
-    return return_list
+    return radix_encode(bitstream,4).tolist()
 
 def base_4_decode(datastream):
-    base_4_mapping={0:(False,False),
-                    1:(False,True),
-                    2:(True,False),
-                    3:(True,True)}
-    if len(datastream)%4 != 0:
-        raise ValueError("Inappropriate datastream length")
-    return_bytearray=bytearray(len(datastream)//4)
-    for index,symbol in enumerate(datastream):
-        try:
-            symbol_entry=base_4_mapping[symbol]
-            write_bitstream(return_bytearray,2*index,symbol_entry[0])
-            write_bitstream(return_bytearray,2*index+1,symbol_entry[1])
-        except KeyError:
-            raise ValueError("Illegal symbol detected in datastream")
-    return bytes(return_bytearray)
+    return radix_decode(datastream,4)
 
 def base_8_encode(bitstream):
-    return_list=list()
-    rollover_counter=0
-    emit_symbol_counter=0
-    for bit in read_bitstream_iterator(bitstream):
-        # Could also bit-shift and increment
-        # Writing cases out explicitly is more readable however
-        if emit_symbol_counter==2:
-            rollover_counter+=(1 if bit else 0)
-            return_list.append(rollover_counter)
-            rollover_counter=0
-            emit_symbol_counter=0
-        elif emit_symbol_counter==1:
-            rollover_counter+=(2 if bit else 0)
-            emit_symbol_counter+=1
-        else: #if emit_symbol_counter==0
-            rollover_counter+=(4 if bit else 0)
-            emit_symbol_counter+=1
-    if emit_symbol_counter!=0:
-        return_list.append(rollover_counter)
-    return return_list
+    return radix_encode(bitstream,8).tolist()
 
 def base_8_decode(datastream):
-    base_8_mapping={0:(False,False,False),
-                    1:(False,False,True),
-                    2:(False,True,False),
-                    3:(False,True,True),
-                    4:(True,False,False),
-                    5:(True,False,True),
-                    6:(True,True,False),
-                    7:(True,True,True)}
-    if len(datastream)%8 not in [0,3,6]:
-        raise ValueError("Inappropriate datastream length")
-    has_extension=(len(datastream)%8!=0)
-    byte_len=3*len(datastream)//8
-    if has_extension:
-        byte_len+=1
-    return_bytearray=bytearray(byte_len)
-    for index,symbol in enumerate(datastream):
-        try:
-            symbol_entry=base_8_mapping[symbol]
-            write_bitstream(return_bytearray,3*index,symbol_entry[0])
-            write_bitstream(return_bytearray,3*index+1,symbol_entry[1])
-            write_bitstream(return_bytearray,3*index+2,symbol_entry[2])
-        except KeyError:
-            raise ValueError("Illegal symbol detected in datastream")
-    if has_extension:
-        if return_bytearray[-1]!=0:
-            raise ValueError("Malformed datastream: end padding is not 0")
-        del return_bytearray[-1]
-    return bytes(return_bytearray)
+    return radix_decode(datastream,8)
 
 def base_16_encode(bitstream):
-    return [int(chr(c), 16) for c in base64.b16encode(bitstream)]
+    return radix_encode(bitstream,16).tolist()
 
 def base_16_decode(datastream):
-    if len(datastream)%2!=0:
-        raise ValueError("Inappropriate datastream length")
-    for c in datastream:
-        # Should only require a single hex digit
-        if c<0 or hex(c)[-2]!="x":
-            raise ValueError("Illegal symbol detected in datastream")
-    return base64.b16decode(bytearray("".join([hex(c)[-1] for c in datastream]),
-                            "ascii"),casefold=True)
+    return radix_decode(datastream,16)
 
+# base64 module decoding ignores end padding bits for base 32 and 64
+# Keep that behavior here
 def base_32_encode(bitstream):
-    base_32_mapping = {char:int_val for int_val,char in 
-        enumerate("ABCDEFGHIJKLMNOPQRSTUVWXYZ234567")}
-    base_32_encodestr=str(base64.b32encode(bitstream),"ascii")
-    # Remove padding because we do not need it for this use case
-    base_32_encodestr=base_32_encodestr.replace("=","")
-    # b32encode works properly -> KeyError impossible
-    return [base_32_mapping[char] for char in base_32_encodestr]
+    return radix_encode(bitstream,32).tolist()
 
 def base_32_decode(datastream):
-    # Convert to dict to avoid negative index wrapping
-    base_32_mapping=dict(enumerate("ABCDEFGHIJKLMNOPQRSTUVWXYZ234567"))
-    try:
-        base_32_str="".join([base_32_mapping[c] for c in datastream])
-    except KeyError:
-        raise ValueError("Illegal symbol detected in datastream")
-    add_pad_len=(8-(len(datastream)%8))%8
-    base_32_str+="="*add_pad_len
-    # TODO specify proper mathematical condition
-    try:
-        return base64.b32decode(base_32_str)
-    except ValueError:
-        raise ValueError("Inappropriate datastream length")
+    return radix_decode(datastream,32,check_padding=False)
 
 def base_64_encode(bitstream):
-    base_64_mapping = {char:int_val for int_val,char in
-        enumerate("ABCDEFGHIJKLMNOPQRSTUVWXYZ"
-        "abcdefghijklmnopqrstuvwxyz0123456789+/")}
-    base_64_encodestr=str(base64.b64encode(bitstream),"ascii")
-    # Remove padding because we do not need it for this use case
-    base_64_encodestr=base_64_encodestr.replace("=","")
-    # b32encode works properly -> KeyError impossible
-    return [base_64_mapping[char] for char in base_64_encodestr]
+    return radix_encode(bitstream,64).tolist()
 
 def base_64_decode(datastream):
-    # Convert to dict to avoid negative index wrapping
-    base_64_mapping=dict(enumerate("ABCDEFGHIJKLMNOPQRSTUVWXYZ"
-        "abcdefghijklmnopqrstuvwxyz0123456789+/"))
-    try:
-        base_64_str="".join([base_64_mapping[c] for c in datastream])
-    except KeyError:
-        raise ValueError("Illegal symbol detected in datastream")
-    if len(datastream)%4==1:
-        raise ValueError("Inappropriate datastream length")
-    add_pad_len=(4-(len(datastream)%4))%4
-    base_64_str+="="*add_pad_len
-    return base64.b64decode(base_64_str)
+    return radix_decode(datastream,64,check_padding=False)
 
 # Bitstream already base 256 so conversion is a no-op
 def base_256_encode(bitstream):
     return list(bitstream)
 
 def base_256_decode(datastream):
+    if isinstance(datastream,np.ndarray):
+        return radix_decode(datastream,256)
     # Catch ValueError to provide our own message here
     try:
         return bytes(datastream)
@@ -0,0 +1,67 @@
+from .bitstream import bitstream_to_bitarray, bitarray_to_bitstream, \
+    bitarray_to_symbols, symbols_to_bitarray
+from .encode_pad import _radix_bits, _datastream_to_symbols
+
+import functools
+
+import numpy as np
+
+# Incremental versions of the base_N_encode and base_N_decode functions
+# Only the bits of a partial symbol or byte are kept between chunks
+# so memory use does not depend on the total payload length
+class StreamEncoder(object):
+    def __init__(self, radix):
+        self.radix=radix
+        self.bits_per_symbol=_radix_bits(radix)
+        self._leftover_bits=np.zeros(0,dtype=np.uint8)
+
+    # Returns a uint8 array of the symbols completed by this chunk
+    def update(self, bitstream):
+        bitarray=np.concatenate((self._leftover_bits,
+                                 bitstream_to_bitarray(bitstream)))
+        complete_len=len(bitarray)-len(bitarray)%self.bits_per_symbol
+        self._leftover_bits=bitarray[complete_len:].copy()
+        return bitarray_to_symbols(bitarray[:complete_len],
+                                   self.bits_per_symbol)
+
+    # Flushes the final partial symbol, which is padded with 0 bits
+    def finalize(self):
+        symbols=bitarray_to_symbols(self._leftover_bits,self.bits_per_symbol)
+        self._leftover_bits=np.zeros(0,dtype=np.uint8)
+        return symbols
+
+class StreamDecoder(object):
+    def __init__(self, radix, check_padding=True):
+        self.radix=radix
+        self.bits_per_symbol=_radix_bits(radix)
+        self.check_padding=check_padding
+        self._leftover_bits=np.zeros(0,dtype=np.uint8)
+
+    # Returns the bytes completed by this chunk of symbols
+    def update(self, datastream):
+        symbols=_datastream_to_symbols(datastream,self.radix)
+        bitarray=np.concatenate((self._leftover_bits,
+            symbols_to_bitarray(symbols,self.bits_per_symbol)))
+        complete_len=len(bitarray)-len(bitarray)%8
+        self._leftover_bits=bitarray[complete_len:].copy()
+        return bitarray_to_bitstream(bitarray[:complete_len])
+
+    # Validates the end padding of the datastream
+    # Always returns b"" since padding never forms a complete byte
+    def finalize(self):
+        leftover_bits=self._leftover_bits
+        self._leftover_bits=np.zeros(0,dtype=np.uint8)
+        if len(leftover_bits)>=self.bits_per_symbol:
+            raise ValueError("Inappropriate datastream length")
+        if self.check_padding and np.any(leftover_bits):
+            raise ValueError("Malformed datastream: end padding is not 0")
+        return b""
+
+# Convenience mappings to allow for lookup based on len(modulation_list)
+# base64 module decoding ignores end padding bits for base 32 and 64
+stream_encoder_mappings = {radix:functools.partial(StreamEncoder,radix)
+                           for radix in [2,4,8,16,32,64,256]}
+
+stream_decoder_mappings = {radix:functools.partial(StreamDecoder,radix,
+                                check_padding=(radix not in [32,64]))
+                           for radix in [2,4,8,16,32,64,256]}
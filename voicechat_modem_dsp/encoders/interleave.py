@@ -0,0 +1,96 @@
+from .bitstream import bitstream_to_bitarray, bitarray_to_bitstream
+
+import functools
+
+import numpy as np
+
+# Block interleaving writes bits into a rows x columns block row by row
+# and reads them out column by column
+# Adjacent bits on the channel are then columns bits apart in the payload,
+# so with columns equal to the codeword length a burst of up to rows bits
+# hits each Hamming codeword at most once
+# The last partial block uses the full block permutation with the missing
+# indexes removed so the bitstream length never changes
+
+@functools.lru_cache(maxsize=64)
+def _permutation(rows, columns, bit_count):
+    permutation=np.arange(rows*columns).reshape(rows,columns).T.ravel()
+    if bit_count<rows*columns:
+        permutation=permutation[permutation<bit_count]
+    permutation.flags.writeable=False
+    return permutation
+
+@functools.lru_cache(maxsize=64)
+def _inverse_permutation(rows, columns, bit_count):
+    inverse=np.argsort(_permutation(rows,columns,bit_count))
+    inverse.flags.writeable=False
+    return inverse
+
+def _validate_shape(rows, columns):
+    if rows<1 or columns<1:
+        raise ValueError("Interleaver rows and columns must be positive")
+
+def _permute_bits(bitarray, rows, columns, permutation_func):
+    block_len=rows*columns
+    full_len=len(bitarray)-len(bitarray)%block_len
+    # One gather handles every full block at once
+    full_blocks=bitarray[:full_len].reshape(-1,block_len)
+    tail=bitarray[full_len:]
+    return np.concatenate((
+        full_blocks[:,permutation_func(rows,columns,block_len)].ravel(),
+        tail[permutation_func(rows,columns,len(tail))]))
+
+def block_interleave(bitstream, rows=16, columns=7):
+    _validate_shape(rows,columns)
+    bitarray=bitstream_to_bitarray(bitstream)
+    return bitarray_to_bitstream(
+        _permute_bits(bitarray,rows,columns,_permutation))
+
+def block_deinterleave(bitstream, rows=16, columns=7):
+    _validate_shape(rows,columns)
+    bitarray=bitstream_to_bitarray(bitstream)
+    return bitarray_to_bitstream(
+        _permute_bits(bitarray,rows,columns,_inverse_permutation))
+
+# Incremental versions of block_interleave and block_deinterleave
+# Bits of the current partial block and of the partial output byte
+# are kept between chunks
+class _StreamPermuter(object):
+    _permutation_func=None
+
+    def __init__(self, rows=16, columns=7):
+        _validate_shape(rows,columns)
+        self.rows=rows
+        self.columns=columns
+        self._block_bits=np.zeros(0,dtype=np.uint8)
+        self._output_bits=np.zeros(0,dtype=np.uint8)
+
+    def _emit(self, bitarray):
+        bitarray=np.concatenate((self._output_bits,bitarray))
+        complete_len=len(bitarray)-len(bitarray)%8
+        self._output_bits=bitarray[complete_len:].copy()
+        return bitarray_to_bitstream(bitarray[:complete_len])
+
+    # Returns the bytes completed by this chunk
+    def update(self, bitstream):
+        bitarray=np.concatenate((self._block_bits,
+                                 bitstream_to_bitarray(bitstream)))
+        block_len=self.rows*self.columns
+        full_len=len(bitarray)-len(bitarray)%block_len
+        self._block_bits=bitarray[full_len:].copy()
+        return self._emit(_permute_bits(bitarray[:full_len],
+            self.rows,self.columns,self._permutation_func))
+
+    # Flushes the final partial block
+    def finalize(self):
+        bitstream=self._emit(_permute_bits(self._block_bits,
+            self.rows,self.columns,self._permutation_func))
+        self._block_bits=np.zeros(0,dtype=np.uint8)
+        self._output_bits=np.zeros(0,dtype=np.uint8)
+        return bitstream
+
+class StreamInterleaver(_StreamPermuter):
+    _permutation_func=staticmethod(_permutation)
+
+class StreamDeinterleaver(_StreamPermuter):
+    _permutation_func=staticmethod(_inverse_permutation)
@@ -0,0 +1,131 @@
+import functools
+import threading
+import time
+
+"""
+Opt-in instrumentation of the modem pipeline
+
+Pipeline functions are wrapped with instrumented(stage) so that, once
+enable() is called, each call adds its wall time and the amount of data
+it produced (bytes, bits, symbols, samples) to the totals of its stage
+Stages nest, so the time of a stage includes the stages it calls
+While disabled, wrapped functions only pay for one flag check
+
+Totals are read with snapshot() or pushed to callbacks registered with
+add_callback, which are called as callback(stage, seconds, counts)
+after every recorded call
+"""
+
+_enabled=False
+_lock=threading.Lock()
+_stages=dict()
+_counters=dict()
+_callbacks=list()
+
+def enable():
+    global _enabled
+    _enabled=True
+
+def disable():
+    global _enabled
+    _enabled=False
+
+def is_enabled():
+    return _enabled
+
+def reset():
+    with _lock:
+        _stages.clear()
+        _counters.clear()
+
+def add_callback(callback):
+    with _lock:
+        _callbacks.append(callback)
+
+def remove_callback(callback):
+    with _lock:
+        _callbacks.remove(callback)
+
+# Adds one call of a stage to the totals
+def record(stage, seconds, **counts):
+    if not _enabled:
+        return
+    with _lock:
+        stage_totals=_stages.setdefault(stage,{"calls":0,"seconds":0.0})
+        stage_totals["calls"]+=1
+        stage_totals["seconds"]+=seconds
+        for unit,amount in counts.items():
+            stage_totals[unit]=stage_totals.get(unit,0)+amount
+        callbacks=list(_callbacks)
+    for callback in callbacks:
+        callback(stage,seconds,counts)
+
+# Adds to a named event counter, such as ECC corrections
+def count(name, amount=1):
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name]=_counters.get(name,0)+amount
+
+"""
+Decorator that records the wall time of every call as stage
+counter maps the return value to a dict of counts for the call
+"""
+def instrumented(stage, counter=None):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start=time.perf_counter()
+            result=func(*args, **kwargs)
+            seconds=time.perf_counter()-start
+            counts=counter(result) if counter is not None else dict()
+            record(stage,seconds,**counts)
+            return result
+        return wrapper
+    return decorator
+
+# Counter for functions whose return value has one element per unit
+def count_len(unit):
+    return lambda result: {unit:len(result)}
+
+def _cache_stats(hits, misses):
+    lookups=hits+misses
+    return {"hits":hits,"misses":misses,
+            "hit_rate":hits/lookups if lookups>0 else 0.0}
+
+"""
+Returns a dict with a copy of all totals
+stages maps each stage to its calls, seconds and counts, plus a
+<unit>_per_second throughput for every count
+"""
+def snapshot():
+    # Imported here since the modulators import this module
+    from .modulators.filter_cache import filter_cache
+    from .modulators.modulator_base import Modulator
+
+    with _lock:
+        stages={stage:dict(stage_totals)
+                for stage,stage_totals in _stages.items()}
+        counters=dict(_counters)
+    for stage_totals in stages.values():
+        seconds=stage_totals["seconds"]
+        units=[unit for unit in stage_totals
+               if unit not in ("calls","seconds")]
+        for unit in units:
+            stage_totals[unit+"_per_second"]=(stage_totals[unit]/seconds
+                                              if seconds>0 else 0.0)
+
+    filter_info=filter_cache.info()
+    filter_stats=_cache_stats(filter_info["hits"]+filter_info["disk_hits"],
+                              filter_info["misses"])
+    filter_stats["disk_hits"]=filter_info["disk_hits"]
+    filter_stats["size"]=filter_info["size"]
+    template_stats=_cache_stats(Modulator.template_cache_hits,
+                                Modulator.template_cache_misses)
+    template_stats["size"]=len(Modulator._template_cache)
+    return {"enabled":_enabled,
+            "stages":stages,
+            "counters":counters,
+            "caches":{"filter":filter_stats,"template":template_stats}}
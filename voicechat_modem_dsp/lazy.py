@@ -0,0 +1,58 @@
+from collections.abc import Mapping
+
+import functools
+import importlib
+import threading
+
+"""
+Helpers that defer expensive imports until they are needed
+
+SciPy takes hundreds of milliseconds to import, so modules that only need
+it to design or apply filters call scipy_signal() when they do so instead
+of importing it at module level
+"""
+
+def scipy_signal():
+    # Repeated imports only cost a sys.modules lookup
+    from scipy import signal
+    return signal
+
+"""
+Read-only mapping whose values are imported on first access
+
+references maps each key to a "module:attribute" string, or to a
+("module:attribute", kwargs) pair that resolves to the attribute with
+kwargs bound by functools.partial
+Resolved values are cached, so each module is imported at most once
+"""
+class LazyRegistry(Mapping):
+    def __init__(self, references):
+        self._references=dict(references)
+        self._resolved=dict()
+        self._lock=threading.Lock()
+
+    def _resolve(self, reference):
+        kwargs=None
+        if not isinstance(reference,str):
+            reference,kwargs=reference
+        module_name,attribute=reference.split(":")
+        value=getattr(importlib.import_module(module_name),attribute)
+        if kwargs is not None:
+            value=functools.partial(value,**kwargs)
+        return value
+
+    def __getitem__(self, key):
+        with self._lock:
+            if key not in self._resolved:
+                self._resolved[key]=self._resolve(self._references[key])
+            return self._resolved[key]
+
+    def __iter__(self):
+        return iter(self._references)
+
+    def __len__(self):
+        return len(self._references)
+
+    # Returns whether the value of key has already been imported
+    def is_resolved(self, key):
+        return key in self._resolved
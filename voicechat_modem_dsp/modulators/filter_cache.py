@@ -0,0 +1,119 @@
+from collections import OrderedDict
+
+import hashlib
+import os
+import threading
+
+import numpy as np
+
+"""
+Bounded LRU cache for designed filters and windows
+
+Keys are tuples of the name of the design function, its design version
+and its parameters, so changing a design only requires bumping its version
+If cache_dir is set, arrays are also stored there as .npz files so that
+new processes can skip designing filters that were designed before
+Disk files record format_version and the full key, and are ignored unless
+both match and the array has the dtype and number of dimensions expected
+by the caller
+Cached arrays are read-only because they are shared between callers
+"""
+class FilterCache(object):
+    # Bump when the layout of disk files changes
+    format_version=2
+
+    def __init__(self, max_entries=64, cache_dir=None):
+        self.max_entries=max_entries
+        self.cache_dir=cache_dir
+        self._entries=OrderedDict()
+        self._lock=threading.Lock()
+        self.hits=0
+        self.disk_hits=0
+        self.misses=0
+
+    def _disk_key(self, key):
+        return repr((self.format_version,key))
+
+    def _disk_path(self, key):
+        key_hash=hashlib.sha1(self._disk_key(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir,key_hash+".npz")
+
+    def _load_disk(self, key, dtype, ndim):
+        if self.cache_dir is None:
+            return None
+        try:
+            with np.load(self._disk_path(key)) as disk_file:
+                if str(disk_file["key"])!=self._disk_key(key):
+                    return None
+                value=disk_file["value"]
+        except (IOError, OSError, ValueError, KeyError):
+            return None
+        if dtype is not None and value.dtype!=np.dtype(dtype):
+            return None
+        if ndim is not None and value.ndim!=ndim:
+            return None
+        return value
+
+    def _save_disk(self, key, value):
+        if self.cache_dir is None:
+            return
+        path=self._disk_path(key)
+        # Write to a temporary file first so readers never see partial files
+        temp_path=path+".tmp"+str(os.getpid())
+        try:
+            if not os.path.isdir(self.cache_dir):
+                os.makedirs(self.cache_dir)
+            with open(temp_path,"wb") as temp_file:
+                np.savez(temp_file,value=value,
+                         key=np.array(self._disk_key(key)))
+            os.replace(temp_path,path)
+        except (IOError, OSError):
+            # Disk cache is only an optimization so ignore failures
+            pass
+
+    """
+    Returns the cached array for key, computing it with compute_func
+    if needed
+    dtype and ndim, if given, are checked on arrays loaded from disk
+    """
+    def get(self, key, compute_func, dtype=None, ndim=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits+=1
+                return self._entries[key]
+        value=self._load_disk(key,dtype,ndim)
+        if value is not None:
+            with self._lock:
+                self.disk_hits+=1
+        else:
+            value=np.asarray(compute_func())
+            with self._lock:
+                self.misses+=1
+            self._save_disk(key,value)
+        value.flags.writeable=False
+        with self._lock:
+            self._entries[key]=value
+            self._entries.move_to_end(key)
+            while len(self._entries)>self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits=0
+            self.disk_hits=0
+            self.misses=0
+
+    def info(self):
+        with self._lock:
+            return {"hits":self.hits,
+                    "disk_hits":self.disk_hits,
+                    "misses":self.misses,
+                    "size":len(self._entries),
+                    "max_entries":self.max_entries}
+
+# Shared cache used by the filter design helpers in modulator_utils
+filter_cache=FilterCache(
+    cache_dir=os.environ.get("VOICECHAT_MODEM_FILTER_CACHE_DIR"))
@@ -1,12 +1,101 @@
+from collections import OrderedDict
+
+import threading
+
 import numpy as np
 
+"""
+Precomputed data shared by every modulator with the same configuration
+
+Arrays that depend on stream length are grown geometrically on demand
+Grown arrays replace the old ones instead of being modified in place
+so slices handed out earlier stay valid and read-only
+"""
+class ModulatorTemplate(object):
+    def __init__(self, dt, samples_per_symbol):
+        self.dt=dt
+        self.samples_per_symbol=samples_per_symbol
+        self._lock=threading.Lock()
+        self._symbol_boundaries=np.zeros(1,dtype=np.int64)
+        self._time_array=np.zeros(0)
+
+    @staticmethod
+    def _readonly(array):
+        array.flags.writeable=False
+        return array
+
+    """
+    Returns sample indexes where each symbol starts
+    Symbol i spans samples [boundaries[i], boundaries[i+1])
+    Rounding keeps long streams aligned to the baud rate
+    even when samples_per_symbol is not an integer
+    """
+    def symbol_boundaries(self, symbol_count):
+        boundaries=self._symbol_boundaries
+        if len(boundaries)<=symbol_count:
+            with self._lock:
+                boundaries=self._symbol_boundaries
+                if len(boundaries)<=symbol_count:
+                    cache_len=max(symbol_count+1,2*len(boundaries))
+                    boundaries=np.round(np.arange(cache_len)*
+                        self.samples_per_symbol).astype(np.int64)
+                    self._symbol_boundaries=self._readonly(boundaries)
+        return boundaries[:symbol_count+1]
+
+    def time_array(self, sample_count):
+        time_array=self._time_array
+        if len(time_array)<sample_count:
+            with self._lock:
+                time_array=self._time_array
+                if len(time_array)<sample_count:
+                    cache_len=max(sample_count,2*len(time_array))
+                    time_array=np.arange(cache_len)*self.dt
+                    self._time_array=self._readonly(time_array)
+        return time_array[:sample_count]
+
 """
 Base class for other modulator objects
 """
 class Modulator(object):
+    # Least recently used templates are dropped beyond this many entries
+    template_cache_max_entries=32
+    _template_cache=OrderedDict()
+    _template_cache_lock=threading.Lock()
+    template_cache_hits=0
+    template_cache_misses=0
+
     @staticmethod
     def generate_timearray(dt, sample_count):
-        return np.arange(0,dt*sample_count,dt)
+        # Multiply instead of using a float step to get exactly sample_count
+        return np.arange(sample_count)*dt
+
+    """
+    Returns the template for a configuration key, building it if needed
+    Modulators with equal keys share a single template
+    The cache is a bounded LRU like FilterCache, so a long running process
+    that sees many configurations only keeps the recently used templates
+    Modulators keep their own reference, so eviction never affects them
+    """
+    @classmethod
+    def get_template(cls, key, build_func):
+        cache=Modulator._template_cache
+        with Modulator._template_cache_lock:
+            if key not in cache:
+                Modulator.template_cache_misses+=1
+                cache[key]=build_func()
+            else:
+                Modulator.template_cache_hits+=1
+            cache.move_to_end(key)
+            template=cache[key]
+            while len(cache)>Modulator.template_cache_max_entries:
+                cache.popitem(last=False)
+            return template
+
+    @classmethod
+    def clear_template_cache(cls):
+        with Modulator._template_cache_lock:
+            Modulator._template_cache.clear()
+
     def modulate(self, data):
         raise NotImplementedError
     def demodulate(self, time_array, datastream):
@@ -1,23 +1,236 @@
-from .modulator_base import Modulator
+from .modulator_base import Modulator, ModulatorTemplate
+from .modulator_utils import lowpass_fir_filter, apply_fir_filter
+from ..instrumentation import instrumented, count_len
+
+import math
+
+import numpy as np
+
+"""
+Read-only tables shared by every FSKModulator with the same configuration
+
+Each symbol is synthesized as sin(start_phase+ramp) which is expanded to
+sin(start_phase)*cos(ramp)+cos(start_phase)*sin(ramp)
+so modulation only needs one sin and cos per symbol plus gathers from the
+precomputed ramp tables
+"""
+class FSKTemplate(ModulatorTemplate):
+    def __init__(self, dt, freq_map, baud):
+        super(FSKTemplate,self).__init__(dt,(1/baud)/dt)
+
+        # Tone table of per-sample phase increments indexed by symbol
+        # Unused symbols are NaN so they can be detected
+        phase_increment_table=np.full(int(max(freq_map))+1,np.nan)
+        for symbol,freq in freq_map.items():
+            phase_increment_table[int(symbol)]=2*np.pi*freq*dt
+        self.phase_increment_table=self._readonly(phase_increment_table)
+
+        # Tones in the order used for demodulation magnitudes
+        self.tone_symbols=self._readonly(
+            np.array(sorted(freq_map),dtype=np.intp))
+        self.tone_increments=self._readonly(
+            phase_increment_table[self.tone_symbols])
+
+        # Rows are indexed by symbol and hold enough samples for
+        # the longest symbol, unused symbols are left at 0
+        self.max_symbol_len=int(math.ceil(self.samples_per_symbol))
+        ramp=np.outer(np.nan_to_num(phase_increment_table),
+                      np.arange(self.max_symbol_len))
+        self.cos_ramps=self._readonly(np.cos(ramp))
+        self.sin_ramps=self._readonly(np.sin(ramp))
+
+        self._mixer_cos=np.zeros((len(self.tone_symbols),0))
+        self._mixer_sin=np.zeros((len(self.tone_symbols),0))
+
+    # Cos and sin tables of every tone, grown as needed and sliced per chunk
+    def mixer_tables(self, sample_count):
+        mixer_cos,mixer_sin=self._mixer_cos,self._mixer_sin
+        if mixer_cos.shape[1]<sample_count:
+            with self._lock:
+                mixer_cos,mixer_sin=self._mixer_cos,self._mixer_sin
+                if mixer_cos.shape[1]<sample_count:
+                    phase=np.outer(self.tone_increments,
+                                   np.arange(sample_count))
+                    mixer_cos=self._readonly(np.cos(phase))
+                    mixer_sin=self._readonly(np.sin(phase))
+                    self._mixer_cos,self._mixer_sin=mixer_cos,mixer_sin
+        return mixer_cos[:,:sample_count],mixer_sin[:,:sample_count]
 
 class FSKModulator(Modulator):
     def __init__(self, dt, freq_map, baud):
-        if baud>=0.5*max(freq_map.values):
+        if baud>=0.5*max(freq_map.values()):
             raise ValueError("Baud is too high to be modulated "+
                              "using given frequencies")
+        if max(freq_map.values())>=0.5/dt:
+            raise ValueError("Frequencies must be below the "+
+                             "Nyquist frequency")
+        if baud*dt>1:
+            raise ValueError("Baud is too high for the sampling rate")
+        for symbol in freq_map:
+            if int(symbol)!=symbol or symbol<0:
+                raise ValueError("Symbols must be nonnegative integers")
         self.dt=dt
-        self.freq_list=freq_list
+        self.freq_map=dict(freq_map)
         self.baud=baud
 
+        template_key=(FSKModulator,float(dt),
+                      tuple(sorted(self.freq_map.items())),float(baud))
+        self.template=self.get_template(template_key,
+            lambda: FSKTemplate(self.dt,self.freq_map,self.baud))
+        self._phase_increment_table=self.template.phase_increment_table
+        self.tone_symbols=self.template.tone_symbols
+        self._receive_filter=None
+
     @property
     def samples_per_symbol(self):
         return (1/self.baud)/self.dt
-    
-    def modulate(self, data):
-        timesamples_needed=len(data)*self.samples_per_symbol
-        time_array=Modulator.generate_time_array(self.dt,timesamples_needed)
-        current_sin_timestamp=0
+
+    def symbol_boundaries(self, symbol_count):
+        return self.template.symbol_boundaries(symbol_count)
+
+    def time_array(self, sample_count):
+        return self.template.time_array(sample_count)
+
+    def _validate_symbols(self, data):
+        symbols=np.asarray(data)
+        if symbols.size==0:
+            return symbols.astype(np.intp)
+        if (symbols.ndim!=1 or not np.all(np.mod(symbols,1)==0)
+                or np.any(symbols<0)
+                or np.any(symbols>=len(self._phase_increment_table))):
+            raise ValueError("Illegal symbol detected in datastream")
+        symbols=symbols.astype(np.intp)
+        if np.any(np.isnan(self._phase_increment_table[symbols])):
+            raise ValueError("Illegal symbol detected in datastream")
+        return symbols
+
+    """
+    Modulates the symbols in data into a phase-continuous FSK signal
+    The starting phase of every symbol is accumulated over the whole stream
+    with a cumulative sum and the samples are gathered from the template
+    Symbols are synthesized in chunks of about chunk_samples samples
+    written straight into the output, so temporaries stay bounded
+    """
+    @instrumented("modulate",count_len("samples"))
+    def modulate(self, data, dtype=np.float64, chunk_samples=1<<16):
+        template=self.template
+        symbols=self._validate_symbols(data)
+        boundaries=self.symbol_boundaries(len(symbols))
+        sample_counts=np.diff(boundaries)
         # Incremental addition is a form of integration
         # Frequency in the end is the derivative of phase
+        phase_advances=self._phase_increment_table[symbols]*sample_counts
+        start_phases=np.cumsum(phase_advances)
+        start_phases-=phase_advances
+        np.mod(start_phases,2*np.pi,out=start_phases)
+
+        signal=np.empty(int(boundaries[-1]),dtype=dtype)
+        symbols_per_chunk=max(1,chunk_samples//template.max_symbol_len)
+        for chunk_start in range(0,len(symbols),symbols_per_chunk):
+            chunk_end=min(chunk_start+symbols_per_chunk,len(symbols))
+            chunk_symbols=symbols[chunk_start:chunk_end]
+            chunk_phases=start_phases[chunk_start:chunk_end,np.newaxis]
+            chunk=template.cos_ramps[chunk_symbols]
+            chunk*=np.sin(chunk_phases)
+            chunk+=np.cos(chunk_phases)*template.sin_ramps[chunk_symbols]
+            chunk_counts=sample_counts[chunk_start:chunk_end]
+            if np.all(chunk_counts==template.max_symbol_len):
+                chunk=chunk.ravel()
+            else:
+                # Drop the unused tail of shorter symbols
+                sample_mask=(np.arange(template.max_symbol_len)<
+                             chunk_counts[:,np.newaxis])
+                chunk=chunk[sample_mask]
+            signal[boundaries[chunk_start]:boundaries[chunk_end]]=chunk
+        return signal
+
+    """
+    Lowpass filter that removes noise above the highest tone
+    Returns None when the passband already extends to Nyquist
+    """
+    @property
+    def receive_filter(self):
+        if self._receive_filter is None:
+            cutoff_low=max(self.freq_map.values())+self.baud
+            cutoff_high=cutoff_low+self.baud
+            if cutoff_high>=0.5/self.dt:
+                return None
+            self._receive_filter=lowpass_fir_filter(self.dt,
+                                                    cutoff_low,cutoff_high)
+        return self._receive_filter
+
+    """
+    Estimates the amplitude of every tone in each symbol window
+    samples may have leading channel axes with time along the last axis
+    Windows are summed with np.add.reduceat so every window of every channel
+    is handled in one batched operation per chunk of symbols
+    Magnitudes are independent of the phase of each tone so mixer tables
+    can be reused for every chunk
+    If fir_filter is given each chunk is filtered together with enough
+    neighbouring samples to match filtering the whole signal at once
+    Returns magnitudes with shape (channels..., symbols, tones)
+    """
+    @instrumented("demodulate",
+        lambda magnitudes: {"symbols":magnitudes.size//magnitudes.shape[-1]})
+    def tone_magnitudes(self, samples, boundaries, chunk_samples=1<<16,
+                        fir_filter=None):
+        samples=np.asarray(samples)
+        sample_count=samples.shape[-1]
+        margin=0 if fir_filter is None else len(fir_filter)
+        channel_shape=samples.shape[:-1]
+        symbol_count=len(boundaries)-1
+        magnitudes=np.empty(channel_shape+(symbol_count,
+                                           len(self.tone_symbols)))
+        # Keep the mixed chunk size bounded regardless of channel count
+        chunk_samples=max(1,chunk_samples//max(1,int(np.prod(channel_shape))))
+        symbols_per_chunk=max(1,int(chunk_samples//self.samples_per_symbol))
+        for chunk_start in range(0,symbol_count,symbols_per_chunk):
+            chunk_end=min(chunk_start+symbols_per_chunk,symbol_count)
+            sample_start=boundaries[chunk_start]
+            sample_end=boundaries[chunk_end]
+            if fir_filter is None:
+                chunk=samples[...,sample_start:sample_end]
+            else:
+                padded_start=max(0,sample_start-margin)
+                padded_end=min(sample_count,sample_end+margin)
+                chunk=apply_fir_filter(fir_filter,
+                                       samples[...,padded_start:padded_end])
+                chunk=chunk[...,sample_start-padded_start:
+                            sample_end-padded_start]
+            chunk=chunk[...,np.newaxis,:]
+            mixer_cos,mixer_sin=self.template.mixer_tables(chunk.shape[-1])
+            window_starts=boundaries[chunk_start:chunk_end]-sample_start
+            in_phase=np.add.reduceat(mixer_cos*chunk,window_starts,axis=-1)
+            quadrature=np.add.reduceat(mixer_sin*chunk,window_starts,axis=-1)
+            window_lens=np.diff(boundaries[chunk_start:chunk_end+1])
+            # Scale so that a unit amplitude tone has magnitude 1
+            chunk_magnitudes=2*np.hypot(in_phase,quadrature)/window_lens
+            magnitudes[...,chunk_start:chunk_end,:]=\
+                np.swapaxes(chunk_magnitudes,-1,-2)
+        return magnitudes
+
+    """
+    Demodulates an FSK signal sampled at the times in time_array
+    datastream may be 2-D with one row per channel sharing this
+    configuration, in which case all channels are processed together
+    Returns (symbols, magnitudes) where magnitudes has one row per symbol
+    and one column per tone, ordered as in tone_symbols
+    Trailing samples that do not form a complete symbol are ignored
+    """
     def demodulate(self, time_array, datastream):
-        raise NotImplementedError
\ No newline at end of file
+        samples=np.asarray(datastream,dtype=np.float64)
+        if samples.ndim==0:
+            raise ValueError("Datastream must have a time axis")
+        sample_count=samples.shape[-1]
+        if len(time_array)!=sample_count:
+            raise ValueError("Time array and datastream lengths differ")
+        symbol_estimate=int(sample_count/self.samples_per_symbol)+1
+        boundaries=self.symbol_boundaries(symbol_estimate)
+        symbol_count=np.searchsorted(boundaries,sample_count,
+                                     side="right")-1
+        boundaries=boundaries[:symbol_count+1]
+        # Filtering per chunk avoids a filtered copy of the whole signal
+        magnitudes=self.tone_magnitudes(samples,boundaries,
+                                        fir_filter=self.receive_filter)
+        symbols=self.tone_symbols[np.argmax(magnitudes,axis=-1)]
+        return symbols,magnitudes
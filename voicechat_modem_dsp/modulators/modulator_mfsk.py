@@ -0,0 +1,175 @@
+from .modulator_base import Modulator, ModulatorTemplate
+from ..encoders.encode_pad import encode_function_mappings
+from ..instrumentation import instrumented, count_len
+
+import numpy as np
+
+"""
+Read-only tables shared by every MFSKModulator with the same configuration
+
+Every tone sits on an FFT bin of the symbol window, so tones complete a
+whole number of cycles per symbol and are orthogonal over each window
+bin_table[c,s] is the bin that carrier c uses to send symbol s
+Carriers get fixed Newman phase offsets to keep the peak amplitude of the
+summed carriers low
+"""
+class MFSKTemplate(ModulatorTemplate):
+    def __init__(self, dt, samples_per_symbol, radix, carrier_count,
+                 first_bin, bin_spacing):
+        super(MFSKTemplate,self).__init__(dt,samples_per_symbol)
+        self.window_len=int(samples_per_symbol)
+        self.radix=radix
+        self.carrier_count=carrier_count
+        self.tone_symbols=self._readonly(np.arange(radix))
+        tone_indexes=np.arange(carrier_count*radix).reshape(carrier_count,
+                                                            radix)
+        self.bin_table=self._readonly(first_bin+bin_spacing*tone_indexes)
+
+        # irfft of coefficient c*N/2 at bin k is the tone c*exp(j2pikn/N)
+        # Each carrier has amplitude 1/carrier_count and starts as a sine
+        carriers=np.arange(carrier_count)
+        newman_phases=np.pi*carriers**2/carrier_count
+        self.carrier_coefficients=self._readonly(
+            (self.window_len/2)/carrier_count*-1j*np.exp(1j*newman_phases))
+
+"""
+Sends carrier_count symbols at once, each on its own group of radix
+tones, in every symbol period
+Symbols are the same radix symbols used by encode_function_mappings, and
+consecutive groups of carrier_count symbols share one symbol period
+Tones are spaced bin_spacing FFT bins apart, starting at the first bin
+at or above low_freq, where bins are baud Hz apart
+Baud must divide the sampling rate so every window is a whole number
+of samples
+"""
+class MFSKModulator(Modulator):
+    def __init__(self, dt, baud, radix, carrier_count, low_freq=600,
+                 bin_spacing=1):
+        if radix not in encode_function_mappings:
+            raise ValueError("Radix must be one of the encoder radixes")
+        if carrier_count<1 or int(carrier_count)!=carrier_count:
+            raise ValueError("Carrier count must be a positive integer")
+        if bin_spacing<1 or int(bin_spacing)!=bin_spacing:
+            raise ValueError("Bin spacing must be a positive integer")
+        samples_per_symbol=1/(baud*dt)
+        window_len=int(round(samples_per_symbol))
+        if window_len<2 or abs(samples_per_symbol-window_len)>1e-6:
+            raise ValueError("Baud must divide the sampling rate")
+        first_bin=max(1,int(np.ceil(low_freq/baud-1e-9)))
+        last_bin=first_bin+bin_spacing*(carrier_count*radix-1)
+        if 2*last_bin>=window_len:
+            raise ValueError("Frequencies must be below the "+
+                             "Nyquist frequency")
+        self.dt=dt
+        self.baud=baud
+        self.radix=int(radix)
+        self.carrier_count=int(carrier_count)
+
+        template_key=(MFSKModulator,float(dt),float(baud),self.radix,
+                      self.carrier_count,first_bin,int(bin_spacing))
+        self.template=self.get_template(template_key,
+            lambda: MFSKTemplate(dt,window_len,self.radix,
+                self.carrier_count,first_bin,int(bin_spacing)))
+        self.window_len=window_len
+        self.tone_symbols=self.template.tone_symbols
+        # freq_map[s] holds the frequency of symbol s on every carrier
+        frequencies=self.template.bin_table*baud
+        self.freq_map={symbol:tuple(frequencies[:,symbol].tolist())
+                       for symbol in range(self.radix)}
+
+    @property
+    def samples_per_symbol(self):
+        return self.window_len
+
+    @property
+    def bits_per_period(self):
+        return self.carrier_count*int(np.log2(self.radix))
+
+    """
+    Returns sample indexes where each symbol period starts, for the
+    periods needed to send symbol_count symbols
+    The last entry is the length of modulate() output for that many symbols
+    """
+    def symbol_boundaries(self, symbol_count):
+        return self.template.symbol_boundaries(self.period_count(symbol_count))
+
+    def time_array(self, sample_count):
+        return self.template.time_array(sample_count)
+
+    # Number of symbol periods needed to send symbol_count symbols
+    def period_count(self, symbol_count):
+        return -(-symbol_count//self.carrier_count)
+
+    def _validate_symbols(self, data):
+        symbols=np.asarray(data)
+        if symbols.size==0:
+            return symbols.astype(np.intp).reshape(0)
+        if (symbols.ndim!=1 or not np.all(np.mod(symbols,1)==0)
+                or np.any(symbols<0) or np.any(symbols>=self.radix)):
+            raise ValueError("Illegal symbol detected in datastream")
+        return symbols.astype(np.intp)
+
+    """
+    Modulates the symbols in data with every symbol period synthesized by
+    one inverse real FFT, batched over all periods
+    The final period is padded with 0 symbols if data does not fill it
+    """
+    @instrumented("modulate",count_len("samples"))
+    def modulate(self, data, dtype=np.float64):
+        template=self.template
+        symbols=self._validate_symbols(data)
+        period_count=self.period_count(len(symbols))
+        padded=np.zeros(period_count*self.carrier_count,dtype=np.intp)
+        padded[:len(symbols)]=symbols
+        period_symbols=padded.reshape(period_count,self.carrier_count)
+
+        spectrum=np.zeros((period_count,self.window_len//2+1),
+                          dtype=np.complex128)
+        carriers=np.arange(self.carrier_count)
+        # Carriers use disjoint bins so each row gets one tone per carrier
+        spectrum[np.arange(period_count)[:,np.newaxis],
+                 template.bin_table[carriers,period_symbols]]=\
+            template.carrier_coefficients
+        signal=np.fft.irfft(spectrum,n=self.window_len,axis=-1)
+        return signal.ravel().astype(dtype,copy=False)
+
+    """
+    Estimates the amplitude of every tone of every carrier with one real
+    FFT per symbol window, batched over all windows and leading channel axes
+    Returns magnitudes with shape (channels..., periods*carriers, radix)
+    where row p*carrier_count+c holds carrier c of period p
+    A lone transmitted tone has magnitude close to 1
+    """
+    @instrumented("demodulate",
+        lambda magnitudes: {"symbols":magnitudes.size//magnitudes.shape[-1]})
+    def tone_magnitudes(self, samples):
+        samples=np.asarray(samples,dtype=np.float64)
+        channel_shape=samples.shape[:-1]
+        period_count=samples.shape[-1]//self.window_len
+        windows=samples[...,:period_count*self.window_len].reshape(
+            channel_shape+(period_count,self.window_len))
+        spectrum=np.fft.rfft(windows,axis=-1)
+        # Undo the irfft scaling and the 1/carrier_count amplitude
+        magnitudes=(np.abs(spectrum[...,self.template.bin_table])*
+                    2*self.carrier_count/self.window_len)
+        return magnitudes.reshape(channel_shape+
+            (period_count*self.carrier_count,self.radix))
+
+    """
+    Demodulates an MFSK signal sampled at the times in time_array
+    datastream may have leading channel axes
+    Returns (symbols, magnitudes) like FSKModulator.demodulate
+    If symbol_count is given, padding symbols of the final period are dropped
+    Trailing samples that do not form a complete window are ignored
+    """
+    def demodulate(self, time_array, datastream, symbol_count=None):
+        samples=np.asarray(datastream,dtype=np.float64)
+        if samples.ndim==0:
+            raise ValueError("Datastream must have a time axis")
+        if len(time_array)!=samples.shape[-1]:
+            raise ValueError("Time array and datastream lengths differ")
+        magnitudes=self.tone_magnitudes(samples)
+        if symbol_count is not None:
+            magnitudes=magnitudes[...,:symbol_count,:]
+        symbols=self.tone_symbols[np.argmax(magnitudes,axis=-1)]
+        return symbols,magnitudes
@@ -1,15 +1,28 @@
+from .filter_cache import filter_cache
+from ..lazy import scipy_signal
+
+import warnings
+
 import numpy as np
-from scipy import signal
+
+# Part of the filter_cache keys, so bump them when a design changes
+gaussian_design_version=1
+lowpass_design_version=3
 
 """
 Computes a gaussian smoothing filter given time dt and sigma
+Results are memoized in filter_cache
 """
 def compute_gaussian_window(dt, sigma_dt):
-    sigma=sigma_dt/dt
-    sample_count=np.ceil(6*sigma+1)
-    if sample_count%2==0:
-        sample_count+=1
-    return signal.windows.gaussian(sample_count, sigma)
+    def compute_window():
+        sigma=sigma_dt/dt
+        sample_count=int(np.ceil(6*sigma+1))
+        if sample_count%2==0:
+            sample_count+=1
+        return scipy_signal().windows.gaussian(sample_count, sigma)
+    cache_key=("compute_gaussian_window",gaussian_design_version,float(dt),
+               float(sigma_dt))
+    return filter_cache.get(cache_key,compute_window,np.float64,1)
 
 
 """
@@ -26,24 +39,208 @@ def fred_harris_fir_tap_count(fs, transition_width, db_attenuation):
         filter_tap_count+=1
     return filter_tap_count
 
+# Longest filters designed with the Remez Exchange Algorithm
+# Remez designs grow quadratically in cost and stop converging to the
+# specification for very long filters, so longer ones use a Kaiser window
+max_minimized_taps=4095
+
+# Upper bound on the FFT length used to check a design
+max_check_fft_len=1<<21
+
+"""
+Checks that a lowpass filter has at most passband_ripple deviation in the
+passband and at least attenuation dB of attenuation in the stopband
+"""
+def _meets_lowpass_spec(lowpass_filt, dt, cutoff_low, cutoff_high,
+                        attenuation, passband_ripple):
+    stopband_ripple=10**(-attenuation/20)
+    # Zero-padded FFT samples the response at least 8 times per 1/tap_count
+    fft_len=min(max(1024,1<<int(np.ceil(np.log2(8*len(lowpass_filt))))),
+                max_check_fft_len)
+    response=np.abs(np.fft.rfft(lowpass_filt,fft_len))
+    frequencies=np.fft.rfftfreq(fft_len,dt)
+    passband=response[frequencies<=cutoff_low]
+    stopband=response[frequencies>=cutoff_high]
+    return (np.max(np.abs(passband-1))<=passband_ripple and
+            np.max(np.abs(stopband))<=stopband_ripple)
+
+"""
+Designs a lowpass filter with tap_count taps using the Remez Exchange
+Algorithm, weighted so both bands have the ripple of the specification
+Returns None if the design fails or, when checked, misses the specification
+"""
+def _design_lowpass(tap_count, dt, cutoff_low, cutoff_high, attenuation,
+                    passband_ripple, check=True):
+    stopband_ripple=10**(-attenuation/20)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            # Weights trade passband ripple for stopband attenuation
+            lowpass_filt=scipy_signal().remez(tap_count,
+                [0,cutoff_low,cutoff_high,0.5/dt],[1,0],
+                weight=[1,passband_ripple/stopband_ripple],fs=1/dt)
+    except (ValueError, RuntimeError):
+        return None
+    lowpass_filt=linearize_fir(lowpass_filt)
+    if check and not _meets_lowpass_spec(lowpass_filt,dt,cutoff_low,
+            cutoff_high,attenuation,passband_ripple):
+        return None
+    return lowpass_filt
+
+"""
+Designs a lowpass filter with a Kaiser window, which reliably reaches the
+specification at any length
+The window is designed for slightly more attenuation until the checked
+response meets the specification
+Returns None if no design within 10 dB of extra attenuation meets it
+"""
+def _design_kaiser_lowpass(dt, cutoff_low, cutoff_high, attenuation,
+                           passband_ripple):
+    signal=scipy_signal()
+    for extra_attenuation in range(0,11):
+        tap_count,beta=signal.kaiserord(attenuation+extra_attenuation,
+                                        (cutoff_high-cutoff_low)*2*dt)
+        tap_count|=1
+        lowpass_filt=linearize_fir(signal.firwin(tap_count,
+            0.5*(cutoff_low+cutoff_high),window=("kaiser",beta),fs=1/dt))
+        if _meets_lowpass_spec(lowpass_filt,dt,cutoff_low,cutoff_high,
+                               attenuation,passband_ripple):
+            return lowpass_filt
+    return None
+
 """
 Computes lowpass FIR filter given cutoffs
 Uses the SciPy implementation of the Remez Exchange Algorithm
+If minimize_taps is set, the tap count is the smallest odd count found by
+bisection that meets the specification, starting from the
+fred_harris_fir_tap_count estimate, which otherwise sets the tap count
+Estimates above max_minimized_taps use a Kaiser window design instead
+Every design is checked, and a filter that misses the specification
+raises a warning
+Results are memoized in filter_cache
 """
-def lowpass_fir_filter(dt,cutoff_low,cutoff_high,attenuation=80):
-    tap_count=fred_harris_fir_tap_count(1/dt,cutoff_high-cutoff_low,attenuation)
-    lowpass_filt=signal.remez(tap_count,
-            [0,cutoff_low,cutoff_high,0.5/dt],[1,0],fs=1/dt)
-    # TODO: remove zeros?
-    return lowpass_filt
+def lowpass_fir_filter(dt,cutoff_low,cutoff_high,attenuation=80,
+                       passband_ripple=0.01,minimize_taps=True):
+    def design(tap_count, check=True):
+        return _design_lowpass(tap_count,dt,cutoff_low,cutoff_high,
+                               attenuation,passband_ripple,check)
+
+    def compute_filter():
+        tap_count=fred_harris_fir_tap_count(1/dt,cutoff_high-cutoff_low,
+                                            attenuation)
+        if tap_count>max_minimized_taps:
+            lowpass_filt=_design_kaiser_lowpass(dt,cutoff_low,cutoff_high,
+                                                attenuation,passband_ripple)
+            if lowpass_filt is None:
+                raise ValueError("Filter specification cannot be met")
+            return lowpass_filt
+        if not minimize_taps:
+            lowpass_filt=design(tap_count,check=False)
+            if lowpass_filt is None:
+                raise ValueError("Filter specification cannot be met")
+            if not _meets_lowpass_spec(lowpass_filt,dt,cutoff_low,
+                    cutoff_high,attenuation,passband_ripple):
+                warnings.warn("Lowpass filter with "+str(tap_count)+
+                              " taps misses the specification")
+            return lowpass_filt
+        # Grow the estimate until it meets the specification
+        best_filter=design(tap_count)
+        upper=tap_count
+        while best_filter is None:
+            if upper>16*tap_count:
+                raise ValueError("Filter specification cannot be met")
+            upper+=max(2,2*(upper//4))
+            best_filter=design(upper)
+        # Bisect over odd tap counts, assuming more taps never hurt
+        lower=1
+        while upper-lower>2:
+            middle=lower+2*((upper-lower)//4)
+            middle_filter=design(middle)
+            if middle_filter is None:
+                lower=middle
+            else:
+                upper,best_filter=middle,middle_filter
+        return best_filter
+    cache_key=("lowpass_fir_filter",lowpass_design_version,float(dt),
+               float(cutoff_low),float(cutoff_high),float(attenuation),
+               float(passband_ripple),bool(minimize_taps))
+    return filter_cache.get(cache_key,compute_filter,np.float64,1)
+
+"""
+Chooses how apply_fir_filter filters data
+Short filters and signals are cheapest to convolve directly, while long
+ones are cheaper with FFT convolution
+"""
+def choose_fir_method(fir_filter, data):
+    data=np.asarray(data)
+    fir_filter=np.reshape(fir_filter,(1,)*(data.ndim-1)+(-1,))
+    if data.shape[-1]==0:
+        return "direct"
+    return scipy_signal().choose_conv_method(data,fir_filter,mode="same")
+
+"""
+Applies a FIR filter along the last axis of data, so every row of a 2-D
+array is filtered at once
+method is "direct", "fft" (overlap-add) or "auto", which uses
+choose_fir_method
+Output is aligned with the input for odd-length linear-phase filters
+"""
+def apply_fir_filter(fir_filter, data, method="auto"):
+    signal=scipy_signal()
+    data=np.asarray(data)
+    fir_filter=np.asarray(fir_filter)
+    if method=="auto":
+        method=choose_fir_method(fir_filter,data)
+    # Broadcast the filter across all other axes of data
+    broadcast_filter=np.reshape(fir_filter,(1,)*(data.ndim-1)+(-1,))
+    if method=="direct":
+        filtered=signal.convolve(data,broadcast_filter,mode="same",
+                                 method="direct")
+    elif method=="fft":
+        # oaconvolve is only available in newer SciPy versions
+        convolve=getattr(signal,"oaconvolve",signal.fftconvolve)
+        filtered=convolve(data,broadcast_filter,mode="same",axes=-1)
+    else:
+        raise ValueError("Unknown FIR filter method")
+    return filtered
+
+"""
+Applies a FIR filter to a stream of blocks with the same output as
+scipy.signal.lfilter with carried state
+The last len(fir_filter)-1 input samples are kept between blocks and the
+convolution method is chosen once for every block length
+"""
+class StreamingFIRFilter(object):
+    def __init__(self, fir_filter):
+        self.fir_filter=np.asarray(fir_filter)
+        self._history=np.zeros(len(self.fir_filter)-1)
+        self._methods=dict()
+
+    def process(self, block):
+        signal=scipy_signal()
+        extended=np.concatenate((self._history,
+                                 np.asarray(block,dtype=np.float64)))
+        self._history=extended[len(extended)-len(self._history):].copy()
+        if len(extended)<len(self.fir_filter):
+            return np.zeros(0)
+        method=self._methods.get(len(extended))
+        if method is None:
+            method=signal.choose_conv_method(extended,self.fir_filter,
+                                             mode="valid")
+            self._methods[len(extended)]=method
+        if method=="direct":
+            return np.convolve(extended,self.fir_filter,mode="valid")
+        convolve=getattr(signal,"oaconvolve",signal.fftconvolve)
+        return convolve(extended,self.fir_filter,mode="valid")
 
 """
 Helper function that takes symmetric "linear-phase" FIR filter
 and makes it truly linear-phase
 
-Based on the technique described in https://www.cypress.com/file/123191/download
+Designs such as Remez are only symmetric up to rounding, so the filter is
+averaged with its reverse, which keeps the amplitude response and makes
+the phase exactly linear
 """
 def linearize_fir(fir_filter):
-    frequencies,response=signal.freqz(fir_filter)
-    # TODO fill in the rest of this code if this ends up being actually used
-    raise NotImplementedError
\ No newline at end of file
+    fir_filter=np.asarray(fir_filter,dtype=np.float64)
+    return (fir_filter+fir_filter[::-1])/2
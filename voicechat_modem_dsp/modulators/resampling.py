@@ -0,0 +1,116 @@
+from .modulator_utils import lowpass_fir_filter
+from ..lazy import scipy_signal
+
+from fractions import Fraction
+
+import numpy as np
+
+"""
+Rational resampler from input_rate to output_rate
+
+The anti-aliasing filter is designed with lowpass_fir_filter at the
+upsampled rate, passing frequencies up to passband and stopping at
+the lower of the two Nyquist frequencies
+Passband defaults to 80% of that Nyquist frequency
+Rates with a small up/down ratio keep the filter short
+"""
+class Resampler(object):
+    def __init__(self, input_rate, output_rate, passband=None,
+                 attenuation=80):
+        ratio=(Fraction(output_rate)/Fraction(input_rate)).limit_denominator(
+            1000)
+        self.up=ratio.numerator
+        self.down=ratio.denominator
+        self.input_rate=input_rate
+        self.output_rate=output_rate
+        stopband=0.5*min(input_rate,output_rate)
+        if passband is None:
+            passband=0.8*stopband
+        if passband>=stopband:
+            raise ValueError("Passband must be below the output "+
+                             "Nyquist frequency")
+        self.passband=passband
+        self.fir_filter=lowpass_fir_filter(1/(input_rate*self.up),
+                                           passband,stopband,attenuation)
+
+    def output_length(self, input_length):
+        return -(-input_length*self.up//self.down)
+
+    """
+    Resamples a whole signal along its last axis
+    """
+    def resample(self, data):
+        return scipy_signal().resample_poly(data,self.up,self.down,axis=-1,
+                                    window=self.fir_filter)
+
+"""
+Resampler that keeps state between blocks of one continuous signal
+Output matches Resampler.resample on the concatenated blocks
+
+Each output sample is a dot product of one polyphase branch of the filter
+with the most recent inputs, computed for all outputs of a block at once
+"""
+class StreamingResampler(Resampler):
+    def __init__(self, input_rate, output_rate, passband=None,
+                 attenuation=80):
+        super(StreamingResampler,self).__init__(input_rate,output_rate,
+                                                passband,attenuation)
+        filter_len=len(self.fir_filter)
+        self._filter_delay=(filter_len-1)//2
+        self._branch_len=-(-filter_len//self.up)
+        # Row p holds the taps applied to inputs at upsampled phase p
+        padded_filter=np.zeros(self.up*self._branch_len)
+        padded_filter[:filter_len]=self.up*np.asarray(self.fir_filter)
+        self._polyphase=padded_filter.reshape(self._branch_len,self.up).T
+        self._branch_offsets=np.arange(self._branch_len)
+        self.reset()
+
+    def reset(self):
+        # Zeros stand in for the samples before the start of the signal
+        self._history=np.zeros(self._branch_len-1)
+        self._input_count=0
+        self._output_count=0
+
+    def _emit(self, block, output_end=None):
+        buffer=np.concatenate((self._history,block))
+        total_count=self._input_count+len(block)
+        # Output m needs inputs up to (m*down+delay)//up
+        ready_count=(total_count*self.up-1-self._filter_delay)//self.down+1
+        if output_end is not None:
+            ready_count=min(ready_count,output_end)
+        output_positions=(np.arange(self._output_count,max(ready_count,
+            self._output_count))*self.down+self._filter_delay)
+        phases=output_positions%self.up
+        newest_inputs=(output_positions//self.up-self._input_count+
+                       len(self._history))
+        input_indexes=newest_inputs[:,np.newaxis]-self._branch_offsets
+        output=np.einsum("ij,ij->i",self._polyphase[phases],
+                         buffer[input_indexes])
+
+        if len(self._history)>0:
+            self._history=buffer[len(buffer)-len(self._history):].copy()
+        self._input_count=total_count
+        self._output_count+=len(output)
+        return output
+
+    def process(self, block):
+        block=np.asarray(block,dtype=np.float64)
+        if self.up==self.down==1:
+            # Same as resample_poly, which passes the signal through
+            return block.copy()
+        return self._emit(block)
+
+    """
+    Flushes the filter with zeros and returns the remaining outputs
+    The input count used for the output length excludes the zeros
+    """
+    def finalize(self):
+        output_end=self.output_length(self._input_count)
+        if self.up==self.down==1 or output_end<=self._output_count:
+            output=np.zeros(0)
+        else:
+            last_position=(output_end-1)*self.down+self._filter_delay
+            flush_len=max(0,last_position//self.up-self._input_count+1)
+            output=self._emit(np.zeros(flush_len),output_end)
+        self.reset()
+        return output
@@ -0,0 +1,128 @@
+from ..lazy import scipy_signal
+
+import numpy as np
+
+"""
+Finds where a known preamble waveform starts inside received audio
+
+Scores are normalized cross-correlations between the preamble and every
+window of the audio, computed with FFT convolution so the cost does not
+grow with the product of signal and preamble lengths
+Scores lie in [0, 1] and ignore the polarity of the received signal
+Offsets are the sample indexes where a preamble starts
+"""
+class PreambleDetector(object):
+    def __init__(self, preamble, threshold=0.7):
+        preamble=np.asarray(preamble,dtype=np.float64)
+        if preamble.ndim!=1 or len(preamble)==0:
+            raise ValueError("Preamble must be a nonempty 1-D waveform")
+        preamble_norm=np.sqrt(np.sum(preamble**2))
+        if preamble_norm==0:
+            raise ValueError("Preamble must not be silent")
+        self.preamble=preamble
+        self.threshold=threshold
+        # Reversed so convolution computes correlation
+        self._kernel=preamble[::-1]/preamble_norm
+        self._energy_kernel=np.ones(len(preamble))
+
+    @classmethod
+    def from_modulator(cls, modulator, preamble_symbols, threshold=0.7):
+        return cls(modulator.modulate(preamble_symbols),threshold)
+
+    def __len__(self):
+        return len(self.preamble)
+
+    """
+    Returns the score of every full-length window of samples
+    Score i corresponds to a preamble starting at samples[i]
+    """
+    def correlate(self, samples):
+        samples=np.asarray(samples,dtype=np.float64)
+        if len(samples)<len(self.preamble):
+            return np.zeros(0)
+        signal=scipy_signal()
+        convolve=getattr(signal,"oaconvolve",signal.fftconvolve)
+        correlation=convolve(samples,self._kernel,mode="valid")
+        window_energy=convolve(samples**2,self._energy_kernel,mode="valid")
+        # FFT rounding can make the energy of silent windows slightly negative
+        window_norm=np.sqrt(np.maximum(window_energy,0))
+        scores=np.zeros(len(correlation))
+        nonsilent=window_norm>1e-9*np.sqrt(len(self.preamble))
+        scores[nonsilent]=np.abs(correlation[nonsilent])/window_norm[nonsilent]
+        return np.minimum(scores,1)
+
+    def _find_peaks(self, scores):
+        peaks,_=scipy_signal().find_peaks(scores,height=self.threshold,
+                                  distance=len(self.preamble))
+        return peaks
+
+    """
+    Returns (offsets, confidences) of every preamble found in samples
+    Detections closer than one preamble length are merged
+    """
+    def detect(self, samples):
+        scores=self.correlate(samples)
+        peaks=self._find_peaks(scores)
+        return peaks,scores[peaks]
+
+"""
+Preamble detector for audio that arrives in blocks
+
+Overlap-save: the last len(preamble)-1 samples of each block are kept
+so windows spanning block boundaries are scored exactly once
+Scores within one preamble length of the newest score are held back
+until later blocks show they are true peaks
+"""
+class StreamingPreambleDetector(PreambleDetector):
+    def __init__(self, preamble, threshold=0.7):
+        super(StreamingPreambleDetector,self).__init__(preamble,threshold)
+        self.reset()
+
+    def reset(self):
+        self._overlap=np.zeros(0)
+        self._pending_scores=np.zeros(0)
+        # Absolute offset of the first pending score
+        self._pending_offset=0
+        self._last_peak=None
+
+    def _accept_peaks(self, peaks, scores):
+        offsets=peaks+self._pending_offset
+        if self._last_peak is not None:
+            keep=offsets>=self._last_peak+len(self.preamble)
+            peaks,offsets=peaks[keep],offsets[keep]
+        if len(offsets)>0:
+            self._last_peak=offsets[-1]
+        return offsets,scores[peaks]
+
+    """
+    Processes one block and returns (offsets, confidences) of preambles
+    that can no longer be beaten by later samples
+    """
+    def process(self, block):
+        samples=np.concatenate((self._overlap,
+                                np.asarray(block,dtype=np.float64)))
+        overlap_len=min(len(samples),len(self.preamble)-1)
+        self._overlap=samples[len(samples)-overlap_len:].copy()
+        scores=np.concatenate((self._pending_scores,self.correlate(samples)))
+
+        # Peaks need a neighbor on the right to be detected
+        final_len=max(0,len(scores)-len(self.preamble))
+        peaks=self._find_peaks(scores)
+        peaks=peaks[peaks<final_len]
+        offsets,confidences=self._accept_peaks(peaks,scores)
+        # Keep one final score as the left neighbor of the pending scores
+        pending_start=max(0,final_len-1)
+        self._pending_scores=scores[pending_start:].copy()
+        self._pending_offset+=pending_start
+        return offsets,confidences
+
+    """
+    Returns preambles found in the held back scores at the end of a stream
+    """
+    def finalize(self):
+        scores=self._pending_scores
+        # Pad so a peak at the very end is still a local maximum
+        peaks=self._find_peaks(np.concatenate((scores,[0])))
+        offsets,confidences=self._accept_peaks(peaks,scores)
+        self.reset()
+        return offsets,confidences
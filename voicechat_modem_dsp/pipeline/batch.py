@@ -0,0 +1,128 @@
+from ..modulators.modulator_fsk import FSKModulator
+from .transmit import encoded_symbol_count, transmit_payload
+
+import multiprocessing
+import os
+import tempfile
+
+import numpy as np
+
+# Per-process state of pool workers
+# Modulators are built once per worker so their caches are reused
+_worker_state=dict()
+
+def _init_worker(dt, freq_map, baud, use_ecc, dtype):
+    _worker_state["modulator"]=FSKModulator(dt,freq_map,baud)
+    _worker_state["use_ecc"]=use_ecc
+    _worker_state["dtype"]=np.dtype(dtype)
+
+# Maps only the samples of one job and unmaps them before returning, so
+# workers never keep a removed buffer file alive
+def _modulate_job(job):
+    buffer_path,index,payload,offset,sample_count=job
+    dtype=_worker_state["dtype"]
+    signal=transmit_payload(_worker_state["modulator"],payload,
+                            _worker_state["use_ecc"],dtype=dtype)
+    if len(signal)!=sample_count:
+        raise RuntimeError("Modulated length differs from expected length")
+    if sample_count>0:
+        buffer=np.memmap(buffer_path,mode="r+",dtype=dtype,
+                         offset=offset*dtype.itemsize,shape=(sample_count,))
+        buffer[:]=signal
+        del buffer
+    return index
+
+"""
+Audio produced by BatchModem.modulate_batch
+audio[i] is a view into one memory-mapped buffer holding every signal
+The buffer is backed by a temporary file that close() removes
+"""
+class BatchResult(object):
+    def __init__(self, buffer, buffer_path, offsets):
+        self.buffer=buffer
+        self.buffer_path=buffer_path
+        self.offsets=offsets
+        self.audio=[buffer[offsets[i]:offsets[i+1]]
+                    for i in range(len(offsets)-1)]
+
+    def __len__(self):
+        return len(self.audio)
+
+    def __getitem__(self, index):
+        return self.audio[index]
+
+    def close(self):
+        self.audio=list()
+        self.buffer=None
+        if self.buffer_path is not None and os.path.exists(self.buffer_path):
+            os.remove(self.buffer_path)
+        self.buffer_path=None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+"""
+Encodes and modulates many independent payloads on a process pool
+
+Workers write audio straight into a shared memory-mapped buffer so only
+payload bytes and job indexes are pickled between processes
+"""
+class BatchModem(object):
+    def __init__(self, dt, freq_map, baud, use_ecc=True, processes=None,
+                 dtype=np.float32, buffer_dir=None):
+        self.modulator=FSKModulator(dt,freq_map,baud)
+        self.use_ecc=use_ecc
+        self.dtype=np.dtype(dtype)
+        if buffer_dir is None and os.path.isdir("/dev/shm"):
+            # RAM-backed on Linux so buffers never touch the disk
+            buffer_dir="/dev/shm"
+        self.buffer_dir=buffer_dir
+        if processes is None:
+            processes=os.cpu_count() or 1
+        self.processes=processes
+        self._pool=multiprocessing.Pool(processes,initializer=_init_worker,
+            initargs=(dt,dict(freq_map),baud,use_ecc,self.dtype.str))
+
+    def sample_count(self, payload_len):
+        symbol_count=encoded_symbol_count(payload_len,
+            len(self.modulator.freq_map),self.use_ecc)
+        return int(self.modulator.symbol_boundaries(symbol_count)[-1])
+
+    def modulate_batch(self, payloads, chunksize=None):
+        payloads=[bytes(payload) for payload in payloads]
+        offsets=np.zeros(len(payloads)+1,dtype=np.int64)
+        offsets[1:]=np.cumsum([self.sample_count(len(payload))
+                               for payload in payloads])
+        total_samples=int(offsets[-1])
+
+        buffer_fd,buffer_path=tempfile.mkstemp(prefix="voicechat_modem_",
+            suffix=".bin",dir=self.buffer_dir)
+        os.close(buffer_fd)
+        try:
+            # np.memmap cannot map empty files
+            buffer=np.memmap(buffer_path,mode="w+",dtype=self.dtype,
+                             shape=(max(total_samples,1),))
+            jobs=[(buffer_path,index,payload,
+                   int(offsets[index]),int(offsets[index+1]-offsets[index]))
+                  for index,payload in enumerate(payloads)]
+            if chunksize is None:
+                chunksize=max(1,len(jobs)//(4*self.processes))
+            for _ in self._pool.imap_unordered(_modulate_job,jobs,chunksize):
+                pass
+        except BaseException:
+            os.remove(buffer_path)
+            raise
+        return BatchResult(buffer,buffer_path,offsets)
+
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,197 @@
+from ..encoders.encode_stream import stream_decoder_mappings
+from ..encoders.ecc.hamming_7_4 import Hamming74StreamDecoder
+from ..encoders.interleave import StreamDeinterleaver
+from ..modulators.modulator_utils import StreamingFIRFilter
+
+import math
+
+import numpy as np
+
+"""
+Fixed-capacity FIFO of samples backed by a preallocated array
+Reads that wrap around the end are copied into a preallocated scratch array
+so that steady-state operation does not allocate sample buffers
+"""
+class SampleRingBuffer(object):
+    def __init__(self, capacity):
+        self._buffer=np.zeros(capacity)
+        self._scratch=np.zeros(capacity)
+        self._start=0
+        self.count=0
+
+    @property
+    def capacity(self):
+        return len(self._buffer)
+
+    @property
+    def free(self):
+        return self.capacity-self.count
+
+    def write(self, samples):
+        if len(samples)>self.free:
+            raise ValueError("Not enough free space in ring buffer")
+        write_start=(self._start+self.count)%self.capacity
+        first_len=min(len(samples),self.capacity-write_start)
+        self._buffer[write_start:write_start+first_len]=samples[:first_len]
+        self._buffer[:len(samples)-first_len]=samples[first_len:]
+        self.count+=len(samples)
+
+    # Returns a contiguous read-only view of the oldest sample_count samples
+    def peek(self, sample_count):
+        if sample_count>self.count:
+            raise ValueError("Not enough samples in ring buffer")
+        first_len=min(sample_count,self.capacity-self._start)
+        if first_len==sample_count:
+            view=self._buffer[self._start:self._start+sample_count]
+        else:
+            self._scratch[:first_len]=self._buffer[self._start:]
+            self._scratch[first_len:sample_count]=\
+                self._buffer[:sample_count-first_len]
+            view=self._scratch[:sample_count]
+        view=view.view()
+        view.flags.writeable=False
+        return view
+
+    def consume(self, sample_count):
+        if sample_count>self.count:
+            raise ValueError("Not enough samples in ring buffer")
+        self._start=(self._start+sample_count)%self.capacity
+        self.count-=sample_count
+
+"""
+Block-based receiver that turns audio frames into decoded bytes
+Chains filtering -> demodulation -> symbol decoding -> deinterleaving
+-> Hamming decoding with all state carried between blocks
+Deinterleaving only runs if interleave_shape is given and must match
+the shape used by encode_payload
+
+If resampler is given, audio is first resampled to the modulator rate
+using a StreamingResampler so demodulation runs at the lower working rate
+
+Audio is assumed to start at a symbol boundary
+Latency is bounded by the filter group delay plus one symbol period
+plus the bits needed to complete a byte or codeword
+"""
+class StreamingReceiver(object):
+    def __init__(self, modulator, use_ecc=True, buffer_symbols=4,
+                 resampler=None, interleave_shape=None):
+        radix=len(modulator.freq_map)
+        if radix not in stream_decoder_mappings:
+            raise ValueError("Modulator symbol count is not a supported radix")
+        # Magnitude columns are decoded as symbols 0..radix-1
+        if sorted(modulator.freq_map)!=list(range(radix)):
+            raise ValueError("Modulator symbols must be 0 to radix-1")
+        self.modulator=modulator
+        self.use_ecc=use_ecc
+        self.symbol_count=0
+        if (resampler is not None and
+                abs(resampler.output_rate*modulator.dt-1)>1e-9):
+            raise ValueError("Resampler output rate must match modulator")
+        self.resampler=resampler
+
+        self._receive_filter=modulator.receive_filter
+        if self._receive_filter is not None:
+            self._streaming_filter=StreamingFIRFilter(self._receive_filter)
+            # Linear-phase filter delays the signal by half its length
+            self._filter_delay=(len(self._receive_filter)-1)//2
+        else:
+            self._streaming_filter=None
+            self._filter_delay=0
+        self._delay_remaining=self._filter_delay
+
+        max_window_len=int(math.ceil(modulator.samples_per_symbol))
+        self._ring_buffer=SampleRingBuffer(buffer_symbols*max_window_len)
+        self._max_buffered_symbols=buffer_symbols
+        self._buffer_sample_index=0
+
+        self._symbol_decoder=stream_decoder_mappings[radix]()
+        self._deinterleaver=None
+        if interleave_shape is not None:
+            self._deinterleaver=StreamDeinterleaver(*interleave_shape)
+        self._ecc_decoder=Hamming74StreamDecoder() if use_ecc else None
+
+    @property
+    def corrected_errors(self):
+        if self._ecc_decoder is None:
+            return 0
+        return self._ecc_decoder.error_count
+
+    def _decode_symbols(self, symbols):
+        decoded=self._symbol_decoder.update(symbols)
+        if self._deinterleaver is not None:
+            decoded=self._deinterleaver.update(decoded)
+        if self._ecc_decoder is not None:
+            decoded=self._ecc_decoder.update(decoded)
+        return decoded
+
+    # Demodulates every complete symbol window in the ring buffer
+    def _demodulate_buffered(self):
+        sps=self.modulator.samples_per_symbol
+        symbol_indexes=np.arange(self.symbol_count,
+            self.symbol_count+self._max_buffered_symbols+1)
+        boundaries=np.round(symbol_indexes*sps).astype(np.int64)
+        boundaries-=self._buffer_sample_index
+        complete_count=np.searchsorted(boundaries,self._ring_buffer.count,
+                                       side="right")-1
+        if complete_count<=0:
+            return b""
+        boundaries=boundaries[:complete_count+1]
+        samples=self._ring_buffer.peek(boundaries[-1])
+        magnitudes=self.modulator.tone_magnitudes(samples,boundaries)
+        symbols=self.modulator.tone_symbols[np.argmax(magnitudes,axis=1)]
+        self._ring_buffer.consume(boundaries[-1])
+        self._buffer_sample_index+=boundaries[-1]
+        self.symbol_count+=complete_count
+        return self._decode_symbols(symbols)
+
+    def _process_filtered(self, samples):
+        # Drop the initial samples that only contain filter delay
+        skip_len=min(self._delay_remaining,len(samples))
+        self._delay_remaining-=skip_len
+        samples=samples[skip_len:]
+        decoded=list()
+        position=0
+        while position<len(samples):
+            write_len=min(self._ring_buffer.free,len(samples)-position)
+            self._ring_buffer.write(samples[position:position+write_len])
+            position+=write_len
+            decoded.append(self._demodulate_buffered())
+        return b"".join(decoded)
+
+    """
+    Processes one block of audio samples
+    Returns the bytes that were completed by this block
+    """
+    def process(self, block):
+        samples=np.asarray(block,dtype=np.float64)
+        if self.resampler is not None:
+            samples=self.resampler.process(samples)
+        return self._filter_and_process(samples)
+
+    def _filter_and_process(self, samples):
+        if self._streaming_filter is not None:
+            samples=self._streaming_filter.process(samples)
+        return self._process_filtered(samples)
+
+    """
+    Flushes the filter delay line and the decoders at the end of a stream
+    Returns any remaining bytes
+    """
+    def finalize(self):
+        decoded=b""
+        if self.resampler is not None:
+            decoded+=self._filter_and_process(self.resampler.finalize())
+        if self._streaming_filter is not None:
+            # Same as zero padding at the end of a batch convolution
+            flush_samples=np.zeros(self._filter_delay)
+            samples=self._streaming_filter.process(flush_samples)
+            decoded+=self._process_filtered(samples)
+        remaining=self._symbol_decoder.finalize()
+        if self._deinterleaver is not None:
+            remaining=(self._deinterleaver.update(remaining)+
+                       self._deinterleaver.finalize())
+        if self._ecc_decoder is not None:
+            remaining=(self._ecc_decoder.update(remaining)+
+                       self._ecc_decoder.finalize())
+        decoded+=remaining
+        return decoded
@@ -0,0 +1,38 @@
+from ..encoders.encode_pad import radix_encode, _radix_bits
+from ..encoders.ecc.hamming_7_4 import hamming_encode_7_4
+from ..encoders.interleave import block_interleave
+
+"""
+Converts a payload into the symbols sent by a modulator with radix symbols
+Payload is protected with Hamming(7,4) first if use_ecc is set
+If interleave_shape is a (rows, columns) pair, the bits are then block
+interleaved so burst errors are spread over many codewords
+"""
+def encode_payload(payload, radix, use_ecc=True, interleave_shape=None):
+    if use_ecc:
+        payload=hamming_encode_7_4(payload)
+    if interleave_shape is not None:
+        payload=block_interleave(payload,*interleave_shape)
+    return radix_encode(payload,radix)
+
+"""
+Number of symbols encode_payload returns without encoding the payload
+Interleaving does not change the length
+"""
+def encoded_symbol_count(payload_len, radix, use_ecc=True):
+    if use_ecc:
+        # Each byte becomes two 7 bit codewords
+        byte_len=(14*payload_len+7)//8
+    else:
+        byte_len=payload_len
+    bits_per_symbol=_radix_bits(radix)
+    return (8*byte_len+bits_per_symbol-1)//bits_per_symbol
+
+"""
+Encodes and modulates a payload into audio samples
+"""
+def transmit_payload(modulator, payload, use_ecc=True, interleave_shape=None,
+                     **modulate_kwargs):
+    symbols=encode_payload(payload,len(modulator.freq_map),use_ecc,
+                           interleave_shape)
+    return modulator.modulate(symbols,**modulate_kwargs)
@@ -0,0 +1,36 @@
+from .lazy import LazyRegistry
+
+"""
+Lazily resolved lookup tables for encoders, ECC codecs and modulators
+
+Importing this module does not import any encoder or modulator module
+Each entry is imported the first time it is looked up, so a worker that
+only encodes data never imports the modulators or SciPy
+"""
+
+_radices=[2,4,8,16,32,64,256]
+
+encode_function_mappings=LazyRegistry(
+    {radix:"voicechat_modem_dsp.encoders.encode_pad:base_%d_encode"%radix
+     for radix in _radices})
+
+decode_function_mappings=LazyRegistry(
+    {radix:"voicechat_modem_dsp.encoders.encode_pad:base_%d_decode"%radix
+     for radix in _radices})
+
+_convolutional_codec=("voicechat_modem_dsp.encoders.ecc.convolutional:"
+                      "ConvolutionalCodec")
+
+# Same keys as encoders.ecc.codecs.ecc_codec_mappings
+ecc_codec_mappings=LazyRegistry(
+    {"hamming_7_4":"voicechat_modem_dsp.encoders.ecc.hamming_7_4:"
+                   "Hamming74Codec",
+     "hamming_8_4":"voicechat_modem_dsp.encoders.ecc.hamming_8_4:"
+                   "Hamming84Codec",
+     "convolutional_1_2":(_convolutional_codec,{"puncture":"1/2"}),
+     "convolutional_2_3":(_convolutional_codec,{"puncture":"2/3"}),
+     "convolutional_3_4":(_convolutional_codec,{"puncture":"3/4"})})
+
+modulator_mappings=LazyRegistry(
+    {"fsk":"voicechat_modem_dsp.modulators.modulator_fsk:FSKModulator",
+     "mfsk":"voicechat_modem_dsp.modulators.modulator_mfsk:MFSKModulator"})
@@ -0,0 +1,109 @@
+from ..modulators.modulator_utils import lowpass_fir_filter, apply_fir_filter
+
+import numpy as np
+
+"""
+Simulated voice channel applied to modulated audio
+
+Impairments are applied in order: band-limiting, burst dropouts, AWGN
+band is (low, high) in Hz, where a low edge of 0 means lowpass only
+Band edges are filtered with modulator_utils FIR filters whose transition
+bands are transition_width wide and lie just outside the band
+Dropouts start with a rate of burst_rate per second and silence
+burst_duration seconds of audio each, like codec packet loss
+Consecutive calls to apply are treated as one continuous stream, so a
+burst that starts near the end of one block continues into the next
+until reset is called
+snr_db is the ratio of mean signal power before dropouts to noise power
+of each channel
+
+Every operation is vectorized and samples may have leading channel axes
+"""
+class Channel(object):
+    def __init__(self, dt, snr_db=None, band=None, transition_width=200,
+                 burst_rate=0, burst_duration=0, seed=None):
+        if band is not None:
+            if band[0]<0 or band[1]<=band[0]:
+                raise ValueError("Band edges must satisfy 0 <= low < high")
+            if 0<band[0]<transition_width:
+                raise ValueError("Low band edge must be 0 or at least "
+                                 "the transition width")
+            if band[1]+transition_width>0.5/dt:
+                raise ValueError("Band must end below the Nyquist frequency")
+        if burst_rate<0 or burst_duration<0:
+            raise ValueError("Burst rate and duration must not be negative")
+        self.dt=dt
+        self.snr_db=snr_db
+        self.band=band
+        self.transition_width=transition_width
+        self.burst_rate=burst_rate
+        self.burst_duration=burst_duration
+        self.rng=np.random.default_rng(seed)
+        self._band_filter=None
+        self.reset()
+
+    def reset(self):
+        # Samples of each channel still silenced by earlier bursts
+        self._burst_remaining=np.zeros((),dtype=np.int64)
+
+    @property
+    def band_filter(self):
+        if self.band is None:
+            return None
+        if self._band_filter is None:
+            low,high=self.band
+            band_filter=lowpass_fir_filter(self.dt,high,
+                                           high+self.transition_width)
+            if low>0:
+                # Difference of lowpass filters, with the shorter one
+                # zero padded on both ends to keep the same center tap
+                low_filter=lowpass_fir_filter(self.dt,
+                    low-self.transition_width,low)
+                pad_len=(len(band_filter)-len(low_filter))//2
+                if pad_len>=0:
+                    low_filter=np.pad(low_filter,pad_len)
+                else:
+                    band_filter=np.pad(band_filter,-pad_len)
+                band_filter=band_filter-low_filter
+            self._band_filter=band_filter
+        return self._band_filter
+
+    # Returns a mask that is True for samples silenced by a dropout
+    # Bursts still active at the end are carried over to the next call
+    def dropout_mask(self, shape):
+        burst_len=int(round(self.burst_duration/self.dt))
+        if self.burst_rate==0 or burst_len==0:
+            return np.zeros(shape,dtype=bool)
+        sample_count=shape[-1]
+        remaining=self._burst_remaining
+        if remaining.ndim!=0 and remaining.shape!=tuple(shape[:-1]):
+            remaining=np.zeros((),dtype=np.int64)
+        starts=self.rng.random(shape)<self.burst_rate*self.dt
+        # Sample i is silenced if a burst started in the last burst_len
+        started=np.cumsum(starts,axis=-1)
+        active=started.copy()
+        active[...,burst_len:]-=started[...,:-burst_len]
+        mask=active>0
+        mask|=np.arange(sample_count)<np.expand_dims(remaining,-1)
+        # Latest start of each channel, or far enough back to have ended
+        last_start=np.where(np.any(starts,axis=-1),
+            sample_count-1-np.argmax(starts[...,::-1],axis=-1),-burst_len)
+        self._burst_remaining=np.maximum(remaining-sample_count,
+            np.maximum(last_start+burst_len-sample_count,0))
+        return mask
+
+    def apply(self, samples):
+        samples=np.asarray(samples,dtype=np.float64)
+        band_filter=self.band_filter
+        if band_filter is not None:
+            samples=apply_fir_filter(band_filter,samples)
+        else:
+            samples=samples.copy()
+        if self.snr_db is not None:
+            # Noise level follows the signal power before dropouts
+            signal_power=np.mean(samples**2,axis=-1,keepdims=True)
+            noise_std=np.sqrt(signal_power/10**(self.snr_db/10))
+        samples[self.dropout_mask(samples.shape)]=0
+        if self.snr_db is not None:
+            samples+=noise_std*self.rng.standard_normal(samples.shape)
+        return samples
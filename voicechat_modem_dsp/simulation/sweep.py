@@ -0,0 +1,116 @@
+from .channel import Channel
+from ..encoders.encode_pad import radix_decode
+from ..encoders.ecc.hamming_7_4 import hamming_decode_7_4
+from ..encoders.interleave import block_deinterleave
+from ..modulators.modulator_fsk import FSKModulator
+from ..pipeline.transmit import encode_payload
+
+from collections import namedtuple
+
+import itertools
+import multiprocessing
+import time
+
+import numpy as np
+
+# ber counts payload bit errors after decoding
+# airtime is the duration of the modulated audio in seconds
+# goodput is correctly received payload bits per second of airtime and
+# throughput is all payload bits per second of airtime
+SimulationResult=namedtuple("SimulationResult",
+    ["config","payload_bits","bit_errors","ber","airtime","goodput",
+     "throughput","elapsed"])
+
+"""
+Returns a freq_map with radix tones evenly spaced from low to high Hz
+"""
+def evenly_spaced_freq_map(radix, low=1000, high=2500):
+    frequencies=np.linspace(low,high,radix)
+    return {symbol:float(frequency)
+            for symbol,frequency in enumerate(frequencies)}
+
+"""
+Returns one config dict for every combination of the parameter lists
+"""
+def parameter_grid(**parameter_lists):
+    names=sorted(parameter_lists)
+    return [dict(zip(names,values)) for values in
+            itertools.product(*(parameter_lists[name] for name in names))]
+
+def _decode_payload(encoded, radix, use_ecc, interleave_shape):
+    # Padding bits may be corrupted by the channel so they are not checked
+    decoded=radix_decode(encoded,radix,check_padding=False)
+    if interleave_shape is not None:
+        decoded=block_deinterleave(decoded,*interleave_shape)
+    if use_ecc:
+        decoded=hamming_decode_7_4(decoded)
+    return decoded
+
+"""
+Pushes random payloads through encode -> Hamming -> modulate -> channel ->
+demodulate -> decode and counts payload bit errors
+
+Payloads are processed in chunk_bytes pieces so memory use does not grow
+with payload_bytes, and one Channel carries dropout bursts across chunks
+Channel parameters are passed on to Channel
+"""
+def simulate_link(freq_map, baud, sample_rate=8000, payload_bytes=1<<16,
+                  use_ecc=True, interleave_shape=None, snr_db=None, band=None,
+                  transition_width=200, burst_rate=0, burst_duration=0,
+                  chunk_bytes=1<<14, seed=None):
+    config={"freq_map":freq_map,"baud":baud,"sample_rate":sample_rate,
+            "payload_bytes":payload_bytes,"use_ecc":use_ecc,
+            "interleave_shape":interleave_shape,"snr_db":snr_db,
+            "band":band,"transition_width":transition_width,
+            "burst_rate":burst_rate,"burst_duration":burst_duration}
+    start_time=time.perf_counter()
+    if not isinstance(seed,np.random.SeedSequence):
+        seed=np.random.SeedSequence(seed)
+    payload_seed,channel_seed=seed.spawn(2)
+    rng=np.random.default_rng(payload_seed)
+    modulator=FSKModulator(1/sample_rate,freq_map,baud)
+    channel=Channel(modulator.dt,snr_db,band,transition_width,
+                    burst_rate,burst_duration,seed=channel_seed)
+    radix=len(freq_map)
+
+    bit_errors=0
+    sample_count=0
+    for chunk_start in range(0,payload_bytes,chunk_bytes):
+        chunk_len=min(chunk_bytes,payload_bytes-chunk_start)
+        payload=rng.bytes(chunk_len)
+        symbols=encode_payload(payload,radix,use_ecc,interleave_shape)
+        received=channel.apply(modulator.modulate(symbols))
+        sample_count+=len(received)
+        received_symbols,_=modulator.demodulate(
+            modulator.time_array(len(received)),received)
+        decoded=_decode_payload(received_symbols[:len(symbols)],radix,
+                                use_ecc,interleave_shape)
+        error_bits=np.bitwise_xor(np.frombuffer(payload,dtype=np.uint8),
+                                  np.frombuffer(decoded,dtype=np.uint8))
+        bit_errors+=int(np.count_nonzero(np.unpackbits(error_bits)))
+
+    payload_bits=8*payload_bytes
+    airtime=sample_count*modulator.dt
+    return SimulationResult(config,payload_bits,bit_errors,
+        bit_errors/payload_bits if payload_bits>0 else 0.0,airtime,
+        (payload_bits-bit_errors)/airtime if airtime>0 else 0.0,
+        payload_bits/airtime if airtime>0 else 0.0,
+        time.perf_counter()-start_time)
+
+def _simulate_job(job):
+    config,seed=job
+    return simulate_link(seed=seed,**config)
+
+"""
+Runs simulate_link for every config dict on a process pool
+Returns one SimulationResult per config in the same order
+Each config gets an independent random stream derived from seed
+processes=1 runs every config in the calling process
+"""
+def run_sweep(configs, processes=None, seed=None):
+    seeds=np.random.SeedSequence(seed).spawn(len(configs))
+    jobs=list(zip(configs,seeds))
+    if processes==1 or len(jobs)<=1:
+        return [_simulate_job(job) for job in jobs]
+    with multiprocessing.Pool(processes) as pool:
+        return pool.map(_simulate_job,jobs,chunksize=1)
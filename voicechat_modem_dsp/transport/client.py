@@ -0,0 +1,93 @@
+from .framing import read_frame, write_frame, DEFAULT_MAX_FRAME_SIZE
+from .modem_pb2 import ClientMessage, ServerMessage
+
+import asyncio
+
+import numpy as np
+
+_sample_dtype=np.dtype("<f4")
+
+"""
+Asyncio client for a ModemServer session
+
+Requests are sent one at a time and each method returns once all replies
+to its request have arrived
+Errors reported by the server are raised as ValueError
+"""
+class ModemClient(object):
+    def __init__(self, reader, writer, max_frame_size=DEFAULT_MAX_FRAME_SIZE):
+        self._reader=reader
+        self._writer=writer
+        self.max_frame_size=max_frame_size
+        self._sequence=0
+        self._lock=asyncio.Lock()
+
+    @classmethod
+    async def connect_tcp(cls, host, port, **kwargs):
+        reader,writer=await asyncio.open_connection(host,port)
+        return cls(reader,writer,**kwargs)
+
+    @classmethod
+    async def connect_unix(cls, path, **kwargs):
+        reader,writer=await asyncio.open_unix_connection(path)
+        return cls(reader,writer,**kwargs)
+
+    async def _read_reply(self, sequence):
+        response=await read_frame(self._reader,ServerMessage,
+                                  self.max_frame_size)
+        if response is None:
+            raise ConnectionError("Server closed the connection")
+        if response.sequence!=sequence:
+            raise ValueError("Reply does not match the request sequence")
+        if response.WhichOneof("body")=="error":
+            raise ValueError(response.error.message)
+        return response
+
+    # Sends one request and returns its first reply
+    async def _send(self, **body):
+        self._sequence+=1
+        write_frame(self._writer,ClientMessage(sequence=self._sequence,**body))
+        await self._writer.drain()
+        return await self._read_reply(self._sequence)
+
+    async def configure(self, sample_rate, freq_map, baud, use_ecc=True,
+                        interleave_shape=None, block_samples=0):
+        interleave_rows,interleave_columns=interleave_shape or (0,0)
+        config={"sample_rate":sample_rate,
+                "tones":[{"symbol":symbol,"frequency":frequency}
+                         for symbol,frequency in sorted(freq_map.items())],
+                "baud":baud,
+                "use_ecc":use_ecc,
+                "interleave_rows":interleave_rows,
+                "interleave_columns":interleave_columns,
+                "block_samples":block_samples}
+        async with self._lock:
+            await self._send(config=config)
+
+    # Returns the modulated audio of payload as a float32 array
+    async def transmit(self, payload):
+        async with self._lock:
+            response=await self._send(transmit={"data":bytes(payload)})
+            blocks=[response.audio.samples]
+            while not response.audio.last:
+                response=await self._read_reply(self._sequence)
+                blocks.append(response.audio.samples)
+        return np.frombuffer(b"".join(blocks),dtype=_sample_dtype)
+
+    # Sends received audio and returns the bytes it completed
+    async def receive(self, samples):
+        samples=np.asarray(samples,dtype=_sample_dtype)
+        async with self._lock:
+            response=await self._send(receive={"samples":samples.tobytes()})
+        return response.payload.data
+
+    # Ends the received stream and returns the remaining bytes
+    async def end_of_stream(self):
+        async with self._lock:
+            response=await self._send(end_of_stream={})
+        return response.payload.data
+
+    async def close(self):
+        self._writer.close()
+        if hasattr(self._writer,"wait_closed"):
+            await self._writer.wait_closed()
@@ -0,0 +1,37 @@
+import asyncio
+import struct
+
+"""
+Length-prefixed framing of protobuf messages on asyncio streams
+
+Each frame is a 4 byte big endian length followed by the serialized message
+"""
+
+_length_struct=struct.Struct(">I")
+
+# Large enough for several seconds of float32 audio per block
+DEFAULT_MAX_FRAME_SIZE=16*1024*1024
+
+"""
+Reads one message of type message_class
+Returns None if the stream ends cleanly between frames
+"""
+async def read_frame(reader, message_class,
+                     max_frame_size=DEFAULT_MAX_FRAME_SIZE):
+    try:
+        header=await reader.readexactly(_length_struct.size)
+    except asyncio.IncompleteReadError as e:
+        if len(e.partial)==0:
+            return None
+        raise
+    frame_size,=_length_struct.unpack(header)
+    if frame_size>max_frame_size:
+        raise ValueError("Frame exceeds maximum frame size")
+    message=message_class()
+    message.ParseFromString(await reader.readexactly(frame_size))
+    return message
+
+# Callers should await writer.drain() to apply backpressure
+def write_frame(writer, message):
+    data=message.SerializeToString()
+    writer.write(_length_struct.pack(len(data))+data)
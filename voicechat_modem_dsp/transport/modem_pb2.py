@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# source: modem.proto
+"""Generated protocol buffer code."""
+from google.protobuf.internal import builder as _builder
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import symbol_database as _symbol_database
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0bmodem.proto\x12\x0fvoicechat_modem\"0\n\x0bToneMapping\x12\x0e\n\x06symbol\x18\x01 \x01(\r\x12\x11\n\tfrequency\x18\x02 \x01(\x01\"\xbc\x01\n\rSessionConfig\x12\x13\n\x0bsample_rate\x18\x01 \x01(\x01\x12+\n\x05tones\x18\x02 \x03(\x0b\x32\x1c.voicechat_modem.ToneMapping\x12\x0c\n\x04\x62\x61ud\x18\x03 \x01(\x01\x12\x0f\n\x07use_ecc\x18\x04 \x01(\x08\x12\x17\n\x0finterleave_rows\x18\x05 \x01(\r\x12\x1a\n\x12interleave_columns\x18\x06 \x01(\r\x12\x15\n\rblock_samples\x18\x07 \x01(\r\"+\n\nAudioBlock\x12\x0f\n\x07samples\x18\x01 \x01(\x0c\x12\x0c\n\x04last\x18\x02 \x01(\x08\"%\n\x07Payload\x12\x0c\n\x04\x64\x61ta\x18\x01 \x01(\x0c\x12\x0c\n\x04last\x18\x02 \x01(\x08\"\r\n\x0b\x45ndOfStream\"\x05\n\x03\x41\x63k\"\x18\n\x05\x45rror\x12\x0f\n\x07message\x18\x01 \x01(\t\"\xf0\x01\n\rClientMessage\x12\x10\n\x08sequence\x18\x01 \x01(\x04\x12\x30\n\x06\x63onfig\x18\x02 \x01(\x0b\x32\x1e.voicechat_modem.SessionConfigH\x00\x12,\n\x08transmit\x18\x03 \x01(\x0b\x32\x18.voicechat_modem.PayloadH\x00\x12.\n\x07receive\x18\x04 \x01(\x0b\x32\x1b.voicechat_modem.AudioBlockH\x00\x12\x35\n\rend_of_stream\x18\x05 \x01(\x0b\x32\x1c.voicechat_modem.EndOfStreamH\x00\x42\x06\n\x04\x62ody\"\xd2\x01\n\rServerMessage\x12\x10\n\x08sequence\x18\x01 \x01(\x04\x12#\n\x03\x61\x63k\x18\x02 \x01(\x0b\x32\x14.voicechat_modem.AckH\x00\x12,\n\x05\x61udio\x18\x03 \x01(\x0b\x32\x1b.voicechat_modem.AudioBlockH\x00\x12+\n\x07payload\x18\x04 \x01(\x0b\x32\x18.voicechat_modem.PayloadH\x00\x12\'\n\x05\x65rror\x18\x05 \x01(\x0b\x32\x16.voicechat_modem.ErrorH\x00\x42\x06\n\x04\x62odyb\x06proto3')
+
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'modem_pb2', globals())
+if _descriptor._USE_C_DESCRIPTORS == False:
+
+  DESCRIPTOR._options = None
+  _TONEMAPPING._serialized_start=32
+  _TONEMAPPING._serialized_end=80
+  _SESSIONCONFIG._serialized_start=83
+  _SESSIONCONFIG._serialized_end=271
+  _AUDIOBLOCK._serialized_start=273
+  _AUDIOBLOCK._serialized_end=316
+  _PAYLOAD._serialized_start=318
+  _PAYLOAD._serialized_end=355
+  _ENDOFSTREAM._serialized_start=357
+  _ENDOFSTREAM._serialized_end=370
+  _ACK._serialized_start=372
+  _ACK._serialized_end=377
+  _ERROR._serialized_start=379
+  _ERROR._serialized_end=403
+  _CLIENTMESSAGE._serialized_start=406
+  _CLIENTMESSAGE._serialized_end=646
+  _SERVERMESSAGE._serialized_start=649
+  _SERVERMESSAGE._serialized_end=859
+# @@protoc_insertion_point(module_scope)
@@ -0,0 +1,238 @@
+from .framing import read_frame, write_frame, DEFAULT_MAX_FRAME_SIZE
+from .modem_pb2 import ClientMessage, ServerMessage
+from ..modulators.modulator_fsk import FSKModulator
+from ..pipeline.receive import StreamingReceiver
+from ..pipeline.transmit import transmit_payload
+
+import asyncio
+import concurrent.futures
+
+import numpy as np
+from google.protobuf.message import DecodeError
+
+_sample_dtype=np.dtype("<f4")
+
+# Upper bound on everything in an audio reply frame except its samples
+_audio_frame_overhead=64
+
+# asyncio.current_task was added in Python 3.7
+_current_task=getattr(asyncio,"current_task",None) or \
+    asyncio.Task.current_task
+
+def _with_sequence(responses, sequence):
+    for response in responses:
+        response.sequence=sequence
+        yield response
+
+"""
+State of one client connection
+handle() runs in an executor thread and is never called concurrently for
+the same session, so the streaming receiver needs no locking
+Audio blocks are limited so every reply fits in max_frame_size
+"""
+class ModemSession(object):
+    def __init__(self, block_samples=4096,
+                 max_frame_size=DEFAULT_MAX_FRAME_SIZE):
+        self.max_block_samples=((max_frame_size-_audio_frame_overhead)//
+                                _sample_dtype.itemsize)
+        if not 0<block_samples<=self.max_block_samples:
+            raise ValueError("Block size must be between 1 and "+
+                             str(self.max_block_samples)+" samples")
+        self.default_block_samples=block_samples
+        self.block_samples=block_samples
+        self.modulator=None
+        self.receiver=None
+        self.use_ecc=True
+        self.interleave_shape=None
+
+    def _configure(self, config):
+        freq_map=dict()
+        for tone in config.tones:
+            if tone.symbol in freq_map:
+                raise ValueError("Symbol "+str(tone.symbol)+
+                                 " is mapped more than once")
+            freq_map[tone.symbol]=tone.frequency
+        if config.block_samples>self.max_block_samples:
+            raise ValueError("Block size must be at most "+
+                             str(self.max_block_samples)+" samples")
+        if not config.sample_rate>0 or not np.isfinite(config.sample_rate):
+            raise ValueError("Sample rate must be positive")
+        if not config.baud>0 or not np.isfinite(config.baud):
+            raise ValueError("Baud must be positive")
+        modulator=FSKModulator(1/config.sample_rate,freq_map,config.baud)
+        interleave_shape=None
+        if config.interleave_rows>0 and config.interleave_columns>0:
+            interleave_shape=(config.interleave_rows,
+                              config.interleave_columns)
+        # Validates that the tone count is a supported radix
+        receiver=StreamingReceiver(modulator,config.use_ecc,
+                                   interleave_shape=interleave_shape)
+        self.modulator=modulator
+        self.receiver=receiver
+        self.use_ecc=config.use_ecc
+        self.interleave_shape=interleave_shape
+        self.block_samples=config.block_samples or self.default_block_samples
+        return [ServerMessage(ack={})]
+
+    def _require_config(self):
+        if self.modulator is None:
+            raise ValueError("Session has not been configured")
+
+    def _transmit(self, payload):
+        self._require_config()
+        samples=transmit_payload(self.modulator,payload.data,self.use_ecc,
+                                 self.interleave_shape,dtype=np.float32)
+        samples=samples.astype(_sample_dtype,copy=False)
+        block_samples=self.block_samples
+        block_starts=range(0,max(1,len(samples)),block_samples)
+        # Blocks are built one at a time as the replies are written
+        return (ServerMessage(audio={
+                    "samples":samples[start:start+block_samples].tobytes(),
+                    "last":start+block_samples>=len(samples)})
+                for start in block_starts)
+
+    def _receive(self, audio):
+        self._require_config()
+        if len(audio.samples)%_sample_dtype.itemsize!=0:
+            raise ValueError("Audio block is not a whole number of samples")
+        samples=np.frombuffer(audio.samples,dtype=_sample_dtype)
+        return [ServerMessage(payload={"data":self.receiver.process(samples)})]
+
+    def _end_of_stream(self):
+        self._require_config()
+        data=self.receiver.finalize()
+        # Start a fresh stream with the same configuration
+        self.receiver=StreamingReceiver(self.modulator,self.use_ecc,
+                                        interleave_shape=self.interleave_shape)
+        return [ServerMessage(payload={"data":data,"last":True})]
+
+    """
+    Returns an iterator over the replies to one client message
+    Invalid requests are answered with an Error message
+    """
+    def handle(self, message):
+        body=message.WhichOneof("body")
+        try:
+            if body=="config":
+                responses=self._configure(message.config)
+            elif body=="transmit":
+                responses=self._transmit(message.transmit)
+            elif body=="receive":
+                responses=self._receive(message.receive)
+            elif body=="end_of_stream":
+                responses=self._end_of_stream()
+            else:
+                raise ValueError("Message has no body")
+        except ValueError as e:
+            responses=[ServerMessage(error={"message":str(e)})]
+        return _with_sequence(responses,message.sequence)
+
+"""
+Asyncio server for live modem sessions over TCP or Unix sockets
+
+Every connection is an independent session handled by its own coroutines
+Encoding, ECC and modulation run in executor, which defaults to a thread
+pool since NumPy and SciPy release the GIL for the heavy operations
+
+Backpressure is bounded per session: at most max_pending requests are
+queued before the server stops reading from the socket, and replies are
+only produced as fast as the client reads them
+Each reply is built in the executor and written before the next one is
+built, so a long transmission never sits in memory as a list of blocks
+"""
+class ModemServer(object):
+    def __init__(self, executor=None, max_pending=8,
+                 max_frame_size=DEFAULT_MAX_FRAME_SIZE, block_samples=4096):
+        if executor is None:
+            executor=concurrent.futures.ThreadPoolExecutor()
+            self._owns_executor=True
+        else:
+            self._owns_executor=False
+        self.executor=executor
+        self.max_pending=max_pending
+        self.max_frame_size=max_frame_size
+        # Checks block_samples against max_frame_size
+        ModemSession(block_samples,max_frame_size)
+        self.block_samples=block_samples
+        self._servers=list()
+        self._connections=set()
+
+    async def start_tcp(self, host=None, port=0):
+        server=await asyncio.start_server(self._handle_connection,host,port)
+        self._servers.append(server)
+        return server
+
+    async def start_unix(self, path):
+        server=await asyncio.start_unix_server(self._handle_connection,path)
+        self._servers.append(server)
+        return server
+
+    def close(self):
+        for server in self._servers:
+            server.close()
+
+    # Waits for the listening sockets and for open sessions to finish
+    async def wait_closed(self):
+        for server in self._servers:
+            await server.wait_closed()
+        self._servers=list()
+        if self._connections:
+            await asyncio.wait(list(self._connections))
+        if self._owns_executor:
+            self.executor.shutdown(wait=False)
+
+    async def _run_session(self, session, queue, writer):
+        loop=asyncio.get_event_loop()
+        connected=True
+        while True:
+            message=await queue.get()
+            if message is None:
+                return
+            if not connected:
+                # Keep draining so the reader never blocks on a full queue
+                continue
+            try:
+                responses=await loop.run_in_executor(self.executor,
+                                                     session.handle,message)
+                while True:
+                    response=await loop.run_in_executor(self.executor,
+                        next,responses,None)
+                    if response is None:
+                        break
+                    write_frame(writer,response)
+                    await writer.drain()
+            except ConnectionError:
+                connected=False
+            except Exception as e:
+                # Unexpected failures are reported so the client never
+                # waits on a request that will not be answered
+                try:
+                    write_frame(writer,ServerMessage(
+                        sequence=message.sequence,
+                        error={"message":"Internal error: "+repr(e)}))
+                    await writer.drain()
+                except ConnectionError:
+                    connected=False
+
+    async def _handle_connection(self, reader, writer):
+        connection=_current_task()
+        self._connections.add(connection)
+        session=ModemSession(self.block_samples,self.max_frame_size)
+        queue=asyncio.Queue(maxsize=self.max_pending)
+        worker=asyncio.ensure_future(self._run_session(session,queue,writer))
+        try:
+            while True:
+                message=await read_frame(reader,ClientMessage,
+                                         self.max_frame_size)
+                if message is None:
+                    break
+                await queue.put(message)
+        except (ValueError, DecodeError, ConnectionError,
+                asyncio.IncompleteReadError):
+            # Malformed or truncated frames end the session
+            pass
+        finally:
+            await queue.put(None)
+            await worker
+            writer.close()
+            self._connections.discard(connection)